@@ -21,11 +21,16 @@ import datetime
 from collections import Counter
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 
 from discrepancies.models import ServerDiscrepancyPamela, PamelaAnalysisSnapshot, PamelaImportStatus
-from discrepancies.pamela_db_utils import get_missing_servers
-from discrepancies.pamela_sync import PAMELA_TOOL_CHOICES, write_log, sync_serverdiscrepancypamela, update_pamela_tracker
+from discrepancies.listbox_index import build_listbox_index
+from discrepancies.trend_series import record_trend_points
+from discrepancies.pamela_db_utils import get_missing_servers, get_missing_servers_range
+from discrepancies.pamela_sync import (
+    PAMELA_TOOL_CHOICES, write_log, sync_serverdiscrepancypamela, update_pamela_tracker, replay_pamela_tracker,
+)
 
 # A single tool's server count swinging by more than this vs. the last snapshot before it (or
 # coming back as exactly 0) is treated as a bad query result for that tool, not real news — see
@@ -80,39 +85,116 @@ def fetch_current_missing(target_date, as_of, force=False):
         report_name = f'missing_{tool}'
         write_log(f"Querying {report_name} for {target_date}...")
         rows = get_missing_servers(report_name, target_date)
-        current_count = len(rows)
-        write_log(f"  -> {current_count} servers missing {tool}")
+        write_log(f"  -> {len(rows)} servers missing {tool}")
 
-        trust_fetch = True
-        if previous_snapshot is not None:
-            previous_count = previous_snapshot.tool_counts.get(tool, 0)
-            if current_count == 0:
-                write_log(f"  -> SKIPPED {tool}: query returned 0 (never a real count for this tool) — carrying forward existing data")
-                trust_fetch = False
-            elif previous_count > 0:
-                delta = abs(current_count - previous_count) / previous_count
-                if delta > PAMELA_DELTA_THRESHOLD:
-                    write_log(
-                        f"  -> SKIPPED {tool}: {current_count} vs previous {previous_count} "
-                        f"({delta:.0%} change > {PAMELA_DELTA_THRESHOLD:.0%} threshold) — carrying forward existing data"
-                    )
-                    trust_fetch = False
-
-        if trust_fetch:
-            for row in rows:
-                sid = row['SERVER_ID']
-                entry = current.setdefault(sid, {
-                    'techfamily': row['techfamily'],
-                    'area': row['area'],
-                    'missing': set(),
-                })
-                entry['missing'].add(tool)
+        previous_count = previous_snapshot.tool_counts.get(tool, 0) if previous_snapshot is not None else None
+        if _tool_fetch_trusted(tool, len(rows), previous_count):
+            _merge_tool_rows(tool, rows, current)
         else:
             _carry_forward_tool(tool, current)
 
     return current
 
 
+def _tool_fetch_trusted(tool, current_count, previous_count):
+    # The per-tool check described in fetch_current_missing()'s docstring, shared with
+    # fetch_missing_range(). previous_count=None means "nothing to compare against" (no previous
+    # snapshot, or --force) and always trusts the fetch.
+    if previous_count is None:
+        return True
+    if current_count == 0:
+        write_log(f"  -> SKIPPED {tool}: query returned 0 (never a real count for this tool) — carrying forward existing data")
+        return False
+    if previous_count > 0:
+        delta = abs(current_count - previous_count) / previous_count
+        if delta > PAMELA_DELTA_THRESHOLD:
+            write_log(
+                f"  -> SKIPPED {tool}: {current_count} vs previous {previous_count} "
+                f"({delta:.0%} change > {PAMELA_DELTA_THRESHOLD:.0%} threshold) — carrying forward existing data"
+            )
+            return False
+    return True
+
+
+def _merge_tool_rows(tool, rows, current):
+    for row in rows:
+        entry = current.setdefault(row['SERVER_ID'], {
+            'techfamily': row['techfamily'],
+            'area': row['area'],
+            'missing': set(),
+        })
+        entry['missing'].add(tool)
+
+
+def _tool_counts(current):
+    tool_counts = Counter()
+    for data in current.values():
+        tool_counts.update(data['missing'])
+    return dict(tool_counts)
+
+
+def fetch_missing_range(start_date, end_date, force=False):
+    """
+    --from/--to mode: fetch_current_missing() for every calendar day in [start_date, end_date],
+    but with ONE query per tool for the whole range (pamela_db_utils.get_missing_servers_range)
+    instead of one per tool per day — 6 round-trips for a 90-day backfill, not 540. Returns
+    [(date, current), ...] in chronological order, each `current` shaped exactly like
+    fetch_current_missing()'s return value.
+
+    The per-tool safety check runs day by day in memory, exactly as a chronological sequence of
+    --date runs would: the first day compares against the last PamelaAnalysisSnapshot before
+    start_date, every later day against the day just before it in the range. A distrusted tool
+    carries forward its server set from the previous day in the range (the first day falls back
+    to _carry_forward_tool, same approximation as a single --date).
+
+    A day where PAMELA has no rows for ANY tool is skipped entirely (logged, no snapshot) — that's
+    a day the source itself has no data for, not six simultaneous bad queries; writing an
+    all-zero or carried-forward snapshot for it would invent a data point the chart shouldn't show.
+    """
+    rows_by_tool = {}
+    for tool in PAMELA_TOOL_CHOICES:
+        report_name = f'missing_{tool}'
+        write_log(f"Querying {report_name} for {start_date} -> {end_date}...")
+        rows_by_tool[tool] = get_missing_servers_range(report_name, start_date, end_date)
+        write_log(f"  -> {sum(len(rows) for rows in rows_by_tool[tool].values())} rows over {len(rows_by_tool[tool])} day(s)")
+
+    previous_counts = None
+    if not force:
+        as_of = timezone.make_aware(datetime.datetime.combine(start_date, datetime.time.min))
+        previous_snapshot = PamelaAnalysisSnapshot.objects.filter(analysis_date__lt=as_of).order_by('-analysis_date').first()
+        if previous_snapshot is not None:
+            previous_counts = dict(previous_snapshot.tool_counts)
+
+    per_day = []
+    previous_rows = {}
+    day = start_date
+    while day <= end_date:
+        if not any(day in by_day for by_day in rows_by_tool.values()):
+            write_log(f"{day}: no PAMELA rows for any tool — skipped")
+            day += datetime.timedelta(days=1)
+            continue
+
+        write_log(f"{day}:")
+        current = {}
+        for tool, by_day in rows_by_tool.items():
+            rows = by_day.get(day, [])
+            previous_count = previous_counts.get(tool, 0) if previous_counts is not None else None
+            if not _tool_fetch_trusted(tool, len(rows), previous_count):
+                if tool not in previous_rows:
+                    _carry_forward_tool(tool, current)
+                    continue
+                rows = previous_rows[tool]
+            _merge_tool_rows(tool, rows, current)
+            previous_rows[tool] = rows
+
+        if not force:
+            previous_counts = _tool_counts(current)
+        per_day.append((day, current))
+        day += datetime.timedelta(days=1)
+
+    return per_day
+
+
 def _backfill_snapshot(target_date, current):
     """
     --date mode: (re)creates ONLY the PamelaAnalysisSnapshot for that calendar day — does NOT
@@ -132,9 +214,7 @@ def _backfill_snapshot(target_date, current):
     imprecision analyze_discrepancies.py already lives with when a run fails — not something
     worth the risk of trying to rewrite tracker history for.
     """
-    tool_counts = Counter()
-    for data in current.values():
-        tool_counts.update(data['missing'])
+    tool_counts = _tool_counts(current)
 
     snapshot_date = datetime.date.fromisoformat(target_date) if isinstance(target_date, str) else target_date
     snapshot_dt = timezone.make_aware(datetime.datetime.combine(snapshot_date, datetime.time.min))
@@ -146,15 +226,43 @@ def _backfill_snapshot(target_date, current):
     replaced_count = replaced.count()
     replaced.delete()
 
-    PamelaAnalysisSnapshot.objects.create(
+    snapshot = PamelaAnalysisSnapshot.objects.create(
         analysis_date=snapshot_dt,
         servers_with_any_missing=len(current),
-        tool_counts=dict(tool_counts),
+        tool_counts=tool_counts,
     )
+    record_trend_points('pamela', [snapshot])
     write_log(
         f"Snapshot backfilled for {snapshot_date}"
         + (f" (replaced {replaced_count} existing row)" if replaced_count else "")
-        + f": {len(current)} servers with issues, tool_counts={dict(tool_counts)}"
+        + f": {len(current)} servers with issues, tool_counts={tool_counts}"
+    )
+
+
+def _backfill_snapshots(per_day):
+    """
+    --from/--to mode: _backfill_snapshot() for every (date, current) fetch_missing_range()
+    returned, as one delete + one bulk_create inside a single transaction — either the whole
+    range is backfilled or none of it is. Same snapshot-only contract as _backfill_snapshot():
+    ServerDiscrepancyPamela / PamelaDiscrepancyTracking are not touched. Only the days actually
+    being written are replaced; a day fetch_missing_range() skipped keeps whatever it had.
+    """
+    days = [day for day, _ in per_day]
+    snapshots = [
+        PamelaAnalysisSnapshot(
+            analysis_date=timezone.make_aware(datetime.datetime.combine(day, datetime.time.min)),
+            servers_with_any_missing=len(current),
+            tool_counts=_tool_counts(current),
+        )
+        for day, current in per_day
+    ]
+    with transaction.atomic():
+        replaced_count, _ = PamelaAnalysisSnapshot.objects.filter(analysis_date__date__in=days).delete()
+        PamelaAnalysisSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+        record_trend_points('pamela', snapshots)
+    write_log(
+        f"Snapshots backfilled for {len(snapshots)} day(s)"
+        + (f" (replaced {replaced_count} existing row(s))" if replaced_count else "")
     )
 
 
@@ -168,16 +276,43 @@ def _full_sync(current, sync_now):
 
     update_pamela_tracker(current, now=sync_now)
 
-    tool_counts = Counter()
-    for data in current.values():
-        tool_counts.update(data['missing'])
+    tool_counts = _tool_counts(current)
     PamelaAnalysisSnapshot.objects.filter(analysis_date__date=sync_now.date()).delete()
-    PamelaAnalysisSnapshot.objects.create(
+    snapshot = PamelaAnalysisSnapshot.objects.create(
         analysis_date=sync_now,
         servers_with_any_missing=len(current),
-        tool_counts=dict(tool_counts),
+        tool_counts=tool_counts,
+        listbox_values=build_listbox_index('pamela'),
     )
-    write_log(f"Snapshot saved: {len(current)} servers with issues, tool_counts={dict(tool_counts)}")
+    record_trend_points('pamela', [snapshot])
+    write_log(f"Snapshot saved: {len(current)} servers with issues, tool_counts={tool_counts}")
+
+
+def _replay_range(per_day):
+    """
+    --from/--to --replay-tracker: the end state of running --date X --replay-tracker for every
+    day of the range in order, in one transaction — every day's snapshot (one bulk write, via
+    _backfill_snapshots), the tracker replayed in memory (pamela_sync.replay_pamela_tracker)
+    and ServerDiscrepancyPamela synced once to the LAST day. Same DEV-bootstrapping-only
+    caveats as --replay-tracker itself.
+    """
+    if not per_day:
+        write_log("No PAMELA data in range — nothing to replay")
+        return
+    pinned = [
+        (timezone.make_aware(datetime.datetime.combine(day, datetime.time.min)), current)
+        for day, current in per_day
+    ]
+    with transaction.atomic():
+        _backfill_snapshots(per_day)
+        replay_pamela_tracker(pinned)
+        created, updated, deleted = sync_serverdiscrepancypamela(pinned[-1][1])
+        write_log(f"ServerDiscrepancyPamela: {created} created, {updated} updated, {deleted} removed (no longer missing anything)")
+        # Only the last day's snapshot matches what ServerDiscrepancyPamela now holds — it's the
+        # one pamela_server_view's dropdowns read (see listbox_index.py).
+        PamelaAnalysisSnapshot.objects.filter(analysis_date=pinned[-1][0]).update(
+            listbox_values=build_listbox_index('pamela'),
+        )
 
 
 class Command(BaseCommand):
@@ -195,10 +330,24 @@ class Command(BaseCommand):
                 'tracker for DEV bootstrapping (see that flag\'s help).'
             ),
         )
+        parser.add_argument(
+            '--from', dest='from_date', type=str, default=None,
+            help=(
+                'Range backfill (YYYY-MM-DD, with --to): same as --date for every day from --from '
+                'to --to inclusive, but one query per tool for the whole range and every snapshot '
+                'written in one transaction — use this instead of looping --date over a gap. '
+                'Snapshot-only, like --date, unless combined with --replay-tracker (then the tracker '
+                'is replayed over the whole range in memory and written once).'
+            ),
+        )
+        parser.add_argument(
+            '--to', dest='to_date', type=str, default=None,
+            help='Last day (inclusive, YYYY-MM-DD) of a --from range backfill',
+        )
         parser.add_argument(
             '--replay-tracker', action='store_true',
             help=(
-                'Only valid with --date. DEV bootstrapping only — NOT for a one-off prod backfill: '
+                'Only valid with --date or --from/--to. DEV bootstrapping only — NOT for a one-off prod backfill: '
                 'also syncs ServerDiscrepancyPamela / PamelaDiscrepancyTracking for --date, with '
                 '"now" pinned to that date instead of the real current time, so first_seen/days_open '
                 'build up correctly. Run a sequence of dates in strict chronological order, ending '
@@ -232,8 +381,24 @@ class Command(BaseCommand):
         replay_tracker = options['replay_tracker']
         target_date = options['date'] or timezone.now().date().isoformat()
 
+        is_range = bool(options['from_date'] or options['to_date'])
+        if is_range:
+            if not (options['from_date'] and options['to_date']):
+                write_log("ERROR: --from and --to must be given together")
+                return
+            if is_backfill:
+                write_log("ERROR: --from/--to cannot be combined with --date")
+                return
+            start_date = datetime.date.fromisoformat(options['from_date'])
+            end_date = datetime.date.fromisoformat(options['to_date'])
+            if start_date > end_date:
+                write_log("ERROR: --from must be on or before --to")
+                return
+            self._handle_range(start_date, end_date, options, start_time, replay_tracker)
+            return
+
         if replay_tracker and not is_backfill:
-            write_log("ERROR: --replay-tracker requires --date")
+            write_log("ERROR: --replay-tracker requires --date or --from/--to")
             return
 
         # The moment the per-tool delta check compares against ("last snapshot strictly before
@@ -284,3 +449,33 @@ class Command(BaseCommand):
             write_log(f"ERROR: {e}")
             PamelaImportStatus.objects.create(success=False, message=msg)
             raise
+
+    def _handle_range(self, start_date, end_date, options, start_time, replay_tracker):
+        mode_label = '[REPLAY: full sync, replayed in memory]' if replay_tracker else '[BACKFILL: snapshot-only]'
+        write_log(f"Target range: {start_date} -> {end_date}  {mode_label}")
+        try:
+            per_day = fetch_missing_range(start_date, end_date, force=options['force'])
+
+            if options['dry_run']:
+                action = "sync ServerDiscrepancyPamela / PamelaDiscrepancyTracking and write" if replay_tracker else "backfill"
+                write_log(f"[DRY RUN] Would {action} {len(per_day)} PamelaAnalysisSnapshot row(s) — nothing written")
+                for day, current in per_day:
+                    write_log(f"  {day}: {len(current)} servers with issues, tool_counts={_tool_counts(current)}")
+                return
+
+            if replay_tracker:
+                _replay_range(per_day)
+                msg = f"Pamela tracker replayed for {start_date} -> {end_date}: {len(per_day)} day(s)"
+            else:
+                _backfill_snapshots(per_day)
+                msg = f"Pamela snapshots backfilled for {start_date} -> {end_date}: {len(per_day)} day(s)"
+
+            duration = datetime.datetime.now() - start_time
+            write_log(f"Completed in {duration}")
+            PamelaImportStatus.objects.create(success=True, message=msg, nb_entries_created=len(per_day))
+
+        except Exception as e:
+            msg = f"Error during the execution of analyze_pamela_discrepancies: {e}"
+            write_log(f"ERROR: {e}")
+            PamelaImportStatus.objects.create(success=False, message=msg)
+            raise
@@ -26,6 +26,7 @@ from django.utils import timezone
 from discrepancies.models import PamelaAnalysisSnapshot, PamelaImportStatus
 from discrepancies.pamela_db_utils import get_missing_servers
 from discrepancies.pamela_sync import PAMELA_TOOL_CHOICES, write_log, sync_serverdiscrepancypamela, update_pamela_tracker
+from discrepancies.trend_series import record_trend_points
 
 
 def fetch_current_missing(target_date):
@@ -93,11 +94,12 @@ class Command(BaseCommand):
             tool_counts = Counter()
             for data in current.values():
                 tool_counts.update(data['missing'])
-            PamelaAnalysisSnapshot.objects.create(
+            snapshot = PamelaAnalysisSnapshot.objects.create(
                 analysis_date=timezone.now(),
                 servers_with_any_missing=len(current),
                 tool_counts=dict(tool_counts),
             )
+            record_trend_points('pamela', [snapshot])
             write_log(f"Snapshot saved: {len(current)} servers with issues, tool_counts={dict(tool_counts)}")
 
             duration = datetime.datetime.now() - start_time
@@ -0,0 +1,134 @@
+import datetime
+import os
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from discrepancies.management.commands.analyze_pamela_discrepancies import fetch_current_missing
+from discrepancies.models import PamelaAnalysisSnapshot
+from discrepancies.pamela_fixture import build_fixture_db, fixture_dates
+from discrepancies.pamela_sync import write_log, sync_serverdiscrepancypamela, update_pamela_tracker
+from discrepancies.trend_series import record_trend_points
+
+DEFAULT_FIXTURE_PATH = 'pamela_fixture.sqlite3'
+
+
+class _Rollback(Exception):
+    # Raised at the end of the timed block to undo everything the benchmark wrote — the
+    # benchmark runs the real write paths against the real tables, so without --keep it must
+    # leave them exactly as it found them.
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the PAMELA pipeline end to end (fetch -> ServerDiscrepancyPamela sync -> '
+        'tracker -> snapshot) against a local SQLite fixture instead of the MSSQL source, so '
+        'changes to any stage can be measured on a dev box with reproducible data at any fleet '
+        'size. Same functions the daily analyze_pamela_discrepancies run calls. Everything '
+        'written is rolled back at the end unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fixture', default=DEFAULT_FIXTURE_PATH,
+            help=f'SQLite fixture file to use/build (default: {DEFAULT_FIXTURE_PATH})',
+        )
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Fleet size multiplier over the real PAMELA sample counts (default: 1.0 = ~92k servers)',
+        )
+        parser.add_argument(
+            '--days', type=int, default=3,
+            help='Number of consecutive days to run through the pipeline, ending at --end-date (default: 3)',
+        )
+        parser.add_argument(
+            '--end-date', default=None,
+            help='Last simulated day, as YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Regenerate the fixture even if the file already exists (needed after changing --scale/--days/--end-date)',
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Commit what the benchmark wrote instead of rolling it back (DEV databases only)',
+        )
+
+    def handle(self, *args, **options):
+        end_date = (
+            datetime.date.fromisoformat(options['end_date'])
+            if options['end_date'] else timezone.now().date()
+        )
+        dates = fixture_dates(end_date, max(1, options['days']))
+        fixture_path = os.path.abspath(options['fixture'])
+
+        write_log("=" * 60)
+        write_log("PAMELA PIPELINE BENCHMARK START")
+        write_log("=" * 60)
+
+        if options['rebuild'] or not os.path.exists(fixture_path):
+            started = time.perf_counter()
+            rows = build_fixture_db(fixture_path, dates, scale=options['scale'])
+            write_log(f"Fixture built: {fixture_path} ({rows} rows, scale={options['scale']}) in {time.perf_counter() - started:.2f}s")
+        else:
+            write_log(f"Reusing existing fixture: {fixture_path} (pass --rebuild after changing --scale/--days/--end-date)")
+
+        os.environ['PAMELA_DB_BACKEND'] = 'sqlite'
+        os.environ['PAMELA_FIXTURE_DB'] = fixture_path
+
+        totals = Counter()
+        try:
+            with transaction.atomic():
+                for target_date in dates:
+                    sync_now = timezone.make_aware(datetime.datetime.combine(target_date, datetime.time.min))
+                    timings = {}
+
+                    # force=True: the fixture's per-day churn is synthetic, and the delta check
+                    # comparing against whatever snapshots already exist in this database would
+                    # make the fetch stage's cost depend on unrelated local history.
+                    started = time.perf_counter()
+                    current = fetch_current_missing(target_date.isoformat(), sync_now, force=True)
+                    timings['fetch'] = time.perf_counter() - started
+
+                    started = time.perf_counter()
+                    created, updated, deleted = sync_serverdiscrepancypamela(current)
+                    timings['sync'] = time.perf_counter() - started
+
+                    started = time.perf_counter()
+                    update_pamela_tracker(current, now=sync_now)
+                    timings['tracker'] = time.perf_counter() - started
+
+                    started = time.perf_counter()
+                    tool_counts = Counter()
+                    for data in current.values():
+                        tool_counts.update(data['missing'])
+                    PamelaAnalysisSnapshot.objects.filter(analysis_date__date=sync_now.date()).delete()
+                    snapshot = PamelaAnalysisSnapshot.objects.create(
+                        analysis_date=sync_now,
+                        servers_with_any_missing=len(current),
+                        tool_counts=dict(tool_counts),
+                    )
+                    record_trend_points('pamela', [snapshot])
+                    timings['snapshot'] = time.perf_counter() - started
+
+                    totals.update(timings)
+                    write_log(
+                        f"{target_date}: {len(current)} servers ({created} created / {updated} updated / {deleted} removed) — "
+                        + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+                        + f", total {sum(timings.values()):.2f}s"
+                    )
+
+                if not options['keep']:
+                    raise _Rollback()
+        except _Rollback:
+            write_log("Benchmark writes rolled back (pass --keep to commit them)")
+
+        write_log(
+            f"TOTAL over {len(dates)} day(s): "
+            + ", ".join(f"{stage} {totals[stage]:.2f}s" for stage in ('fetch', 'sync', 'tracker', 'snapshot'))
+            + f", overall {sum(totals.values()):.2f}s"
+        )
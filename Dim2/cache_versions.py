@@ -0,0 +1,20 @@
+# cache_versions.py
+#
+# Cache versions for everything derived from the discrepancy tables: the latest
+# AnalysisSnapshot / PamelaAnalysisSnapshot ID. Both analyzers finish every rewrite of
+# ServerDiscrepancy / ServerDiscrepancyPamela by creating a snapshot, so "same snapshot ID"
+# means "same rows" — a cache key carrying it never needs a TTL to notice a new run (see
+# common.swr_cache for the cache layer itself).
+
+from .models import AnalysisSnapshot, PamelaAnalysisSnapshot
+
+SNAPSHOT_MODELS = {
+    'disc': AnalysisSnapshot,
+    'pamela': PamelaAnalysisSnapshot,
+}
+
+
+def snapshot_version(source):
+    # 'disc' or 'pamela' -> latest snapshot pk, or 0 before the first analysis run.
+    latest = SNAPSHOT_MODELS[source].objects.order_by('-analysis_date').values_list('pk', flat=True).first()
+    return latest or 0
@@ -0,0 +1,76 @@
+# config_registry.py
+#
+# The app's JSON config files (field_labels.json, field_labels_pamela.json,
+# discrepancies_dashboard.json, pamela_dashboard.json, breakdown_groups.json) as parsed objects,
+# shared by every caller in the process. Several views used to open + json.load the same file
+# several times per request (breakdown_groups.json once per helper, field_labels.json twice in
+# get_filtered_servers), and then rebuild the same lookup dicts from it each time.
+#
+# load_config(name) is get_field_labels()'s mtime cache generalized to any file: parsed once,
+# re-parsed only when the file's mtime changes, last good version kept if an edit leaves the
+# file unreadable or half-written. derived(name, key, build) memoizes anything computed from a
+# config (inputname <-> field maps, bucket lookups, filter mappings...) against the same
+# version, so an edit to the file refreshes those too.
+#
+# Returned objects are shared between threads and requests — callers must not modify them.
+
+import json
+import os
+import threading
+
+CONFIG_DIR = os.path.dirname(__file__)
+
+# {path: (mtime, parsed config, {derived key: value})}
+_entries = {}
+_lock = threading.Lock()
+
+
+def _entry(name):
+    path = os.path.join(CONFIG_DIR, name)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return _entries.get(path)
+
+    entry = _entries.get(path)
+    if entry is not None and entry[0] == mtime:
+        return entry
+
+    with _lock:
+        entry = _entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return entry
+        entry = (mtime, data, {})
+        _entries[path] = entry
+        return entry
+
+
+def load_config(name, default=None):
+    """Parsed content of the app config file `name`, or `default` if it was never readable."""
+    entry = _entry(name)
+    return entry[1] if entry is not None else default
+
+
+def config_version(name):
+    """mtime of the loaded version of `name` (0 if never loaded) — for cache keys / ETags."""
+    entry = _entry(name)
+    return entry[0] if entry is not None else 0
+
+
+def derived(name, key, build):
+    """
+    build(config) for the current version of config file `name`, computed once per version
+    and per `key`. With no readable file, build({}) is returned uncached.
+    """
+    entry = _entry(name)
+    if entry is None:
+        return build({})
+    memo = entry[2]
+    if key not in memo:
+        memo[key] = build(entry[1])
+    return memo[key]
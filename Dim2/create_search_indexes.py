@@ -0,0 +1,71 @@
+import hashlib
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+
+from discrepancies.models import ServerDiscrepancy, ServerDiscrepancyPamela, DiscrepancyAnnotation
+from discrepancies.search import TRIGRAM_EXTENSION
+
+# Text columns construct_query() filters on, per table — every CharField/TextField of the two
+# server tables (i.e. every field_labels*.json field backed by a real column), plus the
+# annotation comment behind the ANNOTATION filter.
+SEARCH_INDEX_MODELS = [ServerDiscrepancy, ServerDiscrepancyPamela]
+EXTRA_SEARCH_COLUMNS = [(DiscrepancyAnnotation, 'comment')]
+
+
+def _search_columns():
+    columns = []
+    for model in SEARCH_INDEX_MODELS:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, (models.CharField, models.TextField)):
+                columns.append((model, field.column))
+    for model, field_name in EXTRA_SEARCH_COLUMNS:
+        columns.append((model, model._meta.get_field(field_name).column))
+    return columns
+
+
+def _index_name(table, column):
+    # Postgres truncates identifiers at 63 characters — keep names stable and unique instead.
+    name = f'{table}_{column.lower()}_trgm'
+    return name if len(name) <= 63 else f'{name[:54]}_{hashlib.md5(name.encode()).hexdigest()[:8]}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the pg_trgm extension and GIN trigram indexes backing construct_query() filters '
+        '(see discrepancies/search.py). Postgres only; idempotent (IF NOT EXISTS), indexes are '
+        'built CONCURRENTLY so it can run against a live database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drop', action='store_true',
+            help='Drop the trigram indexes instead of creating them (the extension is left installed)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f"Database vendor is '{connection.vendor}', not postgresql — nothing to do "
+                '(construct_query keeps using plain icontains/iexact there)'
+            ))
+            return
+
+        with connection.cursor() as cursor:
+            if not options['drop']:
+                cursor.execute(f'CREATE EXTENSION IF NOT EXISTS {TRIGRAM_EXTENSION}')
+            for model, column in _search_columns():
+                table = model._meta.db_table
+                name = _index_name(table, column)
+                qn = connection.ops.quote_name
+                if options['drop']:
+                    cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {qn(name)}')
+                    self.stdout.write(f'Dropped {name}')
+                else:
+                    cursor.execute(
+                        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(name)} '
+                        f'ON {qn(table)} USING gin ({qn(column)} gin_trgm_ops)'
+                    )
+                    self.stdout.write(f'Created {name} on {table}.{column}')
+
+        self.stdout.write(self.style.SUCCESS('Trigram search indexes up to date'))
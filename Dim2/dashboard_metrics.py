@@ -0,0 +1,298 @@
+# dashboard_metrics.py
+#
+# The Discrepancies dashboard's widget counts for one filter definition — shared by
+# dashboard_filter_api (live, for ss:/multi:/days_open selections) and analyze_discrepancies,
+# which computes them once per run for every system permanent filter of field_labels.json
+# (plus "All Servers") and stores them on the AnalysisSnapshot (dashboard_payloads). Those
+# filters are a small fixed set and only change meaning when ServerDiscrepancy does, so the
+# API serves them straight from the snapshot.
+#
+# A stored payload depends on the exclusion list as it was at analysis time — it carries that
+# list's fingerprint, and the API only uses it while the current list still matches (an
+# exclusion added/removed since the run means live counts until the next run).
+#
+# Everything else (saved searches, multi: combinations, days_open) is counted live, then kept in
+# a small per-process LRU (cached_dashboard_counts) shared by the API and the Excel export, so
+# switching back and forth between a few saved searches only counts each one once. Entries are
+# keyed on the canonical filter definition + days_open and scoped to the latest snapshot ID and
+# exclusion version — a new analysis run or an exclusion edit simply stops matching them.
+#
+# Population side (total_eligible / total_physical): a DISTINCT count over inventory.Server, the
+# largest table around. The analyzer also stores a population summary on the snapshot — eligible
+# and physical server counts grouped by every permanent-filter-relevant inventory field
+# (POPULATION_SUMMARY_FIELDS + the fields the permanent filters use) — and summary_population_counts()
+# answers any selection that only filters on those fields by summing the matching groups in
+# Python. Summing per-group distinct counts is only exact while every SERVER_ID falls in a
+# single group (inventory can hold several rows per server), so the analyzer checks that the
+# group counts add up to the exact DISTINCT totals, and stores no rows when they don't — every
+# selection then gets the exact DISTINCT query.
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .cache_versions import snapshot_version
+from .config_registry import load_config
+from .exclusions import exclusion_version
+from .models import AnalysisSnapshot, ServerDiscrepancy
+from .search import construct_query
+
+# Key of the unfiltered ("All Servers") payload in AnalysisSnapshot.dashboard_payloads
+ALL_SERVERS_PAYLOAD = ''
+
+FIELD_TO_METRIC = {
+    'LIVE_STATUS':       'missing_live_status_count',
+    'OSSHORTNAME':       'missing_osshortname_count',
+    'OSFAMILY':          'missing_osfamily_count',
+    'SNOW_SUPPORTGROUP': 'missing_snow_supportgroup_count',
+    'MACHINE_TYPE':      'missing_machine_type_count',
+    'MANUFACTURER':      'missing_manufacturer_count',
+    'COUNTRY':           'missing_country_count',
+    'APP_AUID_VALUE':    'missing_app_auid_value_count',
+    'APP_NAME_VALUE':    'missing_app_name_value_count',
+    'REGION':            'missing_region_count',
+    'CITY':              'missing_city_count',
+    'INFRAVERSION':      'missing_infraversion_count',
+    'IPADDRESS':         'missing_ipaddress_count',
+    'SNOW_STATUS':       'missing_snow_status_count',
+    'IDRAC_NAME':        'missing_idrac_name_count',
+    'IDRAC_IP':          'missing_idrac_ip_count',
+}
+
+# Result cache size (entries) — override with DISCREPANCIES_DASHBOARD_CACHE_SIZE in settings.
+# One entry is a flat dict of ~25 ints, so the default costs next to nothing per worker.
+DEFAULT_RESULT_CACHE_SIZE = 128
+# days_open counts are relative to "now", so they drift within a snapshot: cap their age.
+DAYS_OPEN_RESULT_MAX_AGE = 600
+
+# Inventory fields the population summary is always grouped by, on top of the fields the
+# permanent filters use. Low-cardinality fields only — every extra field multiplies the groups.
+POPULATION_SUMMARY_FIELDS = [
+    'REGION', 'COUNTRY', 'OSFAMILY', 'OSSHORTNAME', 'MACHINE_TYPE', 'MANUFACTURER', 'INFRAVERSION',
+]
+
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+# (snapshot ID, population summary) of the latest snapshot, per process
+_population_summary = (None, {})
+
+# Active population of the Missing Data gauge (inventory side)
+ELIGIBLE_Q = Q(LIVE_STATUS='ALIVE', SNOW_STATUS='OPERATIONAL', INFRAVERSION__in=['IV1', 'IV2', 'IBM'])
+
+
+def exclusion_fingerprint(excluded_names):
+    return hashlib.md5('\n'.join(sorted(excluded_names)).encode('utf-8')).hexdigest()
+
+
+def filter_querysets(filter_def, exclude=None, days_open_cutoff=None):
+    """
+    (ServerDiscrepancy queryset, eligible inventory queryset) for `filter_def` ({field: [terms]}),
+    minus exclusions when `exclude` (a queryset -> queryset callable, e.g.
+    exclusions.exclude_excluded) is given, and restricted to issues open since
+    `days_open_cutoff` when given.
+    """
+    from inventory.models import Server as InventoryServer
+
+    disc_q = Q()
+    inv_q = Q(INFRAVERSION__in=['IV1', 'IV2', 'IBM'])
+    inv_field_names = {f.name for f in InventoryServer._meta.get_fields()}
+    for field, values in filter_def.items():
+        disc_q &= construct_query(field, values)
+        if field in inv_field_names:
+            inv_q &= construct_query(field, values)
+
+    disc_qs = ServerDiscrepancy.objects.filter(disc_q) if disc_q else ServerDiscrepancy.objects.all()
+    inv_eligible = InventoryServer.objects.filter(ELIGIBLE_Q & inv_q)
+    if exclude is not None:
+        disc_qs = exclude(disc_qs)
+        inv_eligible = exclude(inv_eligible)
+    if days_open_cutoff is not None:
+        disc_qs = disc_qs.filter(oldest_first_seen__lte=days_open_cutoff)
+    return disc_qs, inv_eligible
+
+
+def population_counts(inv_eligible):
+    # Population: one query for both distinct counts
+    return inv_eligible.aggregate(
+        total_eligible=Count('SERVER_ID', distinct=True),
+        total_physical=Count('SERVER_ID', distinct=True, filter=Q(MACHINE_TYPE='PHYSICAL')),
+    )
+
+
+def discrepancy_counts(disc_qs):
+    # Every widget count over the discrepancy rows in ONE conditional-aggregation query
+    # (COUNT(*) FILTER (WHERE ...) per metric) instead of one COUNT per metric.
+    return disc_qs.aggregate(
+        servers_with_missing=Count('pk', filter=Q(missing_fields__gt='')),
+        inconsistency_count=Count('pk', filter=Q(alive_status_inconsistent='KO') | Q(dead_status_inconsistent='KO')),
+        alive_status_inconsistent_count=Count('pk', filter=Q(alive_status_inconsistent='KO')),
+        dead_status_inconsistent_count=Count('pk', filter=Q(dead_status_inconsistent='KO')),
+        **{
+            metric_name: Count('pk', filter=Q(missing_fields__icontains=field))
+            for field, metric_name in FIELD_TO_METRIC.items()
+        },
+    )
+
+
+def _load_permanent_filters():
+    return load_config('field_labels.json', {}).get('permanentfilters', {})
+
+
+def build_dashboard_payloads(excluded_names, exclude):
+    """
+    {permanent filter name: counts} for every system permanent filter in field_labels.json plus
+    ALL_SERVERS_PAYLOAD — what analyze_discrepancies stores on the snapshot. Each counts dict is
+    population_counts() + discrepancy_counts() + the exclusion_fingerprint it was computed with.
+    """
+    permanent_filters = _load_permanent_filters()
+    fingerprint = exclusion_fingerprint(excluded_names)
+    payloads = {}
+    for name, filter_def in [(ALL_SERVERS_PAYLOAD, {})] + list(permanent_filters.items()):
+        disc_qs, inv_eligible = filter_querysets(filter_def, exclude=exclude if excluded_names else None)
+        counts = population_counts(inv_eligible)
+        counts.update(discrepancy_counts(disc_qs))
+        counts['exclusion_fingerprint'] = fingerprint
+        payloads[name] = counts
+    return payloads
+
+
+def canonical_filter_key(filter_def):
+    # Fields are AND-ed, so their order is irrelevant; the terms within a field are kept in
+    # order (construct_query folds '!' exclusions in sequence).
+    return tuple(sorted(
+        (field, tuple(values) if isinstance(values, (list, tuple)) else (values,))
+        for field, values in filter_def.items()
+    ))
+
+
+def cached_dashboard_counts(filter_def, days_open, compute, exclusions_version=None):
+    """
+    Widget counts for `filter_def` + `days_open` from the per-process LRU (see module header),
+    calling compute() — which must return the population_counts() + discrepancy_counts() dict —
+    on a miss. `exclusions_version`: exclusion_version(), if the caller already read it. The
+    returned dict is shared: callers must not modify it.
+    """
+    key = (snapshot_version('disc'), exclusions_version or exclusion_version(), canonical_filter_key(filter_def), days_open)
+    now = time.monotonic()
+    with _result_cache_lock:
+        entry = _result_cache.get(key)
+        if entry is not None and (not days_open or now - entry[1] < DAYS_OPEN_RESULT_MAX_AGE):
+            _result_cache.move_to_end(key)
+            return entry[0]
+
+    counts = compute()
+
+    max_size = getattr(settings, 'DISCREPANCIES_DASHBOARD_CACHE_SIZE', DEFAULT_RESULT_CACHE_SIZE)
+    with _result_cache_lock:
+        _result_cache[key] = (counts, now)
+        _result_cache.move_to_end(key)
+        while len(_result_cache) > max_size:
+            _result_cache.popitem(last=False)
+    return counts
+
+
+# ── Population summary ────────────────────────────────────────────────────
+
+def build_population_summary(excluded_names, exclude):
+    """
+    {'fields': [...], 'exclusion_fingerprint': ..., 'rows': [[value per field..., eligible, physical]]}
+    — the eligible inventory population grouped by the summary fields (see module header), for
+    analyze_discrepancies to store on the snapshot. 'rows' is None when some server spans
+    several groups (the sums would overcount it).
+    """
+    from inventory.models import Server as InventoryServer
+
+    inv_field_names = {f.name for f in InventoryServer._meta.get_fields()}
+    fields = list(POPULATION_SUMMARY_FIELDS)
+    for filter_def in _load_permanent_filters().values():
+        fields.extend(field for field in filter_def if field not in fields)
+    fields = [field for field in fields if field in inv_field_names]
+
+    inv_eligible = InventoryServer.objects.filter(ELIGIBLE_Q)
+    if excluded_names:
+        inv_eligible = exclude(inv_eligible)
+    groups = (
+        inv_eligible.values(*fields)
+        .annotate(
+            total_eligible=Count('SERVER_ID', distinct=True),
+            total_physical=Count('SERVER_ID', distinct=True, filter=Q(MACHINE_TYPE='PHYSICAL')),
+        )
+        .order_by()
+    )
+    rows = [[group[field] for field in fields] + [group['total_eligible'], group['total_physical']] for group in groups]
+    # A server whose inventory rows differ on a grouped field would be counted once per group.
+    totals = population_counts(inv_eligible)
+    if (sum(row[-2] for row in rows), sum(row[-1] for row in rows)) != (totals['total_eligible'], totals['total_physical']):
+        rows = None
+    return {
+        'fields': fields,
+        'exclusion_fingerprint': exclusion_fingerprint(excluded_names),
+        'rows': rows,
+    }
+
+
+def latest_population_summary():
+    # Population summary of the latest snapshot, loaded once per snapshot per process. An empty
+    # one isn't kept: a snapshot from before the summary existed is simply read again.
+    global _population_summary
+    snapshot_id = snapshot_version('disc')
+    if _population_summary[0] != snapshot_id:
+        summary = AnalysisSnapshot.objects.filter(pk=snapshot_id).values_list('population_summary', flat=True).first()
+        if not summary:
+            return {}
+        _population_summary = (snapshot_id, summary)
+    return _population_summary[1]
+
+
+def _terms_match(value, terms):
+    # construct_query() semantics for one value: '@' exact and plain contains OR-ed in, '!'
+    # exclusions AND-ed (matching NULLs, like ~Q(...)), all case-insensitive.
+    upper = str(value).upper() if value is not None else None
+    matched = None
+    for term in terms:
+        if term.startswith('@'):
+            hit = upper is not None and upper == term[1:].upper()
+            matched = hit if matched is None else (matched or hit)
+        elif term.startswith('!'):
+            hit = upper is None or term[1:].upper() not in upper
+            matched = hit if matched is None else (matched and hit)
+        else:
+            hit = upper is not None and term.upper() in upper
+            matched = hit if matched is None else (matched or hit)
+    return True if matched is None else matched
+
+
+def summary_population_counts(filter_def, excluded_names):
+    """
+    {'total_eligible', 'total_physical'} for `filter_def` from the latest snapshot's population
+    summary — or None when the summary can't answer it (no summary yet, no rows because some
+    server spans several groups, the exclusion list changed since the run, or the selection
+    filters on an inventory field it isn't grouped by), in which case use population_counts().
+    """
+    from inventory.models import Server as InventoryServer
+
+    summary = latest_population_summary()
+    if not summary or summary.get('rows') is None or summary.get('exclusion_fingerprint') != exclusion_fingerprint(excluded_names):
+        return None
+
+    # Same field set filter_querysets() applies to the inventory side
+    inv_field_names = {f.name for f in InventoryServer._meta.get_fields()}
+    position = {field: i for i, field in enumerate(summary['fields'])}
+    conditions = []
+    for field, values in filter_def.items():
+        if field not in inv_field_names:
+            continue
+        if field not in position:
+            return None
+        conditions.append((position[field], values))
+
+    total_eligible = total_physical = 0
+    for row in summary['rows']:
+        if all(_terms_match(row[i], values) for i, values in conditions):
+            total_eligible += row[-2]
+            total_physical += row[-1]
+    return {'total_eligible': total_eligible, 'total_physical': total_physical}
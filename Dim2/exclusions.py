@@ -0,0 +1,48 @@
+# exclusions.py
+#
+# The ExcludedServer whitelist as the views need it. It used to be re-read on every request
+# (SELECT every server_name) and then shipped back into each query as
+# SERVER_ID NOT IN ('SRV1', 'SRV2', ... thousands of literals) — two round trips of the whole
+# list per filtered query.
+#
+# - exclude_excluded(queryset): the SQL side. A NOT EXISTS anti-join against the
+#   discrepancies_excludedserver table itself (indexed on server_name), so the database does the
+#   set difference and no literal list ever leaves Python.
+# - excluded_server_names(): the Python side (snapshot store masks, counts, fingerprints),
+#   cached through common.swr_cache under exclusion_version() — the table's own row count and
+#   highest pk, read from the database (one indexed aggregate) unless the caller already has
+#   it — the views read it once per request and pass it down. Any create or
+#   delete, from the exclusion APIs, the admin, a shell or another process, changes that
+#   version, so the cached set is current on the very next request in every worker. (Updates
+#   through the exclusion APIs only touch reason/owner/date, never server_name.)
+#
+# SQL queries always go through exclude_excluded(), never gated on the Python set: the anti-join
+# costs next to nothing on an empty table and is always current.
+
+from django.db.models import Count, Exists, Max, OuterRef
+
+from common.swr_cache import get_or_compute
+
+from .models import ExcludedServer
+
+EXCLUSION_CACHE_TIMEOUT = 3600
+
+
+def exclusion_version():
+    # "<row count>.<highest pk>" of ExcludedServer — for cache keys.
+    stats = ExcludedServer.objects.aggregate(rows=Count('pk'), last=Max('pk'))
+    return f"{stats['rows']}.{stats['last'] or 0}"
+
+
+def excluded_server_names(version=None):
+    """frozenset of every excluded server_name (see module header). `version`: exclusion_version(), if already read."""
+    return get_or_compute(
+        'excluded_servers', 'names',
+        lambda: frozenset(ExcludedServer.objects.values_list('server_name', flat=True)),
+        version=version or exclusion_version(), timeout=EXCLUSION_CACHE_TIMEOUT, serve_previous_version=False,
+    )
+
+
+def exclude_excluded(queryset, field='SERVER_ID'):
+    # `queryset` minus the rows whose `field` is an excluded server_name — NOT EXISTS subquery.
+    return queryset.exclude(Exists(ExcludedServer.objects.filter(server_name=OuterRef(field))))
@@ -0,0 +1,105 @@
+# listbox_index.py
+#
+# Distinct-value index behind server_view's / pamela_server_view's filter dropdowns. Each
+# listbox used to be one SELECT DISTINCT ... ORDER BY per field on every cache miss, cached for
+# a flat 3600s — stale for up to an hour after an analysis run, then every field recomputed at
+# once on expiry. The contents can only change when ServerDiscrepancy / ServerDiscrepancyPamela
+# is rewritten, and both analyzers end every run by creating a snapshot row — so the analyzer
+# computes the dropdowns once, right there, into that snapshot's listbox_values
+# ({field: [values]}), and the views read the latest snapshot's copy: one query, versioned by
+# the snapshot ID, never stale and never expiring.
+#
+# Snapshots created before listbox_values existed (or a listbox field added to the JSON since
+# the last run) are still served, by computing just the missing fields live through
+# common.swr_cache, versioned by the snapshot ID — at most once per snapshot per field, and
+# never by several requests at once.
+
+from django.db.models import F
+
+from common.swr_cache import get_or_compute
+
+from .cache_versions import SNAPSHOT_MODELS
+from .config_registry import load_config
+from .models import ServerDiscrepancy, ServerDiscrepancyPamela
+
+FIELD_LABELS_FILES = {
+    'disc': 'field_labels.json',
+    'pamela': 'field_labels_pamela.json',
+}
+# Long enough to never matter within one snapshot — the version changes first.
+LISTBOX_CACHE_TIMEOUT = 7 * 24 * 3600
+
+
+def listbox_queryset(source):
+    # Same row source the views filter: pamela_server_view exposes missing_fields as
+    # missing_tools (see views._pamela_base_qs), so its listbox for that field reads the alias.
+    if source == 'pamela':
+        return ServerDiscrepancyPamela.objects.annotate(missing_tools=F('missing_fields'))
+    return ServerDiscrepancy.objects.all()
+
+
+def listbox_fields(fields):
+    # Field names of a field_labels*.json "fields" section that get a computed dropdown
+    # (listempty fields always show a fixed ['MISSING'] and need no index).
+    return [
+        key for key, val in fields.items()
+        if val.get('listbox', '') and val.get('listempty', '') != 'True'
+    ]
+
+
+def normalize_listbox_values(values):
+    # Dropdown ordering: sorted, blanks dropped and "EMPTY" moved to the end whenever a
+    # NULL/"EMPTY" entry is present — unchanged from the views' original inline version.
+    values = list(values)
+    if any(x is None or (isinstance(x, str) and x.upper() == "EMPTY") for x in values):
+        has_na = any(isinstance(x, str) and x.upper() == "EMPTY" for x in values)
+        values = [x for x in values if x is not None and x != "" and x.upper() != "EMPTY"]
+        values.sort()
+        if has_na:
+            values.append("EMPTY")
+    return values
+
+
+def _distinct_values(queryset, field):
+    return normalize_listbox_values(queryset.values_list(field, flat=True).distinct().order_by(field))
+
+
+def build_listbox_index(source):
+    """
+    {field: [values]} for every computed listbox of `source` ('disc' or 'pamela'), read from
+    its field_labels JSON — called by the analyzers just before they create their snapshot.
+    A missing/broken JSON yields {} (the views then compute live, see module header).
+    """
+    fields = load_config(FIELD_LABELS_FILES[source], {}).get('fields', {})
+    if not fields:
+        return {}
+    queryset = listbox_queryset(source)
+    return {field: _distinct_values(queryset, field) for field in listbox_fields(fields)}
+
+
+def get_listbox_values(source, fields):
+    """
+    ({field: [values]}, computed) for the given listbox fields, from the latest snapshot's
+    published index — fields it doesn't cover are computed live and cached against that
+    snapshot ID; `computed` is True when that happened on this call (the views' "cacheset").
+    """
+    latest = SNAPSHOT_MODELS[source].objects.order_by('-analysis_date').values_list('pk', 'listbox_values').first()
+    snapshot_id, published = latest if latest else (0, {})
+    published = published or {}
+
+    result = {}
+    computed = []
+    queryset = listbox_queryset(source)
+    for field in fields:
+        if field in published:
+            result[field] = published[field]
+            continue
+
+        def compute(field=field):
+            computed.append(field)
+            return _distinct_values(queryset, field)
+
+        result[field] = get_or_compute(
+            f"listbox_{source}", field, compute, version=snapshot_id, timeout=LISTBOX_CACHE_TIMEOUT,
+        )
+    return result, bool(computed)
@@ -67,18 +67,40 @@ class ServerDiscrepancy(models.Model):
     alive_status_inconsistent = models.CharField(max_length=50, blank=True, null=True)
     dead_status_inconsistent = models.CharField(max_length=50, blank=True, null=True)
 
+    # Copy of this server's DiscrepancyTracking active_issues/oldest_first_seen, published by
+    # the analyzer at the end of update_tracker() — days_open sorting/filtering is then a plain
+    # indexed column, and the row itself can stand in for its tracker in compute_days_open().
+    # NULL on rows written after the analyzer published them (until its next run) — the views'
+    # days_open filter/sort then reads the tracker for those rows (see views._days_open_since).
+    active_issues = models.JSONField(null=True, blank=True)
+    oldest_first_seen = models.DateTimeField(null=True, blank=True)
+
     
     class Meta:
         db_table = 'discrepancies_serverdiscrepancy'
         indexes = [
             models.Index(fields=['analysis_date']),
             models.Index(fields=['SERVER_ID', 'analysis_date']),
+            models.Index(fields=['oldest_first_seen'], name='servdisc_oldest_idx'),
         ]
     
     def __str__(self):
         return f"{self.SERVER_ID} - {self.analysis_date}"
 
 
+# AnalysisSnapshot JSON columns that only a handful of readers need — and that can be large
+# (diff_summary of pre-AnalysisSnapshotDiffEntry runs lists every new/resolved/changed server).
+# Deferred by AnalysisSnapshot.objects: latest(), recent runs, the History page's snapshot
+# lookups and the trend queries load the scalar columns only, and a reader that does touch one
+# of these pays one extra single-row query (or asks for it with .values()).
+ANALYSIS_SNAPSHOT_HEAVY_FIELDS = ('diff_summary', 'listbox_values', 'dashboard_payloads', 'population_summary')
+
+
+class AnalysisSnapshotManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().defer(*ANALYSIS_SNAPSHOT_HEAVY_FIELDS)
+
+
 class AnalysisSnapshot(models.Model):
     """
     Summary statistics for each analysis run.
@@ -120,8 +142,26 @@ class AnalysisSnapshot(models.Model):
     resolved_issues_count = models.IntegerField(default=0)
     changed_issues_count  = models.IntegerField(default=0)
     # {'new': [...], 'resolved': [...], 'changed': {server_id: {'added': [...], 'removed': [...]}}}
+    # Since AnalysisSnapshotDiffEntry exists, only a preview: the first PREVIEW_SIZE entries of
+    # each list + 'paged': True — the full diff lives in the entries table, the totals in the
+    # *_issues_count columns above. Older snapshots keep their full lists here.
     diff_summary = models.JSONField(default=dict)
 
+    # {field: [distinct values]} for every field_labels.json listbox, published by the analyzer
+    # right after it rewrites ServerDiscrepancy — server_view's dropdowns read the latest
+    # snapshot's copy instead of running a DISTINCT per field (see listbox_index.py).
+    listbox_values = models.JSONField(default=dict, blank=True)
+
+    # {permanent filter name ('' = All Servers): widget counts + exclusion_fingerprint} for the
+    # Discrepancies dashboard, stored by the analyzer once the run is complete —
+    # dashboard_filter_api serves these instead of counting live (see dashboard_metrics.py).
+    dashboard_payloads = models.JSONField(default=dict, blank=True)
+
+    # {'fields': [...], 'exclusion_fingerprint': ..., 'rows': [[values..., eligible, physical]]} —
+    # eligible inventory population grouped by the permanent-filter fields, so the dashboard's
+    # live selections don't need a DISTINCT over inventory.Server (see dashboard_metrics.py).
+    population_summary = models.JSONField(default=dict, blank=True)
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     duration_seconds = models.FloatField(null=True, blank=True)
@@ -159,6 +199,8 @@ class AnalysisSnapshot(models.Model):
     # created before this field existed have it at 0 (same fallback as total_all_servers).
     total_relevant_servers = models.IntegerField(default=0)
 
+    objects = AnalysisSnapshotManager()
+
     class Meta:
         db_table = 'discrepancies_analysissnapshot'
         ordering = ['-analysis_date']
@@ -289,6 +331,39 @@ class AnalysisSnapshotCrossBreakdown(models.Model):
         return safe_percentage_clean(self.servers_clean, self.total_servers)
 
 
+class AnalysisSnapshotDiffEntry(models.Model):
+    """
+    One server of an AnalysisSnapshot's diff vs the previous run — kind 'new' (first issue),
+    'resolved' (no issue left) or 'changed' (added/removed issue fields). Written by
+    analyze_discrepancies alongside the snapshot, read a page at a time by snapshot_diff_api
+    (the dashboard's "+N more" links) instead of riding along in diff_summary on every
+    snapshot read.
+    """
+
+    KIND_NEW = 'new'
+    KIND_RESOLVED = 'resolved'
+    KIND_CHANGED = 'changed'
+
+    # Entries per kind kept inline in AnalysisSnapshot.diff_summary (the dashboard panel)
+    PREVIEW_SIZE = 20
+
+    snapshot = models.ForeignKey(AnalysisSnapshot, on_delete=models.CASCADE, related_name='diff_entries')
+    kind = models.CharField(max_length=10)
+    SERVER_ID = models.CharField(max_length=100)
+    # 'changed' only — issue fields that appeared / went away on this server
+    added = models.JSONField(null=True, blank=True)
+    removed = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'discrepancies_analysissnapshotdiffentry'
+        indexes = [
+            models.Index(fields=['snapshot', 'kind', 'SERVER_ID'], name='snapdiff_kind_server_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.snapshot_id} {self.kind} {self.SERVER_ID}"
+
+
 class DiscrepancyTracking(models.Model):
     """
     Tracks active discrepancy issues per server.
@@ -409,6 +484,10 @@ class ExcludedServer(models.Model):
     class Meta:
         db_table = 'discrepancies_excludedserver'
         ordering = ['server_name']
+        indexes = [
+            # exclusions.exclude_excluded()'s NOT EXISTS lookup
+            models.Index(fields=['server_name'], name='excludedserver_name_idx'),
+        ]
 
     def __str__(self):
         return self.server_name
@@ -470,6 +549,30 @@ class ServerDiscrepancyPamela(models.Model):
         return [t for t in self.missing_fields.split(',') if t]
 
 
+class ServerDiscrepancyPamelaTool(models.Model):
+    """
+    One row per (ServerDiscrepancyPamela server, missing tool code) — the normalized form of
+    missing_fields, kept in step with it by pamela_sync.sync_serverdiscrepancypamela. Lets the
+    PAMELA dashboard count servers per tool with one GROUP BY tool over the scoped servers,
+    with exact tool codes (missing_fields__icontains can't tell "AD" from "ADDM").
+    """
+
+    server = models.ForeignKey(ServerDiscrepancyPamela, on_delete=models.CASCADE, related_name='missing_tool_rows')
+    tool = models.CharField(max_length=20)
+
+    class Meta:
+        db_table = 'discrepancies_serverdiscrepancypamelatool'
+        constraints = [
+            models.UniqueConstraint(fields=['server', 'tool'], name='pamelatool_server_tool_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tool'], name='pamelatool_tool_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.server_id} - {self.tool}"
+
+
 class PamelaDiscrepancyTracking(models.Model):
     """
     Tracks active missing-tool issues per server for PAMELA — mirrors DiscrepancyTracking
@@ -519,6 +622,10 @@ class PamelaAnalysisSnapshot(models.Model):
     # {tool_code: count}, e.g. {"AD": 21, "ADDM": 14, ...}
     tool_counts = models.JSONField(default=dict)
 
+    # {field: [distinct values]} for pamela_server_view's listboxes — same as
+    # AnalysisSnapshot.listbox_values, only set on runs that rewrote ServerDiscrepancyPamela.
+    listbox_values = models.JSONField(default=dict, blank=True)
+
     class Meta:
         db_table = 'discrepancies_pamelaanalysissnapshot'
         ordering = ['-analysis_date']
@@ -537,3 +644,31 @@ class PamelaImportStatus(models.Model):
 
     def __str__(self):
         return f"{'OK' if self.success else 'KO'} {self.date_import.strftime('%d.%m.%Y %H:%M')}"
+
+
+class TrendPoint(models.Model):
+    """
+    One (run, metric, value) point of the dashboards' Quality Trend charts — appended by
+    analyze_discrepancies (source='disc', every integer metric of AnalysisSnapshot) and
+    analyze_pamela_discrepancies (source='pamela', any_missing + one per tool). The trend APIs
+    read a metric's window with one range scan of the (source, metric, analysis_date) index,
+    instead of loading every snapshot row of the window (JSON columns included) to read one
+    field — see trend_series.py.
+    """
+
+    SOURCE_DISC = 'disc'
+    SOURCE_PAMELA = 'pamela'
+
+    source = models.CharField(max_length=10)
+    analysis_date = models.DateTimeField()
+    metric = models.CharField(max_length=50)
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'discrepancies_trendpoint'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'metric', 'analysis_date'], name='trendpoint_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.metric} @ {self.analysis_date}: {self.value}"
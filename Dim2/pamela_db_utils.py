@@ -9,18 +9,41 @@
 # its own report_queries.json. Deliberately uses plain os.environ instead of django-environ
 # (used in the shown db_utils.py) to avoid adding a new dependency to this repo just for this
 # — same env var names, so the same .env entries work for both if they ever run side by side.
-
+#
+# PAMELA_DB_BACKEND=sqlite swaps the MSSQL connection for a local SQLite fixture file
+# (PAMELA_FIXTURE_DB, built by pamela_fixture.build_fixture_db) serving the exact same
+# pamela_report_queries.json reports — so analyze_pamela_discrepancies and
+# benchmark_pamela_pipeline can run end to end on a dev box with no SQL Server access and no
+# pyodbc installed. sqlite3 is stdlib, so this adds no dependency either (same reasoning as the
+# plain os.environ above); pyodbc is only imported when the mssql backend is actually used.
+
+import datetime
 import os
+import re
+import sqlite3
 
-import pyodbc
+try:
+    import pyodbc
+except ImportError:
+    pyodbc = None
 
 from discrepancies.pamela_sync import load_pamela_report_queries
 
+BACKEND_MSSQL = 'mssql'
+BACKEND_SQLITE = 'sqlite'
+
 
 def _env(name, default=''):
     return os.environ.get(name, default)
 
 
+def _backend():
+    backend = _env('PAMELA_DB_BACKEND', BACKEND_MSSQL).strip().lower()
+    if backend not in (BACKEND_MSSQL, BACKEND_SQLITE):
+        raise RuntimeError(f"Unknown PAMELA_DB_BACKEND '{backend}' (expected '{BACKEND_MSSQL}' or '{BACKEND_SQLITE}')")
+    return backend
+
+
 def _connection_string():
     driver = _env('MSSQL_DRIVER', 'ODBC Driver 18 for SQL Server')
     server = _env('MSSQL_HOST')
@@ -33,8 +56,54 @@ def _connection_string():
     ), database
 
 
+def _sqlite_sql(sql):
+    # The report queries are written in T-SQL for the real source — the fixture only needs the
+    # two constructs they actually use translated: the [db].[dbo].[table] three-part name
+    # (SQLite has no database/schema prefix, just the table) and CAST(col AS DATE) (SQLite's
+    # CAST to DATE is numeric affinity, i.e. '2026-08-13' -> 2026, not a date). Bracketed
+    # identifiers and ? placeholders are already valid SQLite as-is.
+    sql = re.sub(r'\[[^\]]*\]\.\[dbo\]\.', '', sql)
+    return re.sub(r'CAST\((\[\w+\]) AS DATE\)', r'date(\1)', sql, flags=re.IGNORECASE)
+
+
+def _fixture_path():
+    path = _env('PAMELA_FIXTURE_DB')
+    if not path:
+        raise RuntimeError('PAMELA_DB_BACKEND=sqlite requires PAMELA_FIXTURE_DB (path to a fixture built by pamela_fixture.build_fixture_db)')
+    if not os.path.exists(path):
+        raise RuntimeError(f'PAMELA fixture database not found: {path}')
+    return path
+
+
+def _run_query(sql, params):
+    # Runs one report query against whichever backend is configured and returns a list of
+    # {column: value} dicts — the one place that knows about pyodbc vs sqlite3.
+    if _backend() == BACKEND_SQLITE:
+        conn = sqlite3.connect(_fixture_path())
+        sql = _sqlite_sql(sql)
+    else:
+        if pyodbc is None:
+            raise RuntimeError('pyodbc is not installed (required for PAMELA_DB_BACKEND=mssql)')
+        conn_str, _ = _connection_string()
+        conn = pyodbc.connect(conn_str)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
 def test_connection():
     """Test the MS SQL Server connection. Returns (success: bool, message: str)."""
+    if _backend() == BACKEND_SQLITE:
+        try:
+            path = _fixture_path()
+        except RuntimeError as e:
+            return False, str(e)
+        return True, f'Using local PAMELA fixture database: {path}'
+
     server = _env('MSSQL_HOST')
     database = _env('MSSQL_DB')
     username = _env('MSSQL_USER')
@@ -43,6 +112,9 @@ def test_connection():
     if not all([server, database, username, password]):
         return False, 'Missing connection parameters (MSSQL_HOST, MSSQL_DB, MSSQL_USER, MSSQL_PASSWORD)'
 
+    if pyodbc is None:
+        return False, 'pyodbc is not installed'
+
     conn_str, _ = _connection_string()
     try:
         conn = pyodbc.connect(conn_str)
@@ -69,24 +141,52 @@ def get_missing_servers(report_name, target_date):
     if not report_config:
         raise RuntimeError(f"No query configured for report '{report_name}' in pamela_report_queries.json")
 
-    conn_str, database = _connection_string()
+    _, database = _connection_string()
     sql = '\n'.join(report_config['query']).format(database=database)
+    rows = _run_query(sql, [target_date, report_name])
 
-    conn = pyodbc.connect(conn_str)
-    try:
-        cursor = conn.cursor()
-        cursor.execute(sql, [target_date, report_name])
-        columns = [col[0] for col in cursor.description]
-        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
-    finally:
-        conn.close()
+    return [_server_row(row) for row in rows if row.get('SERVER_ID')]
 
-    return [
-        {
-            'SERVER_ID': row.get('SERVER_ID'),
-            'techfamily': (row.get('techfamily') or '').strip() or 'MISSING',
-            'area': (row.get('area') or '').strip() or 'MISSING',
-        }
-        for row in rows
-        if row.get('SERVER_ID')
-    ]
+
+def get_missing_servers_range(report_name, start_date, end_date):
+    """
+    Same report as get_missing_servers(), but for every date in [start_date, end_date] in a
+    single round-trip (the report's range_query in pamela_report_queries.json). Returns
+    {datetime.date: [{'SERVER_ID', 'techfamily', 'area'}, ...]} — a date with no rows at all
+    for this report is simply absent from the dict.
+
+    Same RuntimeError convention as get_missing_servers().
+    """
+    queries = load_pamela_report_queries()
+    report_config = queries.get(report_name)
+    if not report_config or not report_config.get('range_query'):
+        raise RuntimeError(f"No range_query configured for report '{report_name}' in pamela_report_queries.json")
+
+    _, database = _connection_string()
+    sql = '\n'.join(report_config['range_query']).format(database=database)
+    rows = _run_query(sql, [start_date, end_date, report_name])
+
+    by_day = {}
+    for row in rows:
+        if not row.get('SERVER_ID'):
+            continue
+        by_day.setdefault(_as_date(row.get('Day')), []).append(_server_row(row))
+    return by_day
+
+
+def _server_row(row):
+    return {
+        'SERVER_ID': row.get('SERVER_ID'),
+        'techfamily': (row.get('techfamily') or '').strip() or 'MISSING',
+        'area': (row.get('area') or '').strip() or 'MISSING',
+    }
+
+
+def _as_date(value):
+    # pyodbc hands CAST(... AS DATE) back as datetime.date; sqlite3's date() is a plain
+    # 'YYYY-MM-DD' string — callers only ever see datetime.date either way.
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
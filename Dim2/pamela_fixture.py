@@ -0,0 +1,137 @@
+# pamela_fixture.py
+#
+# Builds the local SQLite stand-in for the PAMELA MSSQL source that pamela_db_utils serves
+# reports from when PAMELA_DB_BACKEND=sqlite (see that module's header). One table, same name
+# and columns pamela_report_queries.json already selects from ([dbo].[test]: SERVER_ID,
+# techfamily, area, Date, Name), one row per (server, missing report, date) — i.e. exactly the
+# raw per-server rows the real queries return, so nothing downstream can tell the difference.
+#
+# Generated from seed_pamela_data.SAMPLE_DATA (the real PAMELA per-(area, techfamily) counts)
+# rather than invented numbers, multiplied by `scale` to get arbitrary fleet sizes: scale=1 is
+# the real ~92k-server fleet, scale=10 a ~920k one for stress runs. Host names are synthetic
+# (FX0000001, ...) — only the shape of the data is real. Deterministic for a given seed, so a
+# benchmark rerun against a rebuilt fixture measures the same workload.
+#
+# Day-to-day movement: each missing_* report does a small random walk across dates (`churn` of
+# its hosts resolved and replaced by other hosts from the same (area, techfamily) pool per day),
+# so a multi-day fixture exercises the tracker's add/keep/remove paths and not just "identical
+# every day". Pure stdlib (sqlite3/random) — no Django models involved, so it's importable from
+# a plain shell too.
+
+import datetime
+import os
+import random
+import sqlite3
+
+from discrepancies.management.commands.seed_pamela_data import SAMPLE_DATA
+
+FIXTURE_TABLE = 'test'
+POPULATION_REPORT = 'allserver'
+
+
+def _build_host_pools(scale):
+    """
+    {(area, TECHFAMILY_UPPER): [host, ...]} sized from SAMPLE_DATA['allserver'], plus
+    {host: (techfamily, area)} for writing rows back with PAMELA's raw (non-upper) techfamily.
+    """
+    pools, host_info = {}, {}
+    counter = 0
+    for (area, techfamily), count in SAMPLE_DATA[POPULATION_REPORT].items():
+        size = max(1, round(count * scale)) if count else 0
+        key = (area, techfamily.strip().upper())
+        pool = pools.setdefault(key, [])
+        for _ in range(size):
+            counter += 1
+            host = f'FX{counter:07d}'
+            pool.append(host)
+            host_info[host] = (techfamily, area)
+    return pools, host_info, counter
+
+
+def _initial_missing_sets(pools, host_info, counter, scale, rng):
+    """{report_name: {(area, key): set(host, ...)}} — first day's missing hosts per report."""
+    missing = {}
+    for report_name, entries in SAMPLE_DATA.items():
+        if report_name == POPULATION_REPORT:
+            continue
+        per_group = {}
+        for (area, techfamily), count in entries.items():
+            key = (area, techfamily.strip().upper())
+            wanted = max(1, round(count * scale)) if count else 0
+            pool = pools.setdefault(key, [])
+            # SAMPLE_DATA isn't perfectly self-consistent (e.g. missing_CA has an
+            # ('EMEA', 'Linux server') lowercase entry no allserver row matches, and a few
+            # missing_* counts exceed their own allserver count) — grow the pool rather than
+            # silently under-generating that report.
+            while len(pool) < wanted:
+                counter += 1
+                host = f'FX{counter:07d}'
+                pool.append(host)
+                host_info[host] = (techfamily, area)
+            per_group[key] = set(rng.sample(pool, wanted))
+        missing[report_name] = per_group
+    return missing, counter
+
+
+def _walk(per_group, pools, churn, rng):
+    # One day of movement: resolve `churn` of each group's missing hosts and flag the same
+    # number of not-yet-missing hosts from that group's pool instead (count stays stable, the
+    # membership doesn't — which is what the tracker's first_seen bookkeeping actually cares about).
+    for key, hosts in per_group.items():
+        moves = int(len(hosts) * churn)
+        candidates = [h for h in pools[key] if h not in hosts]
+        moves = min(moves, len(candidates))
+        if not moves:
+            continue
+        hosts.difference_update(rng.sample(sorted(hosts), moves))
+        hosts.update(rng.sample(candidates, moves))
+
+
+def build_fixture_db(path, dates, scale=1.0, churn=0.02, seed=0):
+    """
+    (Re)creates the SQLite fixture at `path` with one day of missing_* rows per date in
+    `dates` (datetime.date, any order — written chronologically). Returns the number of rows
+    written. Overwrites an existing file at `path`.
+    """
+    rng = random.Random(seed)
+    pools, host_info, counter = _build_host_pools(scale)
+    missing, counter = _initial_missing_sets(pools, host_info, counter, scale, rng)
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+    total = 0
+    try:
+        conn.execute(
+            f'CREATE TABLE [{FIXTURE_TABLE}] ('
+            '[SERVER_ID] TEXT NOT NULL, [techfamily] TEXT, [area] TEXT, [Date] TEXT NOT NULL, [Name] TEXT NOT NULL)'
+        )
+        for day_index, target_date in enumerate(sorted(dates)):
+            if day_index:
+                for per_group in missing.values():
+                    _walk(per_group, pools, churn, rng)
+            date_str = target_date.isoformat()
+            rows = [
+                (host, host_info[host][0], host_info[host][1], date_str, report_name)
+                for report_name, per_group in missing.items()
+                for hosts in per_group.values()
+                for host in sorted(hosts)
+            ]
+            conn.executemany(
+                f'INSERT INTO [{FIXTURE_TABLE}] ([SERVER_ID], [techfamily], [area], [Date], [Name]) VALUES (?, ?, ?, ?, ?)',
+                rows,
+            )
+            total += len(rows)
+        # Every report query filters on Name = ? (leading column) plus the date — date([Date]) is
+        # a function call, so SQLite only seeks on Name and scans that report's rows for the date.
+        conn.execute(f'CREATE INDEX fixture_name_date_idx ON [{FIXTURE_TABLE}] ([Name], [Date])')
+        conn.commit()
+    finally:
+        conn.close()
+    return total
+
+
+def fixture_dates(end_date, days):
+    # `days` consecutive calendar days ending on end_date (inclusive), oldest first.
+    return [end_date - datetime.timedelta(days=offset) for offset in range(days - 1, -1, -1)]
@@ -14,7 +14,7 @@ import os
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
-from discrepancies.models import ServerDiscrepancyPamela, PamelaDiscrepancyTracking
+from discrepancies.models import ServerDiscrepancyPamela, ServerDiscrepancyPamelaTool, PamelaDiscrepancyTracking
 
 PAMELA_REPORT_QUERIES_PATH = os.path.join(os.path.dirname(__file__), 'pamela_report_queries.json')
 
@@ -56,36 +56,79 @@ def sync_serverdiscrepancypamela(current):
     Wholesale-current-state sync, incrementally (update_or_create semantics via bulk ops,
     same batching style as analyze_discrepancies's bulk_insert_discrepancies) — a server
     dropped from `current` (no longer missing anything) gets its row deleted, not zeroed out.
+
+    Diff-only: existing rows are read as a (pk, SERVER_ID, techfamily, area, missing_fields)
+    values_list projection, not model instances, and only rows whose content actually changed
+    are written back — on a stable day that's a handful of rows instead of the whole table.
+    The returned `updated` count is that real changed count, not "every surviving row".
     """
-    existing = {s.SERVER_ID: s for s in ServerDiscrepancyPamela.objects.all()}
+    existing = {
+        sid: (pk, techfamily, area, missing_fields)
+        for pk, sid, techfamily, area, missing_fields in ServerDiscrepancyPamela.objects.values_list(
+            'pk', 'SERVER_ID', 'techfamily', 'area', 'missing_fields'
+        )
+    }
 
     to_create, to_update = [], []
     for sid, data in current.items():
         missing_fields = ','.join(sorted(data['missing']))
-        obj = existing.get(sid)
-        if obj:
-            obj.techfamily = data['techfamily']
-            obj.area = data['area']
-            obj.missing_fields = missing_fields
-            to_update.append(obj)
+        row = existing.get(sid)
+        if row:
+            pk, techfamily, area, old_missing_fields = row
+            if (techfamily, area, old_missing_fields) == (data['techfamily'], data['area'], missing_fields):
+                continue
+            # updated_at is auto_now, but bulk_update() bypasses save() — set it explicitly so
+            # it still means "last time this row's content changed".
+            to_update.append(ServerDiscrepancyPamela(
+                pk=pk, SERVER_ID=sid, techfamily=data['techfamily'], area=data['area'],
+                missing_fields=missing_fields, updated_at=timezone.now(),
+            ))
         else:
             to_create.append(ServerDiscrepancyPamela(
                 SERVER_ID=sid, techfamily=data['techfamily'], area=data['area'],
                 missing_fields=missing_fields,
             ))
 
-    to_delete_ids = [obj.pk for sid, obj in existing.items() if sid not in current]
+    to_delete_ids = [row[0] for sid, row in existing.items() if sid not in current]
 
     if to_create:
         ServerDiscrepancyPamela.objects.bulk_create(to_create, batch_size=1000)
     if to_update:
-        ServerDiscrepancyPamela.objects.bulk_update(to_update, ['techfamily', 'area', 'missing_fields'], batch_size=1000)
+        ServerDiscrepancyPamela.objects.bulk_update(to_update, ['techfamily', 'area', 'missing_fields', 'updated_at'], batch_size=1000)
     if to_delete_ids:
         ServerDiscrepancyPamela.objects.filter(pk__in=to_delete_ids).delete()
 
+    # Per-tool rows follow the rows that were written (deleted servers cascade). The first run
+    # after ServerDiscrepancyPamelaTool was added finds it empty and fills it for every server.
+    if not ServerDiscrepancyPamelaTool.objects.exists():
+        sync_pamela_tool_rows()
+    elif to_create or to_update:
+        sync_pamela_tool_rows([row.pk for row in to_create] + [row.pk for row in to_update])
+
     return len(to_create), len(to_update), len(to_delete_ids)
 
 
+def sync_pamela_tool_rows(server_pks=None):
+    """
+    Rewrites ServerDiscrepancyPamelaTool from missing_fields for the given ServerDiscrepancyPamela
+    pks (None = every server).
+    """
+    servers = ServerDiscrepancyPamela.objects.all()
+    tool_rows = ServerDiscrepancyPamelaTool.objects.all()
+    if server_pks is not None:
+        servers = servers.filter(pk__in=server_pks)
+        tool_rows = tool_rows.filter(server_id__in=server_pks)
+    tool_rows.delete()
+    ServerDiscrepancyPamelaTool.objects.bulk_create(
+        [
+            ServerDiscrepancyPamelaTool(server_id=pk, tool=tool)
+            for pk, missing_fields in servers.values_list('pk', 'missing_fields')
+            for tool in missing_fields.split(',') if tool
+        ],
+        batch_size=1000,
+    )
+
+
 def update_pamela_tracker(current, now=None):
     """
     Updates PamelaDiscrepancyTracking (1 row per server, active_issues JSONField) — exact
@@ -147,3 +190,61 @@ def update_pamela_tracker(current, now=None):
     if to_delete_ids:
         PamelaDiscrepancyTracking.objects.filter(pk__in=to_delete_ids).delete()
         write_log(f"Tracker: deleted {len(to_delete_ids)} fully-resolved entries")
+
+
+def replay_pamela_tracker(per_day):
+    """
+    Same end state as calling update_pamela_tracker(current, now=day_now) once per
+    (day_now, current) in `per_day` (chronological order), but computed in memory and written
+    once — for --from/--to --replay-tracker, where the per-day version would reload every
+    PamelaDiscrepancyTracking row and bulk-write it again for every single day of the range.
+
+    Each (server, tool) pair's history is a series of runs of consecutive days where the tool is
+    missing; the only thing the tracker keeps is the start of the run still open on the last
+    day (first_seen), so one pass over the days opening/closing runs is enough. A run already
+    open in the existing tracker when the range starts keeps its stored first_seen, exactly as
+    the first per-day update_pamela_tracker() call would have.
+    """
+    existing_trackers = {t.SERVER_ID: t for t in PamelaDiscrepancyTracking.objects.all()}
+    open_runs = {
+        sid: {tool: info['first_seen'] for tool, info in tracker.active_issues.items()}
+        for sid, tracker in existing_trackers.items()
+    }
+
+    for day_now, current in per_day:
+        now_str = day_now.isoformat()
+        for sid in list(open_runs):
+            if sid not in current:
+                del open_runs[sid]
+        for sid, data in current.items():
+            runs = open_runs.setdefault(sid, {})
+            for tool in list(runs):
+                if tool not in data['missing']:
+                    del runs[tool]
+            for tool in data['missing']:
+                runs.setdefault(tool, now_str)
+            if not runs:
+                del open_runs[sid]
+
+    to_create, to_update = [], []
+    for sid, runs in open_runs.items():
+        active = {tool: {'first_seen': first_seen} for tool, first_seen in runs.items()}
+        oldest = min(parse_datetime(first_seen) for first_seen in runs.values())
+        tracker = existing_trackers.get(sid)
+        if tracker is None:
+            to_create.append(PamelaDiscrepancyTracking(SERVER_ID=sid, active_issues=active, oldest_first_seen=oldest))
+        elif tracker.active_issues != active:
+            tracker.active_issues = active
+            tracker.oldest_first_seen = oldest
+            to_update.append(tracker)
+    to_delete_ids = [tracker.pk for sid, tracker in existing_trackers.items() if sid not in open_runs]
+
+    if to_create:
+        PamelaDiscrepancyTracking.objects.bulk_create(to_create, batch_size=1000)
+        write_log(f"Tracker: created {len(to_create)} new entries")
+    if to_update:
+        PamelaDiscrepancyTracking.objects.bulk_update(to_update, ['active_issues', 'oldest_first_seen'], batch_size=1000)
+        write_log(f"Tracker: updated {len(to_update)} entries")
+    if to_delete_ids:
+        PamelaDiscrepancyTracking.objects.filter(pk__in=to_delete_ids).delete()
+        write_log(f"Tracker: deleted {len(to_delete_ids)} fully-resolved entries")
@@ -0,0 +1,97 @@
+# search.py
+#
+# Index-backed matching for construct_query()'s filter terms. The ORM's icontains/iexact compile
+# to UPPER(col::text) LIKE UPPER('%term%') / UPPER(col::text) = UPPER('term') on Postgres —
+# neither can use a plain btree index, so every filtered column is a full scan of
+# ServerDiscrepancy, once per filter term.
+#
+# On Postgres with the pg_trgm extension installed, the same terms are expressed as
+# col ILIKE '%term%' (contains) / col ILIKE 'term' (@ exact), which a GIN gin_trgm_ops index on
+# the column serves directly — see the create_search_indexes command for the indexes
+# themselves. ! exclusion is NOT ILIKE: a negation can't be answered from the index, but it's
+# only ever combined with positive terms that narrow the scan first. Same case-insensitive
+# semantics as before, just a different SQL shape; terms shorter than 3 characters (no
+# trigram to look up) still work, Postgres simply falls back to scanning for those.
+#
+# Anything else (SQLite in DEV, Postgres without pg_trgm, DISCREPANCIES_TRIGRAM_SEARCH=False in
+# settings) keeps the original icontains/iexact lookups unchanged.
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Field, Lookup, Q
+
+TRIGRAM_EXTENSION = 'pg_trgm'
+
+_trigram_available = None
+
+
+@Field.register_lookup
+class ILike(Lookup):
+    # col ILIKE pattern — the pattern (wildcards and escaping included) is built by the caller,
+    # see contains_lookup()/exact_lookup(). Registered on every field type, since construct_query
+    # is applied to whatever field a filter names (inventory.Server columns, saved-search and
+    # multi: fields...): a non-text column is cast to text the way icontains would have, and
+    # the pattern is passed as-is rather than prepared as a value of that column's type.
+    lookup_name = 'ilike'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        if self.lhs.output_field.get_internal_type() not in ('CharField', 'TextField'):
+            lhs = f'({lhs})::text'
+        return f'{lhs} ILIKE {rhs}', lhs_params + rhs_params
+
+
+def trigram_search_enabled():
+    """True when filter terms should go through ILIKE (and so through the trigram indexes)."""
+    global _trigram_available
+
+    if connection.vendor != 'postgresql' or not getattr(settings, 'DISCREPANCIES_TRIGRAM_SEARCH', True):
+        return False
+    if _trigram_available is None:
+        # Checked once per process — installing the extension is a deploy step, not something
+        # that changes under a running worker.
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_extension WHERE extname = %s', [TRIGRAM_EXTENSION])
+            _trigram_available = cursor.fetchone() is not None
+    return _trigram_available
+
+
+def _like_escape(term):
+    return connection.ops.prep_for_like_query(term)
+
+
+def contains_lookup(key, term):
+    # {lookup: value} kwargs for "key contains term", case-insensitive.
+    if trigram_search_enabled():
+        return {f'{key}__ilike': f'%{_like_escape(term)}%'}
+    return {f'{key}__icontains': term}
+
+
+def exact_lookup(key, term):
+    # {lookup: value} kwargs for "key equals term", case-insensitive.
+    if trigram_search_enabled():
+        return {f'{key}__ilike': _like_escape(term)}
+    return {f'{key}__iexact': term}
+
+
+def construct_query(key, terms):
+    # Creates a Django Q object based on a list of terms for a specific field (lookups from
+    # contains_lookup/exact_lookup above). Lives here rather than in views.py so the analyzer
+    # can build the exact same filters (see dashboard_metrics.py).
+    query = Q()
+    
+    # Iterate over each term in the terms list
+    for term in terms:
+        if term.startswith('@'):  # Check if the term starts with '@' for an exact match
+            term = term[1:]  # Remove the '@' character
+            query |= Q(**exact_lookup(key, term))  # Create a Q object for an exact match (case-insensitive)
+        elif term.startswith('!'):  # Check if the term starts with '!' for an exclusion
+            term = term[1:]  # Remove the '!' character
+            query &= ~Q(**contains_lookup(key, term))  # Create a Q object for an exclusion (case-insensitive containment test)
+        else:  # For terms without special characters, perform a containment test
+            query |= Q(**contains_lookup(key, term))  # Create a Q object for a containment test (case-insensitive)
+
+    # Return the combined Q object representing the filter criteria
+    return query
@@ -6,6 +6,7 @@ from django.utils import timezone
 
 from discrepancies.models import ServerDiscrepancyPamela, PamelaDiscrepancyTracking, PamelaAnalysisSnapshot
 from discrepancies.pamela_sync import sync_serverdiscrepancypamela, update_pamela_tracker
+from discrepancies.trend_series import reset_trend_points
 
 # Real PAMELA per-server export sample for report_type=missing_LA (date 2026-08-13),
 # transcribed as-is: (host, techfamily, area). We don't yet have real per-server exports for
@@ -255,6 +256,9 @@ class Command(BaseCommand):
             # Current-state table only needs the FINAL simulated day's result.
             created, updated, deleted = sync_serverdiscrepancypamela(current)
 
+            # The Quality Trend series of the snapshots just replaced (see trend_series.py)
+            reset_trend_points('pamela')
+
         self.stdout.write(self.style.SUCCESS(
             f"Pamela demo data reseeded for {n_days} day(s) ending {end_date}: "
             f"ServerDiscrepancyPamela {created} created / {updated} updated / {deleted} removed, "
@@ -0,0 +1,230 @@
+# snapshot_store.py
+#
+# Optional per-process, in-memory columnar copy of ServerDiscrepancy for the read-heavy views
+# (server_view, dashboard_filter_api, chart_view). ServerDiscrepancy is only ever rewritten by an
+# analysis run, which always ends by creating a new AnalysisSnapshot — so between two snapshots
+# the table is read-only, and every filter/sort/count/grouping those views send to SQL can be
+# answered from a copy loaded once per snapshot instead.
+#
+# Layout: one numpy array per column, text columns dictionary-encoded (int32 code per row + the
+# list of distinct values, -1 = NULL). Rows are identified by SERVER_ID, never by pk: an analysis
+# run deletes and re-inserts every row (new pks) before its AnalysisSnapshot commits, so a store
+# still current for the previous snapshot must keep pointing at rows that exist. The fleet has ~100k rows but each filterable column only a
+# few hundred distinct values, so a filter term is matched against the dictionary once (a few
+# hundred string comparisons) and turned into a row mask with one vectorized np.isin — same
+# construct_query() semantics (case-insensitive contains, @ exact, ! exclusion incl. NULLs,
+# the way Django's negated lookups treat them).
+#
+# Strictly opt-in and strictly a cache: DISCREPANCIES_SNAPSHOT_STORE = True in settings enables
+# it; numpy missing, the store over DISCREPANCIES_SNAPSHOT_STORE_MAX_MB, or a (re)load already
+# in progress in another thread all return None from get_snapshot_store(), and the callers run
+# their normal SQL path. numpy is only imported here, and only optionally — same approach as
+# pamela_db_utils's pyodbc — so nothing else in the app depends on it.
+
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from django.conf import settings
+from django.db import models
+
+from .models import AnalysisSnapshot, ServerDiscrepancy
+
+# How often (seconds) a worker re-checks for a newer AnalysisSnapshot — the check is one tiny
+# query, but it would otherwise run on every request that touches the store.
+SNAPSHOT_STORE_CHECK_INTERVAL = 30
+DEFAULT_SNAPSHOT_STORE_MAX_MB = 256
+
+_store = None
+_store_checked_at = 0
+_over_budget_snapshot_id = None
+_build_lock = threading.Lock()
+
+
+class ColumnarSnapshot:
+    """ServerDiscrepancy rows of one AnalysisSnapshot, column by column (see module header)."""
+
+    def __init__(self, snapshot_id, columns, rows):
+        self.snapshot_id = snapshot_id
+        self.columns = list(columns)
+        self.size = len(rows)
+
+        self.codes, self.values, self._upper, self._rank = {}, {}, {}, {}
+        for offset, column in enumerate(self.columns):
+            dictionary, codes = {}, np.empty(self.size, dtype=np.int32)
+            for i, row in enumerate(rows):
+                value = row[offset]
+                codes[i] = -1 if value is None else dictionary.setdefault(value, len(dictionary))
+            values = list(dictionary)
+            self.codes[column] = codes
+            self.values[column] = values
+            self._upper[column] = [v.upper() for v in values]
+            # Sort rank of each dictionary entry, plus one trailing slot for NULL: code -1 indexes
+            # that last slot, so NULLs rank after every value (the views' nulls_last ordering).
+            rank = np.empty(len(values) + 1, dtype=np.int32)
+            for position, code in enumerate(sorted(range(len(values)), key=values.__getitem__)):
+                rank[code] = position
+            rank[len(values)] = len(values)
+            self._rank[column] = rank
+
+        self._row_by_server = {}
+        for i, sid in enumerate(self.column_values('SERVER_ID')):
+            self._row_by_server.setdefault(sid, []).append(i)
+
+    @property
+    def nbytes(self):
+        # Arrays plus a rough per-distinct-string overhead — close enough for the budget check.
+        arrays = sum(c.nbytes for c in self.codes.values())
+        strings = sum(sum(len(v) + 60 for v in values) * 2 for values in self.values.values())
+        return arrays + strings + len(self._row_by_server) * 120
+
+    # ── Masks ─────────────────────────────────────────────────────────────
+
+    def all_rows(self):
+        return np.ones(self.size, dtype=bool)
+
+    def _codes_mask(self, column, matching_codes):
+        if not matching_codes:
+            return np.zeros(self.size, dtype=bool)
+        return np.isin(self.codes[column], np.fromiter(matching_codes, dtype=np.int32))
+
+    def contains_mask(self, column, term):
+        # column__icontains=term
+        needle = term.upper()
+        return self._codes_mask(column, [c for c, v in enumerate(self._upper[column]) if needle in v])
+
+    def iexact_mask(self, column, term):
+        needle = term.upper()
+        return self._codes_mask(column, [c for c, v in enumerate(self._upper[column]) if v == needle])
+
+    def exact_mask(self, column, value):
+        # column=value (case-sensitive, like the ORM's plain equality lookup)
+        return self._codes_mask(column, [c for c, v in enumerate(self.values[column]) if v == value])
+
+    def non_empty_mask(self, column):
+        # column__gt='' — non-NULL and not the empty string
+        return self._codes_mask(column, [c for c, v in enumerate(self.values[column]) if v > ''])
+
+    def terms_mask(self, column, terms):
+        # Same folding as views.construct_query(): '@' exact and plain contains are OR-ed in,
+        # '!' exclusions AND-ed (and, like ~Q(...), keep NULL rows).
+        mask = None
+        for term in terms:
+            if term.startswith('@'):
+                term_mask = self.iexact_mask(column, term[1:])
+                mask = term_mask if mask is None else (mask | term_mask)
+            elif term.startswith('!'):
+                term_mask = ~self.contains_mask(column, term[1:])
+                mask = term_mask if mask is None else (mask & term_mask)
+            else:
+                term_mask = self.contains_mask(column, term)
+                mask = term_mask if mask is None else (mask | term_mask)
+        return self.all_rows() if mask is None else mask
+
+    def plan_mask(self, plan):
+        # AND over the (field, terms) pairs of a views.compile_filter_plan() plan. None when a
+        # field isn't a loaded column (the caller should use SQL for that request).
+        mask = self.all_rows()
+        for field, terms in plan:
+            if field not in self.codes:
+                return None
+            mask &= self.terms_mask(field, terms)
+        return mask
+
+    def server_ids_mask(self, server_ids):
+        # SERVER_ID__in=server_ids
+        mask = np.zeros(self.size, dtype=bool)
+        for sid in server_ids:
+            for i in self._row_by_server.get(sid, ()):
+                mask[i] = True
+        return mask
+
+    # ── Results ───────────────────────────────────────────────────────────
+
+    def column_values(self, column):
+        values = self.values[column]
+        return [values[c] if c >= 0 else None for c in self.codes[column]]
+
+    def count(self, mask):
+        return int(np.count_nonzero(mask))
+
+    def ordered_server_ids(self, mask, column, descending=False):
+        # SERVER_IDs of the masked rows ordered by column ([DESC] NULLS LAST), then SERVER_ID.
+        # `column` must be a loaded column (see `codes`) — callers use SQL for any other sort.
+        indexes = np.flatnonzero(mask)
+        rank = self._rank[column][self.codes[column][indexes]]
+        if descending:
+            nulls = rank == len(self.values[column])
+            rank = np.where(nulls, rank, len(self.values[column]) - 1 - rank)
+        tie = self._rank['SERVER_ID'][self.codes['SERVER_ID'][indexes]]
+        server_ids = self.values['SERVER_ID']
+        return [server_ids[c] for c in self.codes['SERVER_ID'][indexes[np.lexsort((tie, rank))]]]
+
+    def rows(self, mask, columns):
+        # [{column: value, ...}] for the masked rows — the shape of .values(*columns).
+        indexes = np.flatnonzero(mask)
+        decoded = {}
+        for column in columns:
+            values, codes = self.values[column], self.codes[column][indexes]
+            decoded[column] = [values[c] if c >= 0 else None for c in codes]
+        return [{column: decoded[column][i] for column in columns} for i in range(len(indexes))]
+
+
+def _store_enabled():
+    return np is not None and getattr(settings, 'DISCREPANCIES_SNAPSHOT_STORE', False)
+
+
+def _store_columns():
+    return [
+        field.name for field in ServerDiscrepancy._meta.concrete_fields
+        if isinstance(field, (models.CharField, models.TextField))
+    ]
+
+
+def get_snapshot_store():
+    """
+    The ColumnarSnapshot for the latest AnalysisSnapshot, loading it first if needed — or None,
+    meaning "use SQL" (disabled, numpy missing, over budget, or being loaded right now).
+    """
+    global _store, _store_checked_at, _over_budget_snapshot_id
+
+    if not _store_enabled():
+        return None
+
+    now = time.monotonic()
+    if _store is not None and now - _store_checked_at < SNAPSHOT_STORE_CHECK_INTERVAL:
+        return _store
+
+    latest_id = AnalysisSnapshot.objects.order_by('-analysis_date').values_list('pk', flat=True).first()
+    if latest_id is None or latest_id == _over_budget_snapshot_id:
+        return None
+    if _store is not None and _store.snapshot_id == latest_id:
+        _store_checked_at = now
+        return _store
+
+    # One loader per process; everyone else keeps using SQL until it's done rather than
+    # queueing behind it (or worse, all loading the same snapshot at once).
+    if not _build_lock.acquire(blocking=False):
+        return None
+    try:
+        if _store is not None and _store.snapshot_id == latest_id:
+            return _store
+        budget = getattr(settings, 'DISCREPANCIES_SNAPSHOT_STORE_MAX_MB', DEFAULT_SNAPSHOT_STORE_MAX_MB) * 1024 * 1024
+        columns = _store_columns()
+        # Cheap pre-check before pulling every row: 4 bytes per code, strings excluded.
+        if ServerDiscrepancy.objects.count() * 4 * len(columns) > budget:
+            _over_budget_snapshot_id, _store = latest_id, None
+            return None
+        rows = list(ServerDiscrepancy.objects.values_list(*columns))
+        store = ColumnarSnapshot(latest_id, columns, rows)
+        if store.nbytes > budget:
+            _over_budget_snapshot_id, _store = latest_id, None
+            return None
+        _store, _store_checked_at = store, time.monotonic()
+        return _store
+    finally:
+        _build_lock.release()
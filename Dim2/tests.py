@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import dashboard_metrics
+from .dashboard_metrics import ALL_SERVERS_PAYLOAD, FIELD_TO_METRIC, discrepancy_counts, exclusion_fingerprint
+from .exclusions import exclusion_version
+from .models import AnalysisSnapshot, ServerDiscrepancy
+from .views import _dashboard_counts
+
+
+@override_settings(DISCREPANCIES_SNAPSHOT_STORE=False)
+class DashboardCountQueriesTests(TestCase):
+    # Query budget of the dashboard widget counts behind dashboard_filter_api /
+    # dashboard_export_excel (see views._dashboard_counts): every metric comes out of one
+    # conditional-aggregation query, whatever the number of metrics or rows.
+
+    MULTI_FILTER = {'REGION': ['EMEA']}
+
+    def setUp(self):
+        cache.clear()
+        dashboard_metrics._result_cache.clear()
+        dashboard_metrics._population_summary = (None, {})
+        now = timezone.now()
+        ServerDiscrepancy.objects.bulk_create([
+            ServerDiscrepancy(SERVER_ID='SRV1', analysis_date=now, REGION='EMEA', missing_fields='OSFAMILY,COUNTRY'),
+            ServerDiscrepancy(SERVER_ID='SRV2', analysis_date=now, REGION='EMEA', missing_fields='',
+                              alive_status_inconsistent='KO'),
+            ServerDiscrepancy(SERVER_ID='SRV3', analysis_date=now, REGION='AMER', missing_fields='COUNTRY'),
+        ])
+        self.snapshot = AnalysisSnapshot.objects.create(
+            analysis_date=now, total_servers_analyzed=3, total_physical_servers=0,
+            servers_with_issues=3, servers_clean=0,
+        )
+        # Read once per request by the views and passed down (see views._request_exclusion_version)
+        self.exclusions_version = exclusion_version()
+
+    def _counts(self, filter_name, filter_def):
+        return _dashboard_counts(filter_name, filter_def, {}, 0, self.exclusions_version, frozenset)
+
+    def test_discrepancy_counts_is_one_query(self):
+        with self.assertNumQueries(1):
+            counts = discrepancy_counts(ServerDiscrepancy.objects.all())
+        self.assertEqual(counts['servers_with_missing'], 2)
+        self.assertEqual(counts['inconsistency_count'], 1)
+        self.assertEqual(counts['missing_country_count'], 2)
+        self.assertEqual(counts['missing_osfamily_count'], 1)
+        self.assertEqual(set(FIELD_TO_METRIC.values()) - set(counts), set())
+
+    def test_all_servers_served_from_snapshot_payload(self):
+        stored = {'total_eligible': 10, 'total_physical': 4, 'servers_with_missing': 2,
+                  'exclusion_fingerprint': exclusion_fingerprint(frozenset())}
+        AnalysisSnapshot.objects.filter(pk=self.snapshot.pk).update(dashboard_payloads={ALL_SERVERS_PAYLOAD: stored})
+        with self.assertNumQueries(1):
+            counts = self._counts(ALL_SERVERS_PAYLOAD, {})
+        self.assertEqual(counts, stored)
+
+    def test_all_servers_without_payload(self):
+        # payload lookup, snapshot version, latest snapshot + its population summary,
+        # population, metrics
+        with self.assertNumQueries(6):
+            counts = self._counts(ALL_SERVERS_PAYLOAD, {})
+        self.assertEqual(counts['servers_with_missing'], 2)
+
+    def test_multi_selection(self):
+        # snapshot version, latest snapshot + its population summary, population, metrics
+        with self.assertNumQueries(5):
+            counts = self._counts('multi:region:EMEA', self.MULTI_FILTER)
+        self.assertEqual(counts['servers_with_missing'], 1)
+        self.assertEqual(counts['alive_status_inconsistent_count'], 1)
+        # Served from the result LRU: only its snapshot version lookup
+        with self.assertNumQueries(1):
+            self.assertEqual(self._counts('multi:region:EMEA', self.MULTI_FILTER), counts)
+
+    def test_multi_selection_query_count_independent_of_rows(self):
+        with CaptureQueriesContext(connection) as few_rows:
+            self._counts('multi:region:EMEA', self.MULTI_FILTER)
+        dashboard_metrics._result_cache.clear()
+        now = timezone.now()
+        ServerDiscrepancy.objects.bulk_create([
+            ServerDiscrepancy(SERVER_ID=f'BULK{i}', analysis_date=now, REGION='EMEA', missing_fields='CITY')
+            for i in range(50)
+        ])
+        with CaptureQueriesContext(connection) as many_rows:
+            counts = self._counts('multi:region:EMEA', self.MULTI_FILTER)
+        self.assertEqual(len(many_rows), len(few_rows))
+        self.assertEqual(counts['missing_city_count'], 50)
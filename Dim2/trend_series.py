@@ -0,0 +1,122 @@
+# trend_series.py
+#
+# Quality Trend series as a narrow (source, analysis_date, metric, value) table — TrendPoint.
+# The trend APIs used to walk every AnalysisSnapshot / PamelaAnalysisSnapshot row of the window
+# as full model instances (diff_summary, listbox_values, dashboard_payloads... all loaded) just
+# to read one integer per run; "days=all" meant the whole history, every time.
+#
+# The analyzers append one point per metric for every snapshot they write
+# (record_trend_points), so a chart is one range scan of the (source, metric, analysis_date)
+# unique index, whatever the window. The first recording for a source backfills every existing
+# snapshot of it, so the history is there from the first run after deploying the table.
+# Anything that rewrites a source's snapshots wholesale (the DEV seed) clears its points and
+# backfills again. trend_series() returns None when the window holds fewer points than
+# snapshots (a metric first recorded after the backfill, or a writer that skipped its points) —
+# callers then fall back to reading the snapshots themselves.
+
+import datetime
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import AnalysisSnapshot, PamelaAnalysisSnapshot, TrendPoint
+
+# Same x-axis labels as the snapshot-based trend helpers
+TREND_LABEL_FORMAT = '%d %b'
+
+
+def disc_trend_metrics():
+    # Every integer metric of AnalysisSnapshot (servers_with_issues, missing_*_count, ...).
+    return [
+        field.name for field in AnalysisSnapshot._meta.concrete_fields
+        if isinstance(field, models.IntegerField) and not field.primary_key
+    ]
+
+
+def _disc_points(row):
+    return {metric: row[metric] or 0 for metric in disc_trend_metrics()}
+
+
+def _pamela_points(row):
+    # any_missing + every known tool, 0 included — same values _get_pamela_trend_data reads.
+    from .pamela_sync import PAMELA_TOOL_CHOICES
+
+    tool_counts = row['tool_counts'] or {}
+    points = {'any_missing': row['servers_with_any_missing'] or 0}
+    for tool in list(PAMELA_TOOL_CHOICES) + [t for t in tool_counts if t not in PAMELA_TOOL_CHOICES]:
+        points[tool] = tool_counts.get(tool, 0)
+    return points
+
+
+def _source_spec(source):
+    # (snapshot model, columns read, row -> {metric: value})
+    if source == TrendPoint.SOURCE_PAMELA:
+        return PamelaAnalysisSnapshot, ['analysis_date', 'servers_with_any_missing', 'tool_counts'], _pamela_points
+    return AnalysisSnapshot, ['analysis_date'] + disc_trend_metrics(), _disc_points
+
+
+def _trend_points(source, rows):
+    build = _source_spec(source)[2]
+    return [
+        TrendPoint(source=source, analysis_date=row['analysis_date'], metric=metric, value=value)
+        for row in rows
+        for metric, value in build(row).items()
+    ]
+
+
+def backfill_trend_points(source):
+    """Points for every existing snapshot of `source` if it has none yet; returns the snapshot count."""
+    if TrendPoint.objects.filter(source=source).exists():
+        return 0
+    model, columns, _ = _source_spec(source)
+    rows = list(model.objects.order_by('analysis_date').values(*columns))
+    TrendPoint.objects.bulk_create(_trend_points(source, rows), batch_size=1000)
+    return len(rows)
+
+
+def reset_trend_points(source):
+    """Drop every point of `source` and backfill them from its snapshots; returns the snapshot count."""
+    with transaction.atomic():
+        TrendPoint.objects.filter(source=source).delete()
+        return backfill_trend_points(source)
+
+
+def record_trend_points(source, snapshots):
+    """
+    (Re)write the points of `snapshots` (snapshot model instances of `source`), backfilling the
+    source's history first if this is its first recording. PAMELA snapshots are keyed on the
+    calendar day (a rerun replaces that day's row), so its points are replaced per day too.
+    """
+    _, columns, _ = _source_spec(source)
+    rows = [{column: getattr(snapshot, column) for column in columns} for snapshot in snapshots]
+    with transaction.atomic():
+        backfilled = backfill_trend_points(source)
+        replaced = TrendPoint.objects.filter(source=source)
+        if source == TrendPoint.SOURCE_PAMELA:
+            replaced = replaced.filter(analysis_date__date__in={row['analysis_date'].date() for row in rows})
+        else:
+            replaced = replaced.filter(analysis_date__in=[row['analysis_date'] for row in rows])
+        replaced.delete()
+        TrendPoint.objects.bulk_create(_trend_points(source, rows), batch_size=1000)
+    return backfilled
+
+
+def trend_series(source, metric, days=None):
+    """
+    {'labels': [...], 'values': [...]} for `metric` over the last `days` days (None = all
+    history), oldest first — or None when the window has fewer points of `metric` than
+    snapshots (the series would have gaps).
+    """
+    points = TrendPoint.objects.filter(source=source, metric=metric)
+    snapshots = _source_spec(source)[0].objects.all()
+    if days is not None:
+        cutoff = timezone.now() - datetime.timedelta(days=days)
+        points = points.filter(analysis_date__gte=cutoff)
+        snapshots = snapshots.filter(analysis_date__gte=cutoff)
+    rows = list(points.order_by('analysis_date').values_list('analysis_date', 'value'))
+    if len(rows) < snapshots.count():
+        return None
+    return {
+        'labels': [analysis_date.strftime(TREND_LABEL_FORMAT) for analysis_date, _ in rows],
+        'values': [value for _, value in rows],
+    }
@@ -6,8 +6,10 @@ app_name = 'discrepancies'
 urlpatterns = [
     path('dashboard/', views.dashboard_view, name='dashboard_view'),
     path('servers/', views.server_view, name='servers'),
+    path('servers/fragment/', views.server_table_fragment, name='servers_fragment'),
     path('pamela/dashboard/', views.pamela_dashboard_view, name='pamela_dashboard_view'),
     path('pamela/servers/', views.pamela_server_view, name='pamela_servers'),
+    path('pamela/servers/fragment/', views.pamela_server_table_fragment, name='pamela_servers_fragment'),
     path('pamela/api/trend/', views.pamela_trend_api_view, name='pamela_trend_api'),
     path('pamela/api/dashboard-filter/', views.pamela_dashboard_filter_api, name='pamela_dashboard_filter_api'),
     path('pamela/export/<str:filetype>/', views.pamela_export_to_file, name='pamela_export_to_file'),
@@ -22,6 +24,8 @@ urlpatterns = [
     path('export/download/<uuid:job_id>/<str:filetype>/', views.download_export, name='download_export'),
     path('api/trend/', views.trend_api_view, name='trend_api'),
     path('api/dashboard-filter/', views.dashboard_filter_api, name='dashboard_filter_api'),
+    path('api/dashboard-bootstrap/', views.dashboard_bootstrap_api, name='dashboard_bootstrap_api'),
+    path('api/snapshot-diff/', views.snapshot_diff_api, name='snapshot_diff_api'),
     path('update_permanentfilter_field/', views.update_permanentfilter_field, name='update_permanentfilter_field'),
     path('charts/', views.chart_view, name='chart_view'),
     path('history/', views.historic_breakdown_view, name='historic_breakdown_view'),
@@ -1,6 +1,7 @@
 import csv
 import datetime
 import django
+import hashlib
 import io
 import json
 import math
@@ -15,26 +16,39 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.core.cache import cache
+from django.core import signing
 from django.db import models, transaction
 from django.db.models import Q, F, Case, When, Count, OuterRef, Subquery
-from django.db.models.functions import Upper
+from django.db.models.functions import Cast, Coalesce, Upper
 from django.http import FileResponse, JsonResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse, QueryDict
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 
 from collections import defaultdict, Counter
+from .dashboard_metrics import (
+    ALL_SERVERS_PAYLOAD, DAYS_OPEN_RESULT_MAX_AGE, FIELD_TO_METRIC, cached_dashboard_counts, discrepancy_counts, exclusion_fingerprint,
+    filter_querysets, population_counts, summary_population_counts,
+)
+from .exclusions import exclude_excluded, excluded_server_names, exclusion_version
 from .exports import generate_csv, generate_excel, EXPORT_DIR
+from .search import construct_query
+from .cache_versions import SNAPSHOT_MODELS, snapshot_version
+from .config_registry import config_version, derived, load_config
+from .listbox_index import get_listbox_values, listbox_fields
+from .snapshot_store import get_snapshot_store
+from .trend_series import trend_series
 from urllib.parse import urlencode, parse_qs, unquote, quote_plus
 from functools import lru_cache
-from threading import Lock
 
+from common.swr_cache import get_or_compute
 from common.views import generate_charts
-from .models import AnalysisSnapshot, AnalysisSnapshotBreakdown, ServerDiscrepancy, DiscrepancyTracking, DiscrepancyAnnotation, ImportStatus, ExcludedServer, DailyPamelaDBSummary, ServerDiscrepancyPamela, PamelaDiscrepancyTracking, PamelaAnalysisSnapshot, PamelaImportStatus, safe_percentage, safe_percentage_clean
+from .models import ANALYSIS_SNAPSHOT_HEAVY_FIELDS, AnalysisSnapshot, AnalysisSnapshotBreakdown, AnalysisSnapshotDiffEntry, ServerDiscrepancy, DiscrepancyTracking, DiscrepancyAnnotation, ImportStatus, ExcludedServer, DailyPamelaDBSummary, ServerDiscrepancyPamela, ServerDiscrepancyPamelaTool, PamelaDiscrepancyTracking, PamelaAnalysisSnapshot, PamelaImportStatus, TrendPoint, safe_percentage, safe_percentage_clean
 from .utils import get_trend_data, compute_days_open
 from userapp.models import UserProfile, SavedSearch, SavedOptions, UserPermissions
 from accessrights.helpers import has_perm
@@ -42,89 +56,221 @@ from accessrights.helpers import has_perm
 
 app_name=__package__.split('.')[-1]
 
-_field_labels_cache = None
-_field_labels_file_mtime = 0
-_cache_lock = Lock()
+def get_field_labels():
+    # field_labels.json, parsed once per process and reloaded when the file changes (see
+    # config_registry.py). Callers must not modify the returned dict.
+    return load_config('field_labels.json')
 
 
-def get_field_labels():
-    # Cache field_labels.json with update when the file changes, Thread-safe for Gunicorn
+def get_dashboard_config():
+    # discrepancies_dashboard.json — same scheme as get_field_labels().
+    return load_config('discrepancies_dashboard.json')
 
-    global _field_labels_cache, _field_labels_file_mtime
-    
-    json_path = os.path.join(os.path.dirname(__file__), 'field_labels.json')
-    
-    try:
-        current_file_mtime = os.path.getmtime(json_path)
-    except OSError:
-        return _field_labels_cache
 
-    if _field_labels_cache is not None and current_file_mtime == _field_labels_file_mtime:
-        return _field_labels_cache
-    
-    with _cache_lock:
-        try:
-            current_file_mtime = os.path.getmtime(json_path)
-        except OSError:
-            return _field_labels_cache
-        
-        if _field_labels_cache is not None and current_file_mtime == _field_labels_file_mtime:
-            return _field_labels_cache
-        
-        try:
-            with open(json_path, 'r', encoding="utf-8") as f:
-                _field_labels_cache = json.load(f)
-            
-            _field_labels_file_mtime = current_file_mtime
-            
-            #print(f"[get_field_labels] Reloaded field_labels.json (mtime: {current_file_mtime})")
-            
-        except (OSError, json.JSONDecodeError) as e:
-            #print(f"[get_field_labels] Error loading field_labels.json: {e}")
-            return _field_labels_cache
-    
-    return _field_labels_cache
+def get_pamela_dashboard_config():
+    # pamela_dashboard.json — same scheme as get_field_labels().
+    return load_config('pamela_dashboard.json')
+
+
+def _build_field_maps(json_data):
+    fields_info = json_data.get('fields', {})
+    return {
+        'field_to_inputname': {fname: finfo.get('inputname', fname.lower())
+                               for fname, finfo in fields_info.items()},
+        'inputname_to_field': {finfo.get('inputname', fname.lower()): fname
+                               for fname, finfo in fields_info.items()},
+        'field_displayname':  {fname: finfo.get('displayname', fname)
+                               for fname, finfo in fields_info.items()},
+    }
+
+
+def get_field_maps():
+    # {'field_to_inputname', 'inputname_to_field', 'field_displayname'} for field_labels.json,
+    # rebuilt only when the file changes.
+    return derived('field_labels.json', 'field_maps', _build_field_maps)
 
 
 def get_filter_mapping():
+    # {field: model attribute} for every field of field_labels.json (identity mapping).
+    return derived(
+        'field_labels.json', 'filter_mapping',
+        lambda field_labels: {field_name: field_name for field_name in field_labels['fields']},
+    )
 
-    json_path = os.path.join(os.path.dirname(__file__), 'field_labels.json')
-    with open(json_path, "r", encoding="utf-8") as f:
-        field_labels = json.load(f)
 
-    # Initialize an empty dictionary to store the filter mapping
-    FILTER_MAPPING = {}
-    
-    # Iterate over each field defined in the fields section of the JSON configuration
-    for field_name, field_properties in field_labels['fields'].items():
-        FILTER_MAPPING[field_name] = field_name  # Map the field to the attribute of the model
+# Compiled filter plans. server_view, get_filtered_servers (chart_view), the export path and
+# bulk_annotation all re-parse the same field filters and rebuild the same construct_query() Q
+# tree on every request — and paging through a result, exporting it, charting it or annotating
+# it re-runs that same multi-column filter each time. The field-filter part only depends on
+# ServerDiscrepancy's content, which only changes when an analysis run imports a new snapshot,
+# so it's resolved once per (normalized filter, snapshot) into the matching SERVER_IDs and
+# reused: later requests filter on SERVER_ID (indexed) instead of re-evaluating the filter.
+# SERVER_IDs rather than row pks: the analyzer rewrites every row (new pks) before its new
+# AnalysisSnapshot commits, so pks cached under the still-current version would match nothing
+# for the whole run, while a server keeps its SERVER_ID across runs.
+# Versioned by the latest AnalysisSnapshot (common.swr_cache, single-flight), so a new analysis
+# run makes every older plan unreachable; the previous snapshot's matches are never applied
+# to the new one (serve_previous_version=False).
+# Only the field terms are cached — exclusions, ANNOTATION, days_open and any_inconsistency
+# stay live filters on top (they change between imports, and are cheap SERVER_ID lookups).
+FILTER_PLAN_CACHE_TIMEOUT = 6 * 3600
+# Above this many matching rows, a SERVER_ID IN (...) list stops being cheaper than the filter itself
+# (and hits bind-parameter limits) — such plans are remembered as "too broad" and filtered live.
+FILTER_PLAN_MAX_IDS = 10000
+FILTER_PLAN_TOO_BROAD = 'too_broad'
+
+
+def compile_filter_plan(field_terms):
+    """
+    {field: [terms]} -> canonical, hashable plan: fields sorted, empty fields/terms dropped,
+    virtual fields (ANNOTATION/days_open) left out. Term order within a field is kept —
+    construct_query() folds '!' exclusions and plain terms in order, so it's significant.
+    Returns () when there's nothing to filter on.
+    """
+    return tuple(sorted(
+        (field, tuple(t for t in terms if t))
+        for field, terms in field_terms.items()
+        if field not in ('ANNOTATION', 'days_open') and any(terms)
+    ))
 
-    # Return the filter mapping dictionary
-    return FILTER_MAPPING
-    
-    
-def construct_query(key, terms):
-    # Creates a Django Q object based on a list of terms for a specific field
+
+def _filter_plan_q(plan):
     query = Q()
-    
-    # Iterate over each term in the terms list
-    for term in terms:
-        if term.startswith('@'):  # Check if the term starts with '@' for an exact match
-            term = term[1:]  # Remove the '@' character
-            query |= Q(**{f'{key}__iexact': term})  # Create a Q object for an exact match (case-insensitive)
-        elif term.startswith('!'):  # Check if the term starts with '!' for an exclusion
-            term = term[1:]  # Remove the '!' character
-            query &= ~Q(**{f'{key}__icontains': term})  # Create a Q object for an exclusion (case-insensitive containment test)
-        else:  # For terms without special characters, perform a containment test
-            query |= Q(**{f'{key}__icontains': term})  # Create a Q object for a containment test (case-insensitive)
-
-    # Return the combined Q object representing the filter criteria
+    for field, terms in plan:
+        query &= construct_query(field, list(terms))
     return query
-       
+
+
+def apply_filter_plan(queryset, plan):
+    # `queryset` (ServerDiscrepancy) narrowed to the rows matching `plan` — see the comment block above.
+    if not plan:
+        return queryset
+    def compute():
+        server_ids = list(
+            ServerDiscrepancy.objects.filter(_filter_plan_q(plan))
+            .values_list('SERVER_ID', flat=True)[:FILTER_PLAN_MAX_IDS + 1]
+        )
+        return FILTER_PLAN_TOO_BROAD if len(server_ids) > FILTER_PLAN_MAX_IDS else server_ids
+
+    server_ids = get_or_compute(
+        'filterplan_ids', hashlib.md5(repr(plan).encode('utf-8')).hexdigest(), compute,
+        version=snapshot_version('disc'), timeout=FILTER_PLAN_CACHE_TIMEOUT, serve_previous_version=False,
+    )
+    if server_ids == FILTER_PLAN_TOO_BROAD:
+        return queryset.filter(_filter_plan_q(plan))
+    return queryset.filter(SERVER_ID__in=server_ids)
+
+
+def _store_filter_mask(store, field_terms, any_inconsistency='', annotation_terms=(), days_open=0, excluded_names=()):
+    """
+    The ServerDiscrepancy filter the views build in SQL, evaluated against the in-memory
+    snapshot store instead (see snapshot_store.py) — field terms through the same
+    compile_filter_plan(), any_inconsistency as icontains on the alive/dead columns, ANNOTATION
+    and days_open through the same SERVER_ID lookups, exclusions removed. Returns a row mask,
+    or None when this filter can't be served from the store (caller falls back to SQL).
+    """
+    mask = store.plan_mask(compile_filter_plan(field_terms))
+    if mask is None:
+        return None
+    if any_inconsistency:
+        mask &= (
+            store.contains_mask('alive_status_inconsistent', any_inconsistency)
+            | store.contains_mask('dead_status_inconsistent', any_inconsistency)
+        )
+    if annotation_terms:
+        mask &= store.server_ids_mask(DiscrepancyAnnotation.objects.filter(
+            construct_query('comment', list(annotation_terms))
+        ).values_list('SERVER_ID', flat=True))
+    if days_open > 0:
+        cutoff = timezone.now() - datetime.timedelta(days=days_open)
+        mask &= store.server_ids_mask(DiscrepancyTracking.objects.filter(
+            oldest_first_seen__lte=cutoff
+        ).values_list('SERVER_ID', flat=True))
+    if excluded_names:
+        mask &= ~store.server_ids_mask(excluded_names)
+    return mask
+
+
+# ── Page assembly ─────────────────────────────────────────────────────────
+# A Servers page is one query for its rows — each already carrying its annotation (correlated
+# subselects, i.e. a LEFT JOIN on the unique SERVER_ID) and its tracking data (published onto
+# ServerDiscrepancy by the analyzer, see ServerDiscrepancy.oldest_first_seen), with the
+# tracker's active_issues rendered to JSON text by the database instead of json.dumps() per
+# row. Per-request data that several parts of a view (or several views rendering the same
+# request) need — profile, saved searches, last import — is memoized on the request.
+PAGE_ANNOTATION_FIELDS = ('pk', 'comment', 'assigned_to', 'history', 'updated_at')
+
+
+def _days_open_since(queryset):
+    # (queryset, column) to filter/sort a ServerDiscrepancy queryset on "open since": the
+    # published oldest_first_seen column (indexed) — unless some rows don't carry it yet
+    # (inserted after the analyzer's publish_tracking, until its next run), in which case those
+    # rows read their DiscrepancyTracking value instead of dropping out of the filter/sort.
+    if not ServerDiscrepancy.objects.filter(oldest_first_seen__isnull=True).exists():
+        return queryset, 'oldest_first_seen'
+    tracker_since = DiscrepancyTracking.objects.filter(SERVER_ID=OuterRef('SERVER_ID')).values('oldest_first_seen')[:1]
+    return queryset.annotate(days_open_since=Coalesce('oldest_first_seen', Subquery(tracker_since))), 'days_open_since'
+
+
+def _request_memo(request, key, compute):
+    memo = request.__dict__.setdefault('_discrepancies_memo', {})
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+def _request_exclusion_version(request):
+    # exclusion_version()'s aggregate, once per request however many cache keys need it
+    return _request_memo(request, 'exclusion_version', exclusion_version)
+
+
+def _request_excluded_names(request):
+    # Only for the code paths that need the set itself (store masks, fingerprints, counts) —
+    # SQL filters go through exclude_excluded() and never need it.
+    return _request_memo(request, 'excluded_names', lambda: excluded_server_names(_request_exclusion_version(request)))
+
+
+def _request_profile(request):
+    return _request_memo(request, 'profile', lambda: UserProfile.objects.get_or_create(user=request.user)[0])
+
+
+def _request_saved_searches(request, view):
+    return _request_memo(request, f'saved_searches_{view}', lambda: list(
+        SavedSearch.objects.filter(user_profile__user=request.user, view=view).order_by('name')
+    ))
+
+
+def _request_last_import(request, status_model=ImportStatus):
+    return _request_memo(request, f'last_import_{status_model.__name__}', lambda: status_model.objects.order_by('-date_import').first())
+
+
+def _with_page_joins(queryset):
+    # `queryset` (ServerDiscrepancy) with its annotation's columns and the tracker JSON text
+    # attached to every row — see _page_row_annotation().
+    annotation = DiscrepancyAnnotation.objects.filter(SERVER_ID=OuterRef('SERVER_ID'))
+    return queryset.annotate(
+        tracker_json_text=Cast('active_issues', output_field=models.TextField()),
+        **{
+            f'ann_{field}': Subquery(annotation.values(field)[:1])
+            for field in PAGE_ANNOTATION_FIELDS
+        },
+    )
+
+
+def _page_row_annotation(server):
+    # The DiscrepancyAnnotation joined onto a _with_page_joins() row (unsaved instance, same
+    # attributes/methods the template uses), or None when the server has none.
+    if server.ann_pk is None:
+        return None
+    return DiscrepancyAnnotation(
+        SERVER_ID=server.SERVER_ID,
+        **{field: getattr(server, f'ann_{field}') for field in PAGE_ANNOTATION_FIELDS},
+    )
+
 
 # View to display the server information - Main View
 @login_required
-def server_view(request):
+def server_view(request, fragment=False):
 
     if not has_perm(request.user, 'discrepancies.access'):
         return render(request, 'accessrights/denied.html', status=403)
@@ -132,10 +278,7 @@ def server_view(request):
     # Get the user's profile if it already exists in the table userapp_userprofile
     localhostname = socket.gethostname()    
 
-    try:
-        profile = UserProfile.objects.get(user=request.user)
-    except UserProfile.DoesNotExist:
-        profile = UserProfile.objects.create(user=request.user)
+    profile = _request_profile(request)
 
     # Read and save the field_labels.json information
     json_data = get_field_labels()
@@ -153,26 +296,33 @@ def server_view(request):
     # Build the query based on the filters values extracted earlier
     all_servers = ServerDiscrepancy.objects.all()
 
-    excluded_names = set(ExcludedServer.objects.values_list('server_name', flat=True))
-    if excluded_names:
-        all_servers = all_servers.exclude(SERVER_ID__in=excluded_names)
+    all_servers = exclude_excluded(all_servers)
 
-    combined_filter_query = Q()
-    for key, values in filters.items():
-        if not values:
-            continue
-        if key in ('ANNOTATION', 'days_open'):
-            continue
+    annotation_terms = [v for v in filters.get('ANNOTATION', []) if v]
+    any_inc = request.GET.get('any_inconsistency', '').strip()
+    days_open_param = request.GET.get('days_open', '').strip()
 
-        # Build the query for this field
-        query = construct_query(key, values)
-        combined_filter_query &= query  # Combine with AND
+    # In-memory snapshot store (optional, see snapshot_store.py): when it can serve this
+    # request, filtering/sorting/counting below happen on the store and SQL only fetches the
+    # page's rows. Only sorts on a loaded (dictionary-encoded) column can be served from it —
+    # days_open needs the tracker join, and any other unloaded column would silently come back
+    # in SERVER_ID order — so those always go through SQL. ANNOTATION sorts by SERVER_ID anyway.
+    store = get_snapshot_store()
+    if store is not None and request.GET.get('sort', 'SERVER_ID') not in set(store.codes) | {'ANNOTATION'}:
+        store = None
+    store_mask = None
+    if store is not None:
+        store_mask = _store_filter_mask(
+            store, filters, any_inconsistency=any_inc, annotation_terms=annotation_terms,
+            days_open=int(days_open_param) if days_open_param.isdigit() else 0,
+            excluded_names=_request_excluded_names(request),
+        )
 
-    if combined_filter_query:
-        all_servers = all_servers.filter(combined_filter_query)
+    # Field filters, resolved through the cached filter plan (see apply_filter_plan)
+    if store_mask is None:
+        all_servers = apply_filter_plan(all_servers, compile_filter_plan(filters))
 
     # Handle ANNOTATION filter: filter servers by annotation comment
-    annotation_terms = [v for v in filters.get('ANNOTATION', []) if v]
     if annotation_terms:
         matching_ids = DiscrepancyAnnotation.objects.filter(
             construct_query('comment', annotation_terms)
@@ -180,43 +330,36 @@ def server_view(request):
         all_servers = all_servers.filter(SERVER_ID__in=matching_ids)
 
     # any_inconsistency=KO -> OR between alive and dead inconsistency (virtual param)
-    any_inc = request.GET.get('any_inconsistency', '').strip()
     if any_inc:
         all_servers = all_servers.filter(
             Q(alive_status_inconsistent__icontains=any_inc) | Q(dead_status_inconsistent__icontains=any_inc)
         )
 
-    # days_open filter — restrict to servers open for at least N days
-    days_open_param = request.GET.get('days_open', '').strip()
-    if days_open_param.isdigit() and int(days_open_param) > 0:
-        cutoff = timezone.now() - datetime.timedelta(days=int(days_open_param))
-        matching_ids = DiscrepancyTracking.objects.filter(
-            oldest_first_seen__lte=cutoff
-        ).values_list('SERVER_ID', flat=True)
-        all_servers = all_servers.filter(SERVER_ID__in=matching_ids)
-
     # Get filtered and sorted servers
     sort_field = request.GET.get('sort', 'SERVER_ID')
     sort_order = request.GET.get('order', 'asc')
 
+    # days_open filter — restrict to servers open for at least N days
+    since_column = 'oldest_first_seen'
+    if sort_field == 'days_open' or (days_open_param.isdigit() and int(days_open_param) > 0):
+        all_servers, since_column = _days_open_since(all_servers)
+    if days_open_param.isdigit() and int(days_open_param) > 0:
+        cutoff = timezone.now() - datetime.timedelta(days=int(days_open_param))
+        all_servers = all_servers.filter(**{f'{since_column}__lte': cutoff})
+
     if sort_field == 'days_open':
-        oldest = DiscrepancyTracking.objects.filter(
-            SERVER_ID=OuterRef('SERVER_ID')
-        ).values('oldest_first_seen')[:1]
-        all_servers = all_servers.annotate(oldest_issue=Subquery(oldest))
+        # oldest_first_seen is published onto ServerDiscrepancy by the analyzer (indexed column).
         # Invert: asc days_open = fewest days first = newest oldest_first_seen first
-        order_expr = F('oldest_issue').desc(nulls_last=True) if sort_order == 'asc' else F('oldest_issue').asc(nulls_last=True)
+        sort_column, sort_descending = since_column, sort_order == 'asc'
     elif sort_field == 'ANNOTATION':
         # ANNOTATION is not a real DB field — fall back to SERVER_ID sort
-        order_expr = F('SERVER_ID').asc(nulls_last=True)
+        sort_column, sort_descending = 'SERVER_ID', False
     else:
         # Validate sort_field against known fields to prevent injection
         valid_sort_fields = {f_key for f_key in json_data.get('fields', {}).keys() if f_key not in ('days_open', 'ANNOTATION')}
         if sort_field not in valid_sort_fields:
             sort_field = 'SERVER_ID'
-        order_expr = F(sort_field).asc(nulls_last=True) if sort_order == 'asc' else F(sort_field).desc(nulls_last=True)
-
-    filtered_servers = all_servers.order_by(order_expr)
+        sort_column, sort_descending = sort_field, sort_order != 'asc'
    
     # Define some pagination settings that will be passed as context
     page_size = int(request.GET.get('page_size', 50))
@@ -235,33 +378,14 @@ def server_view(request):
     table_fields=[]
     # Loop in the fields items: if some have the attribute listbox, generate the content to display it the associated drop down list in the view
 
-    cacheset=False
+    # Dropdown contents come from the analyzer-published index of the latest snapshot (see
+    # listbox_index.py) — one lookup for all fields instead of a DISTINCT query per field.
+    listbox_values, cacheset = get_listbox_values('disc', listbox_fields(json_data_fields))
     for key, val in finalfields:
         listbox_value=val.get("listbox", '')
         listempty_value=val.get("listempty", '') 
         if listbox_value:
-            cache_key = f"listbox_disc_{key}"
-            listbox_evaluated_disc = cache.get(cache_key)
-            if listbox_evaluated_disc is None:
-                if listempty_value =="True":
-                    listbox_evaluated_disc = ['MISSING']
-                else:
-                    listbox_evaluated_disc = ServerDiscrepancy.objects.values_list(key, flat=True).distinct().order_by(key)
-
-                if listbox_evaluated_disc:  # Sort the entry to put "EMPTY" at the end
-                    listbox_evaluated_disc = list(listbox_evaluated_disc)
-                    if any(x is None or x.upper() == "EMPTY" for x in listbox_evaluated_disc):
-                        has_na = any(isinstance(x, str) and x.upper() == "EMPTY" for x in listbox_evaluated_disc)  #"EMPTY" in listbox_evaluated_disc
-                        listbox_evaluated_disc = [
-                            x for x in listbox_evaluated_disc if x is not None and x != "" and x.upper() != "EMPTY"
-                        ]
-
-                        listbox_evaluated_disc.sort()
-                        if has_na:
-                            listbox_evaluated_disc.append("EMPTY")
-                   
-                cache.set(cache_key, listbox_evaluated_disc, timeout=3600)  # Cache for 1 hour
-                cacheset=True
+            listbox_evaluated_disc = ['MISSING'] if listempty_value == "True" else listbox_values[key]
         else:
             listbox_evaluated_disc = '' 
           
@@ -306,8 +430,7 @@ def server_view(request):
         if cat in grouped and cat != 'cat0'
     ]
     
-    profile = UserProfile.objects.get(user=request.user)
-    last_status = ImportStatus.objects.order_by('-date_import').first()
+    last_status = _request_last_import(request)
     visible_columns = request.GET.get("visible_columns")
     
     # Processing according to display mode
@@ -327,11 +450,36 @@ def server_view(request):
             })
 
     
-    paginator = Paginator(filtered_servers, page_size)
-    page_obj_raw = paginator.get_page(request.GET.get('page'))
+    if store_mask is not None:
+        # Ordered SERVER_IDs come from the store, so the page is a slice of that list at any
+        # depth — only the page's own rows are read from SQL.
+        def fetch_page_rows(page_ids):
+            servers_by_id = {
+                server.SERVER_ID: server
+                for server in _with_page_joins(ServerDiscrepancy.objects.filter(SERVER_ID__in=page_ids))
+            }
+            return [servers_by_id[sid] for sid in page_ids if sid in servers_by_id]
 
-    # Convert only the current page to list
-    current_page_servers = list(page_obj_raw)
+        page_obj_raw = _keyset_page_of_ids(
+            store.ordered_server_ids(store_mask, sort_column, sort_descending), sort_column, page_size,
+            request.GET.get('cursor', ''), fetch_page_rows,
+        )
+        total_servers_stat = page_obj_raw.paginator.count
+        current_page_servers = list(page_obj_raw)
+    else:
+        total_servers_stat = _cached_queryset_count(all_servers, f"disc{snapshot_version('disc')}")
+        if request.GET.get('page'):
+            page_obj_raw = _offset_page(
+                _with_page_joins(all_servers), sort_column, sort_descending, page_size,
+                request.GET.get('page'), total_servers_stat,
+            )
+            current_page_servers = list(page_obj_raw)
+        else:
+            page_obj_raw = _keyset_paginate(
+                _with_page_joins(all_servers), sort_column, sort_descending, page_size,
+                request.GET.get('cursor', ''), total_servers_stat,
+            )
+            current_page_servers = list(page_obj_raw)
 
     # Process servers from current page
     for server in current_page_servers:
@@ -343,32 +491,38 @@ def server_view(request):
     # Fetch tracker data for current page servers
     hostnames_in_page = [s['hostname'] for s in display_servers]
     if hostnames_in_page:
-        trackers = DiscrepancyTracking.objects.filter(SERVER_ID__in=hostnames_in_page)
-        tracker_dict = {t.SERVER_ID: t for t in trackers}
+        # Rows carry their own tracking data (active_issues/oldest_first_seen, published by the
+        # analyzer) — DiscrepancyTracking is only read for rows written before that existed.
+        unpublished = [s['hostname'] for s in display_servers if s['primary_server'].oldest_first_seen is None]
+        tracker_dict = {
+            t.SERVER_ID: t for t in DiscrepancyTracking.objects.filter(SERVER_ID__in=unpublished)
+        } if unpublished else {}
+        for server_group in display_servers:
+            server = server_group['primary_server']
+            if server.oldest_first_seen is not None:
+                tracker_dict[server_group['hostname']] = server
 
         # Fields actively filtered — used for context-sensitive days_open
         active_filter_fields = {k for k, v in filters.items() if v and k not in ('days_open', 'ANNOTATION')}
 
         for server_group in display_servers:
+            server = server_group['primary_server']
             tracker = tracker_dict.get(server_group['hostname'])
             server_group['tracker'] = tracker
-            server_group['tracker_json'] = json.dumps(tracker.active_issues) if tracker else '{}'
-            server_group['primary_server'].days_open = compute_days_open(tracker, active_filter_fields)
-
+            if tracker is server:
+                server_group['tracker_json'] = server.tracker_json_text or '{}'
+            else:
+                server_group['tracker_json'] = json.dumps(tracker.active_issues) if tracker else '{}'
+            server.days_open = compute_days_open(tracker, active_filter_fields)
 
-    # Load annotations for current page servers
-    annotations = DiscrepancyAnnotation.objects.filter(SERVER_ID__in=hostnames_in_page)
-    annotations_dict = {ann.SERVER_ID: ann for ann in annotations}
+    # Annotations came with the rows (see _with_page_joins)
     for server_group in display_servers:
-        server_group['annotation'] = annotations_dict.get(server_group['hostname'])
+        server_group['annotation'] = _page_row_annotation(server_group['primary_server'])
     
-    page_obj = create_page_wrapper(display_servers, page_obj_raw)
-    total_servers_stat = paginator.count
+    page_obj = page_obj_raw.with_objects(display_servers)
 
     # Load saved searches for this user/app
-    saved_searches = SavedSearch.objects.filter(
-        user_profile__user=request.user, view=app_name
-    ).order_by('name')
+    saved_searches = _request_saved_searches(request, app_name)
 
     # Rendering servers.html with the corresponding context
 
@@ -379,7 +533,7 @@ def server_view(request):
         'appname' : app_name,  # Application name
         'page_size' : page_size,  # Number of objects per page
         'current_filters': filters,  # Filters defined above
-        'json_data' : json.dumps(json_data),  # Json content
+        'json_data' : json.dumps(json_data) if not fragment else '',  # Json content (not needed by table fragments)
         'last_status' : last_status,  # Last import state
         'loggedonuser' : request.user,  # Logon name
         'model_fields': model_fields,
@@ -392,6 +546,8 @@ def server_view(request):
         'saved_searches': saved_searches,
     }   
 
+    if fragment:
+        return render(request, f'{app_name}/servers_fragment.html', context)
     return render(request, f'{app_name}/servers.html', context)
 
 
@@ -403,9 +559,7 @@ def dashboard_view(request):
         return render(request, 'accessrights/denied.html', status=403)
 
     # Load dashboard configuration from JSON
-    config_path = os.path.join(os.path.dirname(__file__), 'discrepancies_dashboard.json' )
-    with open(config_path, 'r') as f:
-        config = json.load(f)
+    config = get_dashboard_config()
 
     # Permanent filter — read saved selection for this user
     json_data = get_field_labels()
@@ -414,13 +568,10 @@ def dashboard_view(request):
     permanent_filter_label = 'All Servers'
     permanent_filter_description = ''
     saved_searches = SavedSearch.objects.none()
-    fields_info = json_data.get('fields', {})
-    field_to_inputname = {fname: finfo.get('inputname', fname.lower())
-                          for fname, finfo in fields_info.items()}
-    inputname_to_field = {finfo.get('inputname', fname.lower()): fname
-                          for fname, finfo in fields_info.items()}
-    field_displayname   = {fname: finfo.get('displayname', fname)
-                          for fname, finfo in fields_info.items()}    
+    field_maps = get_field_maps()
+    field_to_inputname = field_maps['field_to_inputname']
+    inputname_to_field = field_maps['inputname_to_field']
+    field_displayname   = field_maps['field_displayname']
     
     if request.user.is_authenticated:
         try:
@@ -475,9 +626,10 @@ def dashboard_view(request):
         except (UserProfile.DoesNotExist, SavedOptions.DoesNotExist):
             pass
 
-    # Get the latest analysis snapshot
+    # Get the latest analysis snapshot — its scalar columns only, the page shell doesn't read
+    # the JSON blobs (the diff preview comes with the bootstrap payload).
     try:
-        latest_snapshot = AnalysisSnapshot.objects.latest('analysis_date')
+        latest_snapshot = AnalysisSnapshot.objects.defer(*ANALYSIS_SNAPSHOT_HEAVY_FIELDS).latest('analysis_date')
     except AnalysisSnapshot.DoesNotExist:
         # No analysis has been run yet
         context = {
@@ -517,7 +669,7 @@ def dashboard_view(request):
          for fname, fdef in _pf_filters.items() if 'OSFAMILY' in fdef],
         key=lambda x: x['label']
     )
-    _excluded = set(ExcludedServer.objects.values_list('server_name', flat=True))
+    exclusions_count = len(_request_excluded_names(request))
 
     # Widget values are always populated by the JS API call on load — no server-side computation needed.
     widgets_data = []
@@ -549,49 +701,23 @@ def dashboard_view(request):
             })
         widgets_data.append(widget_data)
     
-    # Prepare historical trend data (default metric)
+    # The page is rendered as a shell: the trend chart, the recent runs and the "changes since
+    # the previous run" panel (like the gauges) are all filled in from dashboard_bootstrap_api's
+    # single cached response after the first paint — none of them is computed here.
     historic_config = config['dashboard'].get('historic_section', {})
-    
-    if historic_config.get('enabled', False):
-        default_metric = historic_config.get('default_metric', 'servers_with_issues')
-        days = historic_config.get('days', 30)
-        trend_data = get_trend_data(default_metric, days)
-    else:
+    if not historic_config.get('enabled', False):
         historic_config = None
-        trend_data = None
-
-    recent_snapshots = list(AnalysisSnapshot.objects.order_by('-analysis_date')[:10])
 
-    raw_diff = latest_snapshot.diff_summary or {}
-    diff_new      = raw_diff.get('new', [])
-    diff_resolved = raw_diff.get('resolved', [])
-    diff_changed  = raw_diff.get('changed', {})
-    SHOW_MAX = 20
-    diff_display = {
-        'is_first_run':    not raw_diff,
-        'new':             diff_new[:SHOW_MAX],
-        'new_total':       len(diff_new),
-        'new_more':        max(0, len(diff_new) - SHOW_MAX),
-        'resolved':        diff_resolved[:SHOW_MAX],
-        'resolved_total':  len(diff_resolved),
-        'resolved_more':   max(0, len(diff_resolved) - SHOW_MAX),
-        'changed':         list(diff_changed.items())[:SHOW_MAX],
-        'changed_total':   len(diff_changed),
-        'changed_more':    max(0, len(diff_changed) - SHOW_MAX),
-    }
-    
     context = {
         'title': config['dashboard']['title'],
         'appname': app_name,
         'widgets': widgets_data,
         'snapshot': latest_snapshot,
         'no_data': False,
-        'has_exclusions': len(_excluded) > 0,
-        'exclusions_count': len(_excluded),
+        'has_exclusions': exclusions_count > 0,
+        'exclusions_count': exclusions_count,
         'historic_config': historic_config,
-        'trend_data': trend_data,
-        'recent_snapshots': recent_snapshots,
-        'diff_display': diff_display,
+        'bootstrap_url': reverse('discrepancies:dashboard_bootstrap_api'),
         'permanent_filter_names': permanent_filter_names,
         'permanent_filter_selection': permanent_filter_selection,
         'permanent_filter_label': permanent_filter_label,
@@ -604,47 +730,120 @@ def dashboard_view(request):
     return render(request, 'discrepancies/discrepancies_dashboard.html', context)
 
 
+def _diff_display(raw_diff, totals, show_max=AnalysisSnapshotDiffEntry.PREVIEW_SIZE):
+    # "Changes since the previous run" panel data from an AnalysisSnapshot.diff_summary.
+    # `totals` = the snapshot's (new, resolved, changed)_issues_count — a 'paged' diff_summary
+    # is only a preview (see AnalysisSnapshotDiffEntry), the rest is one snapshot_diff_api call away.
+    raw_diff = raw_diff or {}
+    diff_new      = raw_diff.get('new', [])
+    diff_resolved = raw_diff.get('resolved', [])
+    diff_changed  = raw_diff.get('changed', {})
+    # A paged preview keeps 'changed' as ordered [SERVER_ID, change] pairs (see diff_preview)
+    if isinstance(diff_changed, dict):
+        diff_changed = list(diff_changed.items())
+    if raw_diff.get('paged'):
+        new_total, resolved_total, changed_total = totals
+    else:
+        new_total, resolved_total, changed_total = len(diff_new), len(diff_resolved), len(diff_changed)
+    return {
+        'is_first_run':    not raw_diff,
+        'new':             diff_new[:show_max],
+        'new_total':       new_total,
+        'new_more':        max(0, new_total - show_max),
+        'resolved':        diff_resolved[:show_max],
+        'resolved_total':  resolved_total,
+        'resolved_more':   max(0, resolved_total - show_max),
+        'changed':         diff_changed[:show_max],
+        'changed_total':   changed_total,
+        'changed_more':    max(0, changed_total - show_max),
+    }
+
+
+def _diff_totals(snapshot):
+    # (new, resolved, changed) counts of an AnalysisSnapshot instance or .values() dict
+    get = snapshot.get if isinstance(snapshot, dict) else lambda name: getattr(snapshot, name)
+    return get('new_issues_count'), get('resolved_issues_count'), get('changed_issues_count')
+
+
+def _dashboard_counts(filter_name, filter_def, permanent_filters, days_open, exclusions_version, excluded_names):
+    """
+    Discrepancies dashboard widget counts (population_counts() + discrepancy_counts() keys) for
+    a resolved selection — shared by dashboard_filter_api and dashboard_export_excel:
+    1. All Servers / system permanent filters: precomputed by the analyzer for the latest
+       snapshot (see dashboard_metrics.py), as long as the exclusion list hasn't changed since.
+    2. Anything else: the per-process result LRU, computed on a miss — population from the
+       snapshot's population summary when it covers the selection (else one DISTINCT query),
+       issue counts from the in-memory snapshot store when enabled (see snapshot_store.py),
+       else one conditional-aggregation query.
+    `exclusions_version` is the request's exclusion_version(); `excluded_names` a zero-argument
+    callable returning the excluded set, only called by the branches that compare or mask on it.
+    The returned dict may be shared — don't modify it.
+    """
+    payload_key = filter_name if filter_name in permanent_filters else (ALL_SERVERS_PAYLOAD if not filter_def else None)
+    if payload_key is not None and not days_open:
+        payloads = AnalysisSnapshot.objects.order_by('-analysis_date').values_list('dashboard_payloads', flat=True).first() or {}
+        stored = payloads.get(payload_key)
+        if stored and stored.get('exclusion_fingerprint') == exclusion_fingerprint(excluded_names()):
+            return stored
+
+    def compute():
+        days_open_cutoff = timezone.now() - datetime.timedelta(days=days_open) if days_open else None
+        disc_qs, inv_eligible = filter_querysets(
+            filter_def, exclude=exclude_excluded, days_open_cutoff=days_open_cutoff,
+        )
+        counts = summary_population_counts(filter_def, excluded_names())
+        if counts is None:
+            counts = population_counts(inv_eligible)
+
+        store = get_snapshot_store()
+        store_mask = None
+        if store is not None:
+            store_mask = _store_filter_mask(store, filter_def, days_open=days_open, excluded_names=excluded_names())
+
+        if store_mask is not None:
+            alive_ko = store.exact_mask('alive_status_inconsistent', 'KO')
+            dead_ko = store.exact_mask('dead_status_inconsistent', 'KO')
+            counts.update({
+                'servers_with_missing': store.count(store_mask & store.non_empty_mask('missing_fields')),
+                'inconsistency_count': store.count(store_mask & (alive_ko | dead_ko)),
+                'alive_status_inconsistent_count': store.count(store_mask & alive_ko),
+                'dead_status_inconsistent_count': store.count(store_mask & dead_ko),
+            })
+            for field, metric_name in FIELD_TO_METRIC.items():
+                counts[metric_name] = store.count(store_mask & store.contains_mask('missing_fields', field))
+        else:
+            counts.update(discrepancy_counts(disc_qs))
+        return counts
+
+    return cached_dashboard_counts(filter_def, days_open, compute, exclusions_version=exclusions_version)
+
+
 @login_required
 def dashboard_filter_api(request):
     """
     AJAX endpoint — returns widget counts for a given permanent filter selection.
     GET ?pf=Windows  →  JSON with total_servers, total_physical, metrics{...}, filter_link_params
-    If pf is empty or 'All Servers', returns data from the latest AnalysisSnapshot.
-    Otherwise computes live counts from ServerDiscrepancy filtered by the selection.
+    (see _dashboard_filter_payload).
     """
-    FIELD_TO_METRIC = {
-        'LIVE_STATUS':       'missing_live_status_count',
-        'OSSHORTNAME':       'missing_osshortname_count',
-        'OSFAMILY':          'missing_osfamily_count',
-        'SNOW_SUPPORTGROUP': 'missing_snow_supportgroup_count',
-        'MACHINE_TYPE':      'missing_machine_type_count',
-        'MANUFACTURER':      'missing_manufacturer_count',
-        'COUNTRY':           'missing_country_count',
-        'APP_AUID_VALUE':    'missing_app_auid_value_count',
-        'APP_NAME_VALUE':    'missing_app_name_value_count',
-        'REGION':            'missing_region_count',
-        'CITY':              'missing_city_count',
-        'INFRAVERSION':      'missing_infraversion_count',
-        'IPADDRESS':         'missing_ipaddress_count',
-        'SNOW_STATUS':       'missing_snow_status_count',
-        'IDRAC_NAME':        'missing_idrac_name_count',
-        'IDRAC_IP':          'missing_idrac_ip_count',
-    }
+    return JsonResponse(_dashboard_filter_payload(request))
 
+
+def _dashboard_filter_payload(request):
+    """
+    Gauge payload for the ?pf= / ?days_open= selection of `request` — dashboard_filter_api's
+    response body, also embedded by dashboard_bootstrap_api.
+    All Servers and system permanent filters are served from the counts the analyzer stored on
+    the latest AnalysisSnapshot (dashboard_payloads); ss:/multi: selections and days_open are
+    computed live from ServerDiscrepancy filtered by the selection (see _dashboard_counts).
+    """
     filter_name = request.GET.get('pf', '').strip()
     json_data = get_field_labels()
     permanent_filters = json_data.get('permanentfilters', {})
-    fields_info = json_data.get('fields', {})
-    field_to_inputname = {fname: finfo.get('inputname', fname.lower())
-                          for fname, finfo in fields_info.items()}
-    inputname_to_field = {finfo.get('inputname', fname.lower()): fname
-                          for fname, finfo in fields_info.items()}
-    field_displayname  = {fname: finfo.get('displayname', fname)
-                          for fname, finfo in fields_info.items()}
+    field_maps = get_field_maps()
+    field_to_inputname = field_maps['field_to_inputname']
+    inputname_to_field = field_maps['inputname_to_field']
+    field_displayname  = field_maps['field_displayname']
                           
-    from inventory.models import Server as InventoryServer
-
-    # Build filter Q objects (empty for "All Servers")
     #is_filtered = filter_name and filter_name in permanent_filters
     # Fields that are dashboard metrics themselves — meaningless as population filters
     DASHBOARD_METRIC_FIELDS = {'alive_status_inconsistent', 'dead_status_inconsistent', 'missing_fields'}
@@ -684,16 +883,10 @@ def dashboard_filter_api(request):
 
     is_filtered = bool(filter_def)
         
-    disc_q = Q()
-    inv_q = Q(INFRAVERSION__in=['IV1', 'IV2', 'IBM'])
     link_parts = []
     filter_parts = []   # human-readable description pieces
     if is_filtered:
-        inv_field_names = {f.name for f in InventoryServer._meta.get_fields()}
         for field, values in filter_def.items():
-            disc_q &= construct_query(field, values)
-            if field in inv_field_names:
-                inv_q &= construct_query(field, values)
             inputname = field_to_inputname.get(field, field.lower())
             link_parts.append(f'{inputname}={",".join(values)}')
             # Build readable label: strip @ prefix, use displayname
@@ -705,32 +898,20 @@ def dashboard_filter_api(request):
         v = ','.join(str(x) for x in value) if isinstance(value, list) else str(value)
         link_parts.append(f'{key}={quote_plus(v)}')
 
-    excluded_names = set(ExcludedServer.objects.values_list('server_name', flat=True))
-
-    disc_qs = ServerDiscrepancy.objects.filter(disc_q) if disc_q else ServerDiscrepancy.objects.all()
-    if excluded_names:
-        disc_qs = disc_qs.exclude(SERVER_ID__in=excluded_names)
-
     # ── Days-open filter ─────────────────────────────────────────────────
     days_open_str = request.GET.get('days_open', '').strip()
     days_open_int = int(days_open_str) if days_open_str.isdigit() and int(days_open_str) > 0 else 0
     if days_open_int > 0:
-        cutoff = timezone.now() - datetime.timedelta(days=days_open_int)
-        active_ids = DiscrepancyTracking.objects.filter(
-            oldest_first_seen__lte=cutoff
-        ).values_list('SERVER_ID', flat=True)
-        disc_qs = disc_qs.filter(SERVER_ID__in=active_ids)
         link_parts.append(f'days_open={days_open_int}')
 
-    # ── Missing Data hero gauge ──────────────────────────────────────────
-    base_eligible_q = Q(LIVE_STATUS='ALIVE', SNOW_STATUS='OPERATIONAL', INFRAVERSION__in=['IV1', 'IV2', 'IBM'])
-    inv_eligible = InventoryServer.objects.filter(base_eligible_q & inv_q) if inv_q else InventoryServer.objects.filter(base_eligible_q)
-    if excluded_names:
-        inv_eligible = inv_eligible.exclude(SERVER_ID__in=excluded_names)
-    total_eligible = inv_eligible.values('SERVER_ID').distinct().count()
-    total_physical = inv_eligible.filter(MACHINE_TYPE='PHYSICAL').values('SERVER_ID').distinct().count()
+    counts = _dashboard_counts(
+        filter_name, filter_def, permanent_filters, days_open_int,
+        _request_exclusion_version(request), lambda: _request_excluded_names(request),
+    )
+    total_eligible = counts['total_eligible']
+    total_physical = counts['total_physical']
 
-    servers_with_missing = disc_qs.filter(missing_fields__gt='').count()
+    servers_with_missing = counts['servers_with_missing']
     servers_clean_missing = max(0, total_eligible - servers_with_missing)
     pct_missing = math.trunc((servers_clean_missing / total_eligible) * 10000) / 100 if total_eligible else 100
 
@@ -738,19 +919,15 @@ def dashboard_filter_api(request):
     # Population is total_eligible (active servers) + the inconsistencies themselves, NOT the
     # raw fleet count — same convention as AnalysisSnapshot.total_relevant_servers on the
     # History page, so correctly-decommissioned servers don't drown out the %.
-    inc_count = disc_qs.filter(
-        Q(alive_status_inconsistent='KO') | Q(dead_status_inconsistent='KO')
-    ).count()
+    inc_count = counts['inconsistency_count']
     total_all = total_eligible + inc_count
     servers_ok_inc = max(0, total_all - inc_count)
     pct_inc_ok = math.trunc((servers_ok_inc / total_all) * 10000) / 100 if total_all else 100
 
     # ── Small gauge metrics ───────────────────────────────────────────────
-    metrics = {}
-    for field, metric_name in FIELD_TO_METRIC.items():
-        metrics[metric_name] = disc_qs.filter(missing_fields__icontains=field).count()
-    metrics['alive_status_inconsistent_count'] = disc_qs.filter(alive_status_inconsistent='KO').count()
-    metrics['dead_status_inconsistent_count']  = disc_qs.filter(dead_status_inconsistent='KO').count()
+    metrics = {metric_name: counts[metric_name] for metric_name in FIELD_TO_METRIC.values()}
+    metrics['alive_status_inconsistent_count'] = counts['alive_status_inconsistent_count']
+    metrics['dead_status_inconsistent_count']  = counts['dead_status_inconsistent_count']
 
     # Metrics that are meaningless under the current filter (the filtered field can't be "missing")
     grayed_metrics = []
@@ -760,7 +937,7 @@ def dashboard_filter_api(request):
             if metric:
                 grayed_metrics.append(metric)
 
-    return JsonResponse({
+    return {
         # Missing Data gauge
         'total_eligible':        total_eligible,
         'total_physical':        total_physical,
@@ -777,6 +954,135 @@ def dashboard_filter_api(request):
         'grayed_metrics':        grayed_metrics,
         'filter_link_params':    '&'.join(link_parts),
         'filter_description':    ' & '.join(filter_parts) if filter_parts else '',
+    }
+
+
+# Recent runs panel — the scalar columns only, never the snapshot's JSON blobs.
+RECENT_RUN_FIELDS = (
+    'id', 'analysis_date', 'total_servers_analyzed', 'servers_with_issues', 'servers_clean',
+    'new_issues_count', 'resolved_issues_count', 'changed_issues_count', 'duration_seconds',
+)
+
+
+@login_required
+def dashboard_bootstrap_api(request):
+    """
+    Everything the dashboard needs after its first paint, in one response:
+    GET ?pf=...&days_open=...  →  {'snapshot', 'gauges' (= dashboard_filter_api's payload),
+    'trend' (default metric of the historic section), 'recent_runs', 'diff'}.
+
+    Cached per (selection, snapshot) through common.swr_cache: the version is the latest snapshot
+    ID + the exclusion version + the latest disc TrendPoint date, so a new run, an exclusion edit
+    or trend points landing after their snapshot (analyzers publish both in one transaction, the
+    last part only guards against writers that don't) are picked up immediately.
+    Saved-search selections are per user, so their key carries the user ID.
+    """
+    if not has_perm(request.user, 'discrepancies.access'):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+
+    snapshot_id = snapshot_version('disc')
+    if not snapshot_id:
+        return JsonResponse({'no_data': True})
+
+    latest_point = TrendPoint.objects.filter(source=TrendPoint.SOURCE_DISC).aggregate(latest=models.Max('analysis_date'))['latest']
+    trend_version = latest_point.isoformat() if latest_point else ''
+
+    filter_name = request.GET.get('pf', '').strip()
+    days_open = request.GET.get('days_open', '').strip()
+    key = f"{filter_name}|{days_open}"
+    if filter_name.startswith('ss:'):
+        key = f"{key}|{request.user.pk}"
+
+    def compute():
+        latest = (
+            AnalysisSnapshot.objects.filter(pk=snapshot_id).values(
+                'id', 'analysis_date', 'diff_summary', 'new_issues_count', 'resolved_issues_count',
+                'changed_issues_count',
+            ).first()
+        ) or {'id': snapshot_id, 'analysis_date': None, 'diff_summary': {},
+              'new_issues_count': 0, 'resolved_issues_count': 0, 'changed_issues_count': 0}
+
+        historic_config = get_dashboard_config()['dashboard'].get('historic_section', {})
+        trend = None
+        if historic_config.get('enabled', False):
+            metric = historic_config.get('default_metric', 'servers_with_issues')
+            data = _disc_trend_series(metric, historic_config.get('days', 30))
+            trend = {'labels': data['labels'], 'values': data['values'], 'metric': metric}
+
+        return {
+            'snapshot': {'id': latest['id'], 'analysis_date': latest['analysis_date']},
+            'gauges': _dashboard_filter_payload(request),
+            'trend': trend,
+            'recent_runs': list(AnalysisSnapshot.objects.order_by('-analysis_date').values(*RECENT_RUN_FIELDS)[:10]),
+            'diff': _diff_display(latest['diff_summary'], _diff_totals(latest)),
+        }
+
+    payload = get_or_compute(
+        'dashboard_bootstrap', key, compute, version=f"{snapshot_id}.{_request_exclusion_version(request)}.{trend_version}",
+        # days_open gauges follow the clock, not the snapshot (see dashboard_metrics.py)
+        timeout=DAYS_OPEN_RESULT_MAX_AGE if days_open else 3600, serve_previous_version=False,
+    )
+    return JsonResponse(payload)
+
+
+DIFF_PAGE_MAX = 1000
+
+
+@login_required
+def snapshot_diff_api(request):
+    """
+    One page of an AnalysisSnapshot's diff vs the previous run — what the dashboard's
+    "+N more" links load instead of the whole diff travelling with every snapshot read.
+    GET ?kind=new|resolved|changed&offset=0&limit=100[&snapshot=<id>, default latest]
+    →  {'snapshot', 'kind', 'total', 'offset', 'limit', 'items'}; items are SERVER_IDs, or
+    {'SERVER_ID', 'added', 'removed'} dicts for 'changed'. Ordered by SERVER_ID.
+    """
+    if not has_perm(request.user, 'discrepancies.access'):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+
+    kind = request.GET.get('kind', '')
+    if kind not in (AnalysisSnapshotDiffEntry.KIND_NEW, AnalysisSnapshotDiffEntry.KIND_RESOLVED, AnalysisSnapshotDiffEntry.KIND_CHANGED):
+        return JsonResponse({'error': 'kind must be new, resolved or changed'}, status=400)
+    try:
+        offset = max(0, int(request.GET.get('offset', 0)))
+        limit = min(DIFF_PAGE_MAX, max(1, int(request.GET.get('limit', 100))))
+        snapshot_id = int(request.GET.get('snapshot') or snapshot_version('disc'))
+    except ValueError:
+        return JsonResponse({'error': 'offset, limit and snapshot must be integers'}, status=400)
+
+    snapshot = AnalysisSnapshot.objects.filter(pk=snapshot_id).values(
+        'diff_summary', 'new_issues_count', 'resolved_issues_count', 'changed_issues_count',
+    ).first()
+    if snapshot is None:
+        return JsonResponse({'error': 'snapshot not found'}, status=404)
+
+    raw_diff = snapshot['diff_summary'] or {}
+    if raw_diff.get('paged'):
+        total = snapshot[f'{kind}_issues_count']
+        entries = (
+            AnalysisSnapshotDiffEntry.objects.filter(snapshot_id=snapshot_id, kind=kind)
+            .order_by('SERVER_ID')[offset:offset + limit]
+        )
+        if kind == AnalysisSnapshotDiffEntry.KIND_CHANGED:
+            items = list(entries.values('SERVER_ID', 'added', 'removed'))
+        else:
+            items = list(entries.values_list('SERVER_ID', flat=True))
+    else:
+        # Snapshot written before AnalysisSnapshotDiffEntry: the full diff is still inline.
+        if kind == AnalysisSnapshotDiffEntry.KIND_CHANGED:
+            changed = sorted(raw_diff.get('changed', {}).items())
+            total = len(changed)
+            items = [
+                {'SERVER_ID': sid, 'added': change.get('added', []), 'removed': change.get('removed', [])}
+                for sid, change in changed[offset:offset + limit]
+            ]
+        else:
+            values = sorted(raw_diff.get(kind, []))
+            total = len(values)
+            items = values[offset:offset + limit]
+
+    return JsonResponse({
+        'snapshot': snapshot_id, 'kind': kind, 'total': total, 'offset': offset, 'limit': limit, 'items': items,
     })
 
 
@@ -846,6 +1152,16 @@ def _pamela_tracker_map(server_ids):
     return {t.SERVER_ID: t for t in PamelaDiscrepancyTracking.objects.filter(SERVER_ID__in=server_ids)}
 
 
+def _disc_trend_series(metric, days):
+    # {'labels', 'values'} for an AnalysisSnapshot metric — from the TrendPoint series (see
+    # trend_series.py), or get_trend_data() for a metric the analyzer doesn't record.
+    series = trend_series('disc', metric, days)
+    if series is not None:
+        return series
+    data = get_trend_data(metric, days)
+    return {'labels': data['dates'], 'values': data['values']}
+
+
 def _get_pamela_trend_data(metric='any_missing', days=30):
     # Mirrors get_trend_data() (AnalysisSnapshot-based) for the Pamela source: one point per
     # analyze_pamela_discrepancies run (PamelaAnalysisSnapshot), not per ServerDiscrepancyPamela
@@ -853,15 +1169,21 @@ def _get_pamela_trend_data(metric='any_missing', days=30):
     # it has no history of its own to group by date. Raw server COUNT, not a percentage —
     # 'any_missing' = servers with at least one tool missing at that run, a tool code
     # (AD/ADDM/SA/LA/EPO/CA) = servers missing that specific tool.
+    # Served from the TrendPoint series when the analyzer has recorded this metric (see
+    # trend_series.py); the snapshot scan below only runs for metrics it never recorded.
+    series = trend_series('pamela', metric, days)
+    if series is not None:
+        return series
+
     snapshots = PamelaAnalysisSnapshot.objects.order_by('analysis_date')
     if days is not None:
         cutoff = timezone.now() - datetime.timedelta(days=days)
         snapshots = snapshots.filter(analysis_date__gte=cutoff)
 
     labels, values = [], []
-    for snap in snapshots:
-        value = snap.servers_with_any_missing if metric == 'any_missing' else snap.tool_counts.get(metric, 0)
-        labels.append(snap.analysis_date.strftime('%d %b'))
+    for snap in snapshots.values('analysis_date', 'servers_with_any_missing', 'tool_counts'):
+        value = snap['servers_with_any_missing'] if metric == 'any_missing' else snap['tool_counts'].get(metric, 0)
+        labels.append(snap['analysis_date'].strftime('%d %b'))
         values.append(value)
     return {'labels': labels, 'values': values}
 
@@ -880,61 +1202,111 @@ def pamela_trend_api_view(request):
     return JsonResponse({'labels': data['labels'], 'values': data['values'], 'metric': metric})
 
 
+def _pamela_tool_counts(server_qs):
+    # (servers_with_any_missing, {tool: servers missing it}) for a scoped ServerDiscrepancyPamela
+    # queryset: one COUNT + one GROUP BY tool over ServerDiscrepancyPamelaTool — exact tool
+    # codes, unlike missing_fields__icontains(tool) ("ADDM" contains "AD" as a substring, so a
+    # naive icontains would double-count AD rows as ADDM matches).
+    servers_with_any_missing = server_qs.exclude(missing_fields='').count()
+    if servers_with_any_missing and not ServerDiscrepancyPamelaTool.objects.exists():
+        # Rows synced before the per-tool table existed — split-and-count in Python until the
+        # next analyze_pamela_discrepancies run fills it.
+        tool_counts = Counter()
+        for missing_fields in server_qs.values_list('missing_fields', flat=True):
+            tool_counts.update(t for t in missing_fields.split(',') if t)
+        return servers_with_any_missing, dict(tool_counts)
+    tool_counts = dict(
+        ServerDiscrepancyPamelaTool.objects.filter(server__in=server_qs)
+        .values_list('tool').annotate(servers=Count('pk')).order_by()
+    )
+    return servers_with_any_missing, tool_counts
+
+
+def _pamela_scope_params(request):
+    # (os_bucket, region, days_open_param) as the three PAMELA dashboard paths read them.
+    return (
+        request.GET.get('os', '').strip(),
+        request.GET.get('region', '').strip(),
+        request.GET.get('days_open', '').strip(),
+    )
+
+
+def _pamela_scope_counts(os_bucket, region, days_open_param):
+    """
+    {'latest_date', 'population', 'servers_with_any_missing', 'tool_counts'} for one
+    OS bucket / region / days_open scope of the PAMELA dashboard, or None before the first
+    DailyPamelaDBSummary import. Shared by pamela_dashboard_view, pamela_dashboard_filter_api
+    and pamela_dashboard_export_excel, which each used to rebuild the same scoped querysets
+    and rerun the same aggregates. Computed once per scope through common.swr_cache, versioned
+    by the summary date, the latest PamelaAnalysisSnapshot and breakdown_groups.json's version,
+    so an import, an analysis run or a bucket edit is picked up at once. days_open scopes
+    follow the clock rather than the data, so they keep DAYS_OPEN_RESULT_MAX_AGE as timeout.
+
+    Same asymmetry everywhere: days_open filters the server-level numerator
+    (servers_with_any_missing/tool_counts) but NOT the population denominator
+    (DailyPamelaDBSummary is pre-aggregated, not server-level, so individual servers can't
+    be subtracted from it).
+    """
+    latest_date = DailyPamelaDBSummary.objects.aggregate(models.Max('snapshot_date'))['snapshot_date__max']
+    if latest_date is None:
+        return None
+    min_days = int(days_open_param) if days_open_param.isdigit() else 0
+
+    def compute():
+        pamela_config = _pamela_config()
+        pop_qs = DailyPamelaDBSummary.objects.filter(snapshot_date=latest_date, report_type__iexact='allserver')
+        # ServerDiscrepancyPamela is current-state (no date dimension of its own, see its
+        # docstring) — only the population side stays scoped to DailyPamelaDBSummary's own date.
+        server_qs = ServerDiscrepancyPamela.objects.all()
+        if region:
+            pop_qs = pop_qs.filter(area__iexact=region)
+            server_qs = server_qs.filter(area__iexact=region)
+        if os_bucket:
+            pop_qs = _pamela_bucket_filter(pop_qs, os_bucket, pamela_config)
+            server_qs = _pamela_bucket_filter(server_qs, os_bucket, pamela_config)
+        if min_days:
+            cutoff = timezone.now() - datetime.timedelta(days=min_days)
+            matching_ids = PamelaDiscrepancyTracking.objects.filter(
+                oldest_first_seen__lte=cutoff
+            ).values_list('SERVER_ID', flat=True)
+            server_qs = server_qs.filter(SERVER_ID__in=matching_ids)
+
+        servers_with_any_missing, tool_counts = _pamela_tool_counts(server_qs)
+        return {
+            'latest_date': latest_date,
+            'population': pop_qs.aggregate(total=models.Sum('total_count'))['total'] or 0,
+            'servers_with_any_missing': servers_with_any_missing,
+            'tool_counts': tool_counts,
+        }
+
+    # region is matched with iexact, os_bucket by exact bucket name (see _pamela_bucket_filter)
+    key = f"{os_bucket}|{region.upper()}|{min_days}"
+    version = f"{latest_date}.{snapshot_version('pamela')}.{config_version('breakdown_groups.json')}"
+    return get_or_compute(
+        'pamela_dashboard_scope', key, compute, version=version,
+        timeout=DAYS_OPEN_RESULT_MAX_AGE if min_days else 3600, serve_previous_version=False,
+    )
+
+
 @login_required
 def pamela_dashboard_filter_api(request):
     """
     AJAX endpoint backing the Pamela dashboard's pf-bar (Region/OS dropdowns + Days Open
     widget) — mirrors dashboard_filter_api, scoped to the 7 Pamela gauges instead of the
     classic dashboard's hero+small gauge set. Same asymmetry as dashboard_filter_api's own
-    days_open handling: days_open filters the server-level numerator (servers_with_any_missing/
-    tool_counts) but NOT the population denominator (DailyPamelaDBSummary is pre-aggregated,
-    not server-level, so individual servers can't be subtracted from it).
+    days_open handling (see _pamela_scope_counts).
     """
     if not has_perm(request.user, 'discrepancies.access'):
         return JsonResponse({'error': 'forbidden'}, status=403)
 
-    latest_date = DailyPamelaDBSummary.objects.aggregate(models.Max('snapshot_date'))['snapshot_date__max']
-    if latest_date is None:
+    scope = _pamela_scope_counts(*_pamela_scope_params(request))
+    if scope is None:
         return JsonResponse({'population': 0, 'servers_with_any_missing': 0, 'tool_counts': {}})
 
-    pamela_config = _pamela_config()
-    os_bucket = request.GET.get('os', '').strip()
-    region = request.GET.get('region', '').strip()
-    days_open_param = request.GET.get('days_open', '').strip()
-
-    pop_qs = DailyPamelaDBSummary.objects.filter(snapshot_date=latest_date, report_type__iexact='allserver')
-    # ServerDiscrepancyPamela is current-state (no date dimension of its own, see its
-    # docstring) — only the population side stays scoped to DailyPamelaDBSummary's own date.
-    server_qs = ServerDiscrepancyPamela.objects.all()
-    if region:
-        pop_qs = pop_qs.filter(area__iexact=region)
-        server_qs = server_qs.filter(area__iexact=region)
-    if os_bucket:
-        pop_qs = _pamela_bucket_filter(pop_qs, os_bucket, pamela_config)
-        server_qs = _pamela_bucket_filter(server_qs, os_bucket, pamela_config)
-
-    population = pop_qs.aggregate(total=models.Sum('total_count'))['total'] or 0
-
-    if days_open_param.isdigit() and int(days_open_param) > 0:
-        min_days = int(days_open_param)
-        cutoff = timezone.now() - datetime.timedelta(days=min_days)
-        matching_ids = PamelaDiscrepancyTracking.objects.filter(
-            oldest_first_seen__lte=cutoff
-        ).values_list('SERVER_ID', flat=True)
-        server_qs = server_qs.filter(SERVER_ID__in=matching_ids)
-
-    tool_counts = Counter()
-    servers_with_any_missing = 0
-    for missing_fields in server_qs.values_list('missing_fields', flat=True):
-        tools = [t for t in missing_fields.split(',') if t]
-        if tools:
-            servers_with_any_missing += 1
-        tool_counts.update(tools)
-
     return JsonResponse({
-        'population': population,
-        'servers_with_any_missing': servers_with_any_missing,
-        'tool_counts': dict(tool_counts),
+        'population': scope['population'],
+        'servers_with_any_missing': scope['servers_with_any_missing'],
+        'tool_counts': scope['tool_counts'],
     })
 
 
@@ -953,15 +1325,14 @@ def pamela_dashboard_view(request):
     if not has_perm(request.user, 'discrepancies.access'):
         return render(request, 'accessrights/denied.html', status=403)
 
-    config_path = os.path.join(os.path.dirname(__file__), 'pamela_dashboard.json')
-    with open(config_path, 'r') as f:
-        config = json.load(f)
+    config = get_pamela_dashboard_config()
 
     # "No data" means "nothing imported yet", not "zero issues right now" — a ServerDiscrepancyPamela
     # empty table is the best-case outcome (100% coverage) and must still render normally, so the
     # gate is DailyPamelaDBSummary's own presence (the population side), not ServerDiscrepancyPamela's.
-    latest_date = DailyPamelaDBSummary.objects.aggregate(models.Max('snapshot_date'))['snapshot_date__max']
-    if latest_date is None:
+    os_bucket, region, days_open_param = _pamela_scope_params(request)
+    scope = _pamela_scope_counts(os_bucket, region, days_open_param)
+    if scope is None:
         context = {
             'title': config['dashboard']['title'],
             'appname': app_name,
@@ -970,42 +1341,10 @@ def pamela_dashboard_view(request):
         return render(request, 'discrepancies/pamela_dashboard.html', context)
 
     pamela_config = _pamela_config()
-    os_bucket = request.GET.get('os', '').strip()
-    region = request.GET.get('region', '').strip()
-    days_open_param = request.GET.get('days_open', '').strip()
-
-    pop_qs = DailyPamelaDBSummary.objects.filter(snapshot_date=latest_date, report_type__iexact='allserver')
-    # ServerDiscrepancyPamela is current-state (no date dimension of its own, see its
-    # docstring) — only the population side stays scoped to DailyPamelaDBSummary's own date.
-    server_qs = ServerDiscrepancyPamela.objects.all()
-    if region:
-        pop_qs = pop_qs.filter(area__iexact=region)
-        server_qs = server_qs.filter(area__iexact=region)
-    if os_bucket:
-        pop_qs = _pamela_bucket_filter(pop_qs, os_bucket, pamela_config)
-        server_qs = _pamela_bucket_filter(server_qs, os_bucket, pamela_config)
-
-    # Same asymmetry as pamela_dashboard_filter_api: filters the server-level numerator, not
-    # the pre-aggregated population denominator (see that view's docstring).
-    if days_open_param.isdigit() and int(days_open_param) > 0:
-        min_days = int(days_open_param)
-        cutoff = timezone.now() - datetime.timedelta(days=min_days)
-        matching_ids = PamelaDiscrepancyTracking.objects.filter(
-            oldest_first_seen__lte=cutoff
-        ).values_list('SERVER_ID', flat=True)
-        server_qs = server_qs.filter(SERVER_ID__in=matching_ids)
-
-    population = pop_qs.aggregate(total=models.Sum('total_count'))['total'] or 0
-
-    # Split-and-count in Python rather than missing_fields__icontains(tool): "ADDM" contains
-    # "AD" as a substring, so a naive icontains would double-count AD rows as ADDM matches.
-    tool_counts = Counter()
-    servers_with_any_missing = 0
-    for missing_fields in server_qs.values_list('missing_fields', flat=True):
-        tools = [t for t in missing_fields.split(',') if t]
-        if tools:
-            servers_with_any_missing += 1
-        tool_counts.update(tools)
+    latest_date = scope['latest_date']
+    population = scope['population']
+    servers_with_any_missing = scope['servers_with_any_missing']
+    tool_counts = scope['tool_counts']
 
     widgets_data = []
     for widget in config['dashboard']['widgets']:
@@ -1097,43 +1436,15 @@ def pamela_dashboard_export_excel(request):
     from openpyxl import Workbook
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
-    config_path = os.path.join(os.path.dirname(__file__), 'pamela_dashboard.json')
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-
-    latest_date = DailyPamelaDBSummary.objects.aggregate(models.Max('snapshot_date'))['snapshot_date__max']
-    pamela_config = _pamela_config()
-    os_bucket = request.GET.get('os', '').strip()
-    region = request.GET.get('region', '').strip()
-    days_open_param = request.GET.get('days_open', '').strip()
-
-    pop_qs = (
-        DailyPamelaDBSummary.objects.filter(snapshot_date=latest_date, report_type__iexact='allserver')
-        if latest_date else DailyPamelaDBSummary.objects.none()
-    )
-    server_qs = ServerDiscrepancyPamela.objects.all()
-    if region:
-        pop_qs = pop_qs.filter(area__iexact=region)
-        server_qs = server_qs.filter(area__iexact=region)
-    if os_bucket:
-        pop_qs = _pamela_bucket_filter(pop_qs, os_bucket, pamela_config)
-        server_qs = _pamela_bucket_filter(server_qs, os_bucket, pamela_config)
-    if days_open_param.isdigit() and int(days_open_param) > 0:
-        cutoff = timezone.now() - datetime.timedelta(days=int(days_open_param))
-        matching_ids = PamelaDiscrepancyTracking.objects.filter(
-            oldest_first_seen__lte=cutoff
-        ).values_list('SERVER_ID', flat=True)
-        server_qs = server_qs.filter(SERVER_ID__in=matching_ids)
-
-    population = pop_qs.aggregate(total=models.Sum('total_count'))['total'] or 0
+    config = get_pamela_dashboard_config()
 
-    tool_counts = Counter()
-    servers_with_any_missing = 0
-    for missing_fields in server_qs.values_list('missing_fields', flat=True):
-        tools = [t for t in missing_fields.split(',') if t]
-        if tools:
-            servers_with_any_missing += 1
-        tool_counts.update(tools)
+    os_bucket, region, days_open_param = _pamela_scope_params(request)
+    scope = _pamela_scope_counts(os_bucket, region, days_open_param) or {
+        'population': 0, 'servers_with_any_missing': 0, 'tool_counts': {},
+    }
+    population = scope['population']
+    servers_with_any_missing = scope['servers_with_any_missing']
+    tool_counts = scope['tool_counts']
 
     rows = []
     for widget in config['dashboard']['widgets']:
@@ -1235,45 +1546,14 @@ def pamela_dashboard_export_excel(request):
     return response
 
 
-_field_labels_pamela_cache = None
-_field_labels_pamela_file_mtime = 0
-
 PAMELA_SAVED_SEARCH_VIEW = 'discrepancies_pamela'
 
 
 def get_field_labels_pamela():
-    # field_labels_pamela.json equivalent of get_field_labels() — separate cache vars/file so
-    # the two never collide (a shared cache dict keyed only by field name would otherwise mix
-    # Discrepancies' and Pamela's listbox values for any same-named field).
-    global _field_labels_pamela_cache, _field_labels_pamela_file_mtime
-
-    json_path = os.path.join(os.path.dirname(__file__), 'field_labels_pamela.json')
-
-    try:
-        current_file_mtime = os.path.getmtime(json_path)
-    except OSError:
-        return _field_labels_pamela_cache
-
-    if _field_labels_pamela_cache is not None and current_file_mtime == _field_labels_pamela_file_mtime:
-        return _field_labels_pamela_cache
-
-    with _cache_lock:
-        try:
-            current_file_mtime = os.path.getmtime(json_path)
-        except OSError:
-            return _field_labels_pamela_cache
-
-        if _field_labels_pamela_cache is not None and current_file_mtime == _field_labels_pamela_file_mtime:
-            return _field_labels_pamela_cache
-
-        try:
-            with open(json_path, 'r', encoding="utf-8") as f:
-                _field_labels_pamela_cache = json.load(f)
-            _field_labels_pamela_file_mtime = current_file_mtime
-        except (OSError, json.JSONDecodeError):
-            return _field_labels_pamela_cache
-
-    return _field_labels_pamela_cache
+    # field_labels_pamela.json equivalent of get_field_labels() — its own config_registry entry,
+    # so the two never collide (a shared cache dict keyed only by field name would otherwise
+    # mix Discrepancies' and Pamela's listbox values for any same-named field).
+    return load_config('field_labels_pamela.json')
 
 
 def _pamela_base_qs():
@@ -1315,15 +1595,15 @@ def _pamela_missing_tools_query(values):
 
 
 @login_required
-def pamela_server_view(request):
+def pamela_server_view(request, fragment=False):
     """
     Servers Pamela — clone of server_view/servers.html (filter sidebar, listboxes, saved
     searches, annotations, exports, drag/resize columns — servers.js/filter.js/
     annotation-manager.js are reused completely unmodified, they don't hardcode the
     Discrepancies model or URLs) pointed at ServerDiscrepancyPamela + field_labels_pamela.json
     instead of ServerDiscrepancy + field_labels.json. Real adaptations, not just find/replace:
-      - listbox cache keys prefixed listbox_pamela_ (server_view's are listbox_disc_) so the
-        two views' per-field distinct-value caches never collide on a shared field name.
+      - listbox values read from PamelaAnalysisSnapshot's published index (server_view's from
+        AnalysisSnapshot's, see listbox_index.py) so the two never mix on a shared field name.
       - missing_fields exposed as "missing_tools" — see _pamela_base_qs().
       - days_open/tracker tooltip data comes from PamelaDiscrepancyTracking (maintained by
         analyze_pamela_discrepancies) via compute_days_open — same as server_view/DiscrepancyTracking.
@@ -1391,16 +1671,14 @@ def pamela_server_view(request):
         ).values('oldest_first_seen')[:1]
         all_servers = all_servers.annotate(oldest_issue=Subquery(oldest))
         # Invert: asc days_open = fewest days first = newest oldest_first_seen first
-        order_expr = F('oldest_issue').desc(nulls_last=True) if sort_order == 'asc' else F('oldest_issue').asc(nulls_last=True)
-        filtered_servers = all_servers.order_by(order_expr)
+        sort_column, sort_descending = 'oldest_issue', sort_order == 'asc'
     elif sort_field == 'ANNOTATION':
-        filtered_servers = all_servers.order_by(F('SERVER_ID').asc(nulls_last=True))
+        sort_column, sort_descending = 'SERVER_ID', False
     else:
         valid_sort_fields = {f_key for f_key in json_data.get('fields', {}).keys() if f_key not in ('days_open', 'ANNOTATION')}
         if sort_field not in valid_sort_fields:
             sort_field = 'SERVER_ID'
-        order_expr = F(sort_field).asc(nulls_last=True) if sort_order == 'asc' else F(sort_field).desc(nulls_last=True)
-        filtered_servers = all_servers.order_by(order_expr)
+        sort_column, sort_descending = sort_field, sort_order != 'asc'
 
     page_size = int(request.GET.get('page_size', 50))
 
@@ -1411,32 +1689,12 @@ def pamela_server_view(request):
     finalfields = [(field, info) for field, info in json_data_fields.items()]
 
     table_fields = []
-    cacheset = False
+    listbox_values, cacheset = get_listbox_values('pamela', listbox_fields(json_data_fields))
     for key, val in finalfields:
         listbox_value = val.get("listbox", '')
         listempty_value = val.get("listempty", '')
         if listbox_value:
-            cache_key = f"listbox_pamela_{key}"
-            listbox_evaluated = cache.get(cache_key)
-            if listbox_evaluated is None:
-                if listempty_value == "True":
-                    listbox_evaluated = ['MISSING']
-                else:
-                    listbox_evaluated = _pamela_base_qs().values_list(key, flat=True).distinct().order_by(key)
-
-                if listbox_evaluated:
-                    listbox_evaluated = list(listbox_evaluated)
-                    if any(x is None or (isinstance(x, str) and x.upper() == "EMPTY") for x in listbox_evaluated):
-                        has_na = any(isinstance(x, str) and x.upper() == "EMPTY" for x in listbox_evaluated)
-                        listbox_evaluated = [
-                            x for x in listbox_evaluated if x is not None and x != "" and x.upper() != "EMPTY"
-                        ]
-                        listbox_evaluated.sort()
-                        if has_na:
-                            listbox_evaluated.append("EMPTY")
-
-                cache.set(cache_key, listbox_evaluated, timeout=3600)
-                cacheset = True
+            listbox_evaluated = ['MISSING'] if listempty_value == "True" else listbox_values[key]
         else:
             listbox_evaluated = ''
 
@@ -1484,8 +1742,17 @@ def pamela_server_view(request):
             'is_hostname': field_name == 'SERVER_ID'
         })
 
-    paginator = Paginator(filtered_servers, page_size)
-    page_obj_raw = paginator.get_page(request.GET.get('page'))
+    # Keyset pagination; only a bookmarked ?page=N URL still takes one offset page, whose links
+    # lead back onto cursors — see _keyset_paginate().
+    total_servers_stat = _cached_queryset_count(all_servers, f"pamela{snapshot_version('pamela')}")
+    if request.GET.get('page'):
+        page_obj_raw = _offset_page(
+            all_servers, sort_column, sort_descending, page_size, request.GET.get('page'), total_servers_stat,
+        )
+    else:
+        page_obj_raw = _keyset_paginate(
+            all_servers, sort_column, sort_descending, page_size, request.GET.get('cursor', ''), total_servers_stat,
+        )
     current_page_servers = list(page_obj_raw)
 
     for server in current_page_servers:
@@ -1510,8 +1777,7 @@ def pamela_server_view(request):
     for server_group in display_servers:
         server_group['annotation'] = annotations_dict.get(server_group['hostname'])
 
-    page_obj = create_page_wrapper(display_servers, page_obj_raw)
-    total_servers_stat = paginator.count
+    page_obj = page_obj_raw.with_objects(display_servers)
 
     saved_searches = SavedSearch.objects.filter(
         user_profile__user=request.user, view=PAMELA_SAVED_SEARCH_VIEW
@@ -1524,7 +1790,7 @@ def pamela_server_view(request):
         'appname': app_name,
         'page_size': page_size,
         'current_filters': filters,
-        'json_data': json.dumps(json_data),
+        'json_data': json.dumps(json_data) if not fragment else '',
         'last_status': last_status,
         'loggedonuser': request.user,
         'model_fields': model_fields,
@@ -1537,9 +1803,71 @@ def pamela_server_view(request):
         'saved_searches': saved_searches,
     }
 
+    if fragment:
+        return render(request, f'{app_name}/servers_fragment.html', context)
     return render(request, f'{app_name}/pamela_servers.html', context)
 
 
+# ── Table fragments ───────────────────────────────────────────────────────
+# GET servers/fragment/?<same params as servers/> returns just the table body + pagination
+# (servers_fragment.html) for that filter, rendered by the page view itself (fragment=True), so
+# the two can never disagree. Conditional on ETag/Last-Modified: everything a fragment's HTML
+# depends on between two requests with the same query string is the snapshot (rows), the
+# latest annotation change (comment column), the exclusion list (disc only), the field_labels
+# JSON (columns) and the current date (days_open ages and ?days_open=N cutoffs are relative to
+# today, so they change overnight without a new snapshot) — a request whose If-None-Match / If-Modified-Since still match
+# gets a bodiless 304 without a single row being queried. Private + no-cache: the browser keeps
+# it, but revalidates every time, and shared proxies don't (login-protected content).
+
+def _fragment_validators(request, source):
+    # (etag, last_modified datetime) for `source` ('disc'/'pamela') — memoized on the request.
+    def compute():
+        snapshot = SNAPSHOT_MODELS[source].objects.order_by('-analysis_date').values_list('pk', 'analysis_date').first()
+        snapshot_id, snapshot_date = snapshot if snapshot else (0, None)
+        annotation_changed = DiscrepancyAnnotation.objects.aggregate(latest=models.Max('updated_at'))['latest']
+        labels_mtime = config_version('field_labels.json' if source == 'disc' else 'field_labels_pamela.json')
+        today = timezone.localdate()
+        parts = [
+            source, snapshot_id, annotation_changed.isoformat() if annotation_changed else '',
+            _request_exclusion_version(request) if source == 'disc' else '', labels_mtime, today.isoformat(),
+            request.GET.urlencode(),
+        ]
+        etag = hashlib.md5('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+        # Never earlier than the start of today: a copy from yesterday has yesterday's days_open.
+        start_of_today = timezone.make_aware(datetime.datetime.combine(today, datetime.time.min))
+        last_modified = max(d for d in (snapshot_date, annotation_changed, start_of_today) if d is not None)
+        return etag, last_modified
+    return _request_memo(request, f'fragment_validators_{source}', compute)
+
+
+def _conditional_fragment(request, source, render_fragment):
+    etag, last_modified = _fragment_validators(request, source)
+    etag = quote_etag(etag)
+    last_modified_ts = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if response is None:
+        response = render_fragment()
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified_ts)
+    response['Cache-Control'] = 'private, no-cache'
+    patch_vary_headers(response, ['Cookie'])
+    return response
+
+
+@login_required
+def server_table_fragment(request):
+    if not has_perm(request.user, 'discrepancies.access'):
+        return HttpResponse(status=403)
+    return _conditional_fragment(request, 'disc', lambda: server_view(request, fragment=True))
+
+
+@login_required
+def pamela_server_table_fragment(request):
+    if not has_perm(request.user, 'discrepancies.access'):
+        return HttpResponse(status=403)
+    return _conditional_fragment(request, 'pamela', lambda: pamela_server_view(request, fragment=True))
+
+
 def _get_filtered_pamela_servers_for_export(requestfilters):
     # Build a filtered ServerDiscrepancyPamela queryset from URL params dict (inputname →
     # value) — mirrors _get_filtered_servers_for_export.
@@ -1849,18 +2177,16 @@ def pamela_bulk_annotation(request):
 def _load_breakdown_groups_config():
     # discrepancies/breakdown_groups.json — same file used by analyze_discrepancies.
     # {"dimensions": [{"field", "label"}, ...], "groups": {field: {"buckets": {...}, "other_label": "..."}}}
-    path = os.path.join(os.path.dirname(__file__), 'breakdown_groups.json')
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (OSError, json.JSONDecodeError):
-        return {}
+    # Parsed once per file version (see config_registry.py) — don't modify the result.
+    return load_config('breakdown_groups.json', {})
 
 
 def _dimension_labels():
     # Ordered list of (field, label) — drives which breakdown panels the History page shows.
-    config = _load_breakdown_groups_config()
-    return [(d['field'], d.get('label', d['field'])) for d in config.get('dimensions', [])]
+    return derived(
+        'breakdown_groups.json', 'dimension_labels',
+        lambda config: [(d['field'], d.get('label', d['field'])) for d in config.get('dimensions', [])],
+    )
 
 
 def _breakdown_groups_bucket_order(bucket_field):
@@ -1868,12 +2194,13 @@ def _breakdown_groups_bucket_order(bucket_field):
     # 'MISSING' is bucket_for()'s marker for invalid/blank bucket_field values (analyze_discrepancies.py)
     # — it must be listed here or present_buckets filtering in _build_cross_matrix/_build_recap_table
     # silently drops those rows, making row/column totals not match the real population.
-    config = _load_breakdown_groups_config()
-    group_def = config.get('groups', {}).get(bucket_field, {})
-    order = list(group_def.get('buckets', {}).keys())
-    order.append(group_def.get('other_label', 'Other'))
-    order.append('MISSING')
-    return order
+    def build(config):
+        group_def = config.get('groups', {}).get(bucket_field, {})
+        order = list(group_def.get('buckets', {}).keys())
+        order.append(group_def.get('other_label', 'Other'))
+        order.append('MISSING')
+        return order
+    return derived('breakdown_groups.json', ('bucket_order', bucket_field), build)
 
 
 def _pamela_config():
@@ -1884,18 +2211,31 @@ def _pamela_config():
     return _load_breakdown_groups_config().get('pamela', {})
 
 
+def _pamela_techfamily_lookup(config):
+    # {UPPER(raw techfamily): bucket} for breakdown_groups.json "pamela.techfamily_buckets" —
+    # first bucket listing a value wins, same as the original per-bucket scan.
+    lookup = {}
+    for bucket_name, members in config.get('pamela', {}).get('techfamily_buckets', {}).items():
+        for m in members:
+            lookup.setdefault(str(m).strip().upper(), bucket_name)
+    return lookup
+
+
 def _pamela_bucket_for(techfamily, pamela_config):
     # Blank techfamily, Appliance, Hypervisor and any other raw value not listed in the config
     # all fall into "Other" alongside the rest of the recap table's non-Windows/Linux rows —
     # there's no dedicated VMWare column, Hypervisor lives in "Other" same as before.
+    # `pamela_config` is _pamela_config(); the value lookup is memoized from the same file.
     other_label = pamela_config.get('other_label', 'Other')
     if not techfamily:
         return other_label
-    value_key = str(techfamily).strip().upper()
-    for bucket_name, members in pamela_config.get('techfamily_buckets', {}).items():
-        if value_key in {str(m).strip().upper() for m in members}:
-            return bucket_name
-    return other_label
+    lookup = derived('breakdown_groups.json', 'pamela_techfamily_lookup', _pamela_techfamily_lookup)
+    return lookup.get(str(techfamily).strip().upper(), other_label)
+
+
+# select_related('snapshot') joins every AnalysisSnapshot column into each breakdown row —
+# related lookups bypass AnalysisSnapshot.objects' default defer, so skip the JSON ones here.
+SNAPSHOT_RELATED_DEFER = tuple(f'snapshot__{field}' for field in ANALYSIS_SNAPSHOT_HEAVY_FIELDS)
 
 
 def _breakdown_panels_for_metric(snapshot, metric):
@@ -1913,7 +2253,7 @@ def _breakdown_panels_for_metric(snapshot, metric):
         # global totals — without this each row would trigger its own query for it.
         rows = list(
             snapshot.breakdowns.filter(metric=metric, dimension=dimension)
-            .select_related('snapshot').order_by('dimension_value')
+            .select_related('snapshot').defer(*SNAPSHOT_RELATED_DEFER).order_by('dimension_value')
         )
         if rows:
             total_servers = sum(r.total_servers for r in rows)
@@ -2616,7 +2956,7 @@ def historic_breakdown_export(request):
         for dimension, label in _dimension_labels():
             rows = list(
                 snapshot.breakdowns.filter(metric=metric, dimension=dimension)
-                .select_related('snapshot').order_by('dimension_value')
+                .select_related('snapshot').defer(*SNAPSHOT_RELATED_DEFER).order_by('dimension_value')
             )
             if not rows:
                 continue
@@ -2744,43 +3084,239 @@ def trend_api_view(request):
     days_param = request.GET.get('days', '30')
     days = None if days_param == 'all' else int(days_param)
 
-    data = get_trend_data(metric, days)
+    data = _disc_trend_series(metric, days)
     
     return JsonResponse({
-        'labels': data['dates'],
+        'labels': data['labels'],
         'values': data['values'],
         'metric': metric
     })
 
 
-def create_page_wrapper(object_list, source_page):
-    # Create a unified page object wrapper
-    
-    class UnifiedPageObj:
-        def __init__(self, objects, source):
-            self.object_list = objects
-            self.number = source.number
-            self.paginator = source.paginator
-            
-        def __iter__(self):
-            return iter(self.object_list)
-            
-        def has_previous(self):
-            return self.number > 1
-            
-        def has_next(self):
-            return self.number < self.paginator.num_pages
-            
-        def previous_page_number(self):
-            return self.number - 1 if self.has_previous() else None
-            
-        def next_page_number(self):
-            return self.number + 1 if self.has_next() else None
-            
-        def has_other_pages(self):
-            return self.paginator.num_pages > 1
-    
-    return UnifiedPageObj(object_list, source_page)
+# Keyset (cursor) pagination for server_view / pamela_server_view. Paginator runs COUNT(*) over
+# the whole filtered queryset plus an OFFSET query on every page — the deeper the page (or with
+# sort=days_open, a correlated Subquery evaluated for every skipped row), the slower it gets.
+# Keyset pages instead continue from the last row shown: WHERE (sort_col, SERVER_ID) > (last
+# value, last SERVER_ID) ORDER BY sort_col, SERVER_ID LIMIT page_size+1, which costs the same on
+# page 1 and page 5000. SERVER_ID is the tie-breaker (one row per server in both tables), so
+# rows sharing a sort value are never skipped or repeated across pages.
+# The cursor is opaque to the client (signed, not just encoded — a tampered cursor is treated as
+# "start from the first page"), and the total count shown next to it comes from cache (see
+# _cached_queryset_count) instead of being recomputed for every page turn.
+# The page links (servers_pagination.html) only ever emit cursors, so paging never goes back to
+# OFFSET. The Last page holds the remainder (count % page_size rows), exactly like the last
+# ?page=N page, so walking back from it with "Previous" lands on the same page boundaries and
+# numbers as walking forward from page 1. A bookmarked ?page=N URL is still answered through
+# the old Paginator path (_offset_page), and its links lead back onto cursors.
+# When the snapshot store serves a request, the same cursors page over its ordered SERVER_ID
+# list (_keyset_page_of_ids), so a page turn moves between the two paths seamlessly.
+KEYSET_CURSOR_SALT = 'discrepancies.keyset'
+KEYSET_LAST = 'last'
+KEYSET_COUNT_CACHE_TIMEOUT = 300
+
+
+class KeysetPage:
+    # The page interface the templates use (number, paginator.count/num_pages,
+    # has_next/has_previous, ...) plus the cursors for the links.
+
+    class _Counts:
+        def __init__(self, count, page_size):
+            self.count = count
+            self.num_pages = max(1, math.ceil(count / page_size)) if page_size else 1
+
+    def __init__(self, object_list, number, count, page_size, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = self._Counts(count, page_size)
+        # Page numbers are carried in the cursor (the count behind num_pages may be a few
+        # minutes stale), so clamp rather than show "Page 12 of 11".
+        self.number = max(1, min(number, self.paginator.num_pages))
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.last_cursor = KEYSET_LAST
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def previous_page_number(self):
+        return self.number - 1 if self.has_previous() else None
+
+    def next_page_number(self):
+        return self.number + 1 if self.has_next() else None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def with_objects(self, object_list):
+        # The views build display rows (tracker/annotation dicts) from the fetched servers —
+        # same page, different object_list.
+        self.object_list = object_list
+        return self
+
+
+def _encode_keyset_cursor(direction, value, server_id, number):
+    kind = 'raw'
+    if isinstance(value, datetime.datetime):
+        kind, value = 'datetime', value.isoformat()
+    elif isinstance(value, datetime.date):
+        kind, value = 'date', value.isoformat()
+    return signing.dumps({'d': direction, 't': kind, 'v': value, 's': server_id, 'n': number}, salt=KEYSET_CURSOR_SALT)
+
+
+def _decode_keyset_cursor(cursor):
+    # Returns (direction, value, server_id, number), or None for a missing/invalid cursor.
+    try:
+        data = signing.loads(cursor, salt=KEYSET_CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    value = data.get('v')
+    if value is not None and data.get('t') == 'datetime':
+        value = datetime.datetime.fromisoformat(value)
+    elif value is not None and data.get('t') == 'date':
+        value = datetime.date.fromisoformat(value)
+    return data.get('d'), value, data.get('s'), data.get('n', 1)
+
+
+def _keyset_after(column, value, server_id, descending):
+    # Rows strictly after (value, server_id) in ORDER BY column [DESC] NULLS LAST, SERVER_ID.
+    if value is None:
+        return Q(**{f'{column}__isnull': True, 'SERVER_ID__gt': server_id})
+    beyond = f'{column}__lt' if descending else f'{column}__gt'
+    return Q(**{beyond: value}) | Q(**{column: value, 'SERVER_ID__gt': server_id}) | Q(**{f'{column}__isnull': True})
+
+
+def _keyset_before(column, value, server_id, descending):
+    # Rows strictly before (value, server_id) in that same order.
+    if value is None:
+        return Q(**{f'{column}__isnull': False}) | Q(**{f'{column}__isnull': True, 'SERVER_ID__lt': server_id})
+    before = f'{column}__gt' if descending else f'{column}__lt'
+    return Q(**{before: value}) | Q(**{column: value, 'SERVER_ID__lt': server_id})
+
+
+def _cached_queryset_count(queryset, version):
+    """
+    COUNT(*) of `queryset`, cached per (its SQL, data version) for KEYSET_COUNT_CACHE_TIMEOUT
+    through common.swr_cache. `version` is the latest snapshot ID, so a new analysis run
+    invalidates every cached count at once; anything changing between runs (annotations,
+    exclusions) is picked up within the timeout — the total next to the page links is allowed
+    to be a few minutes approximate (stale counts are served while one request refreshes
+    them), the rows themselves never are.
+    """
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params}'.encode('utf-8')).hexdigest()
+    return get_or_compute('keyset_count', digest, queryset.count, version=version, timeout=KEYSET_COUNT_CACHE_TIMEOUT)
+
+
+def _offset_page(queryset, column, descending, page_size, page, count):
+    # A bookmarked ?page=N page of `queryset`, counted with the same cached total as its keyset
+    # pages, returned as a KeysetPage so its links continue on cursors rather than OFFSET.
+    paginator = Paginator(queryset.order_by(*_keyset_order(column, descending)[0]), page_size)
+    paginator.count = count
+    page_obj = paginator.get_page(page)
+    rows = list(page_obj)
+    next_cursor, previous_cursor = _keyset_cursors(rows, column, page_obj.number, page_obj.has_next(), page_obj.has_previous())
+    return KeysetPage(rows, page_obj.number, count, page_size, next_cursor, previous_cursor)
+
+
+def _keyset_order(column, descending):
+    # (forward, backward) ORDER BY of a keyset page: column [DESC] NULLS LAST, then SERVER_ID.
+    if descending:
+        return (
+            [F(column).desc(nulls_last=True), F('SERVER_ID').asc()],
+            [F(column).asc(nulls_first=True), F('SERVER_ID').desc()],
+        )
+    return (
+        [F(column).asc(nulls_last=True), F('SERVER_ID').asc()],
+        [F(column).desc(nulls_first=True), F('SERVER_ID').desc()],
+    )
+
+
+def _last_page_size(count, page_size):
+    # Rows on the last page — the remainder, so the Last page sits on a page boundary.
+    return count % page_size or page_size
+
+
+def _keyset_cursors(rows, column, number, has_next, has_previous):
+    # (next_cursor, previous_cursor) of a page showing `rows` (display order) as page `number`.
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        last = rows[-1]
+        next_cursor = _encode_keyset_cursor('next', getattr(last, column), last.SERVER_ID, number + 1)
+    if rows and has_previous:
+        first = rows[0]
+        previous_cursor = _encode_keyset_cursor('prev', getattr(first, column), first.SERVER_ID, number - 1)
+    return next_cursor, previous_cursor
+
+
+def _keyset_page_of_ids(server_ids, column, page_size, cursor, fetch_rows):
+    """
+    The keyset page `cursor` designates within `server_ids` — every matching SERVER_ID, already
+    in display order (the snapshot store's ordered_server_ids) — with the same cursors and
+    numbering as _keyset_paginate. `fetch_rows(page_ids)` returns the page's model instances
+    in that order. A cursor whose row is no longer in the list starts over from page 1.
+    """
+    count = len(server_ids)
+    decoded = _decode_keyset_cursor(cursor) if cursor and cursor != KEYSET_LAST else None
+    start, number = 0, 1
+    if cursor == KEYSET_LAST:
+        start, number = max(0, count - _last_page_size(count, page_size)), max(1, math.ceil(count / page_size))
+    elif decoded:
+        direction, _, server_id, cursor_number = decoded
+        try:
+            position = server_ids.index(server_id)
+        except ValueError:
+            position = None
+        if position is not None:
+            start = position + 1 if direction == 'next' else max(0, position - page_size)
+            number = cursor_number
+
+    rows = fetch_rows(server_ids[start:start + page_size])
+    next_cursor, previous_cursor = _keyset_cursors(rows, column, number, start + page_size < count, start > 0)
+    return KeysetPage(rows, number, count, page_size, next_cursor, previous_cursor)
+
+
+def _keyset_paginate(queryset, column, descending, page_size, cursor, count):
+    """
+    One keyset page of `queryset` ordered by `column` ([DESC] NULLS LAST) then SERVER_ID.
+    `cursor` is a next/previous cursor from a previous page, KEYSET_LAST, or empty for page 1.
+    Returns a KeysetPage whose object_list is the page's model instances, in display order.
+    """
+    forward, backward = _keyset_order(column, descending)
+
+    decoded = _decode_keyset_cursor(cursor) if cursor and cursor != KEYSET_LAST else None
+
+    if cursor == KEYSET_LAST or (decoded and decoded[0] == 'prev'):
+        # Walk backward from the boundary (or from the very end), then flip back into display order.
+        qs = queryset
+        size = page_size
+        if decoded:
+            _, value, server_id, number = decoded
+            qs = qs.filter(_keyset_before(column, value, server_id, descending))
+        else:
+            number = max(1, math.ceil(count / page_size))
+            size = _last_page_size(count, page_size)
+        rows = list(qs.order_by(*backward)[:size + 1])
+        has_previous = len(rows) > size
+        rows = rows[:size][::-1]
+        has_next = cursor != KEYSET_LAST
+    else:
+        qs = queryset
+        number = 1
+        if decoded:
+            _, value, server_id, number = decoded
+            qs = qs.filter(_keyset_after(column, value, server_id, descending))
+        rows = list(qs.order_by(*forward)[:page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_previous = decoded is not None
+
+    next_cursor, previous_cursor = _keyset_cursors(rows, column, number, has_next, has_previous)
+    return KeysetPage(rows, number, count, page_size, next_cursor, previous_cursor)
 
 
 def update_permanentfilter_field(request):
@@ -2863,10 +3399,7 @@ def bulk_annotation(request):
                     filters[field_key] = parsed_query.get(field_info['inputname'], [''])[0].split(',')
             filters = {k: v for k, v in filters.items() if v != ['']}
 
-            for key, value in filters.items():
-                terms = value if isinstance(value, list) else [value]
-                query = construct_query(key, terms)
-                servers_to_update = servers_to_update.filter(query)
+            servers_to_update = apply_filter_plan(servers_to_update, compile_filter_plan(filters))
 
             total_updates = servers_to_update.count()
             if total_updates == 0:
@@ -2919,17 +3452,29 @@ def chart_view(request):
     for key, value in request.GET.items():
         requestfilters[key] = value
     
-    servers = get_filtered_servers(requestfilters, permanent_filter_selection)
-
     # Virtual fields: not DB columns, computed separately
     VIRTUAL_FIELDS = {'ANNOTATION', 'days_open'}
     db_fields = [f for f in selected_fields if f not in VIRTUAL_FIELDS]
 
     fields_to_extract = ['SERVER_ID'] + db_fields
-    server_data = list(servers.values(*fields_to_extract).distinct())
+
+    # Rows straight from the in-memory snapshot store when enabled and able to serve every
+    # requested column (see snapshot_store.py), otherwise the usual filtered queryset.
+    store = get_snapshot_store()
+    store_mask = None
+    if store is not None and all(f in store.codes for f in fields_to_extract):
+        store_mask = _store_filter_mask(store, *_chart_store_filters(requestfilters))
+
+    if store_mask is not None:
+        server_data = [dict(t) for t in dict.fromkeys(
+            tuple(row.items()) for row in store.rows(store_mask, fields_to_extract)
+        )]
+    else:
+        servers = get_filtered_servers(requestfilters, permanent_filter_selection)
+        server_data = list(servers.values(*fields_to_extract).distinct())
 
     if 'ANNOTATION' in selected_fields:
-        server_ids = list(servers.values_list('SERVER_ID', flat=True).distinct())
+        server_ids = list({s['SERVER_ID'] for s in server_data})
         annotation_map = {
             ann.SERVER_ID: ann.comment
             for ann in DiscrepancyAnnotation.objects.filter(SERVER_ID__in=server_ids)
@@ -2970,12 +3515,30 @@ def chart_view(request):
     )
     
 
+def _chart_store_filters(requestfilters):
+    # get_filtered_servers()'s filters as _store_filter_mask() arguments (field terms,
+    # any_inconsistency, annotation terms, days_open, exclusions) — same parsing, same rules.
+    json_data = get_field_labels()
+    field_terms = {}
+    for field_name, field_properties in json_data['fields'].items():
+        input_name = field_properties.get('inputname')
+        value = requestfilters.get(input_name, None) if input_name else None
+        if value not in ['', None]:
+            field_terms[field_name] = value.split(',') if isinstance(value, str) and ',' in value else [value]
+    any_inc = requestfilters.get('any_inconsistency', '').strip().upper()
+    annotation_terms = [v for v in requestfilters.get('annotation', '').split(',') if v]
+    days_open_raw = requestfilters.get('days_open', '').strip()
+    excluded_names = excluded_server_names()
+    return (
+        field_terms, any_inc if any_inc == 'KO' else '', annotation_terms,
+        int(days_open_raw) if days_open_raw.isdigit() else 0, excluded_names,
+    )
+
+
 def get_filtered_servers(requestfilters, permanent_filter_selection):
     # Filters servers based on the provided criteria and applies a permanent filter if selected
     
-    json_path = os.path.join(os.path.dirname(__file__), 'field_labels.json')
-    with open(json_path, "r", encoding="utf-8") as f:
-        field_labels = json.load(f)
+    field_labels = get_field_labels()
 
     # Initialize filters dictionary
     filters = {}
@@ -2991,15 +3554,11 @@ def get_filtered_servers(requestfilters, permanent_filter_selection):
     # Remove all [''] added during the filters creation
     filters = { k: v for k, v in filters.items() if v not in ['', None] }
 
-    for key, value in filters.items():
-        if key in ('ANNOTATION', 'days_open'):
-            continue
-        if isinstance(value, str) and ',' in value:
-            terms = value.split(',')
-        else:
-            terms = [value]
-        query = construct_query(key, terms)
-        servers = servers.filter(query)
+    field_terms = {
+        key: (value.split(',') if isinstance(value, str) and ',' in value else [value])
+        for key, value in filters.items()
+    }
+    servers = apply_filter_plan(servers, compile_filter_plan(field_terms))
 
     # any_inconsistency=KO -> OR between alive and dead inconsistency (virtual param)
     any_inc = requestfilters.get('any_inconsistency', '').strip().upper()
@@ -3022,23 +3581,16 @@ def get_filtered_servers(requestfilters, permanent_filter_selection):
     days_open_raw = requestfilters.get('days_open', '').strip()
     if days_open_raw.isdigit() and int(days_open_raw) > 0:
         cutoff = timezone.now() - datetime.timedelta(days=int(days_open_raw))
-        matching_ids = DiscrepancyTracking.objects.filter(
-            oldest_first_seen__lte=cutoff
-        ).values_list('SERVER_ID', flat=True)
-        servers = servers.filter(SERVER_ID__in=matching_ids)
+        servers, since_column = _days_open_since(servers)
+        servers = servers.filter(**{f'{since_column}__lte': cutoff})
     
     # Apply the permanent filter, if selected
-    json_path=os.path.join(os.path.dirname(__file__), 'field_labels.json')
-    with open(json_path, "r", encoding="utf-8") as f:
-        json_data=json.load(f)        
-
+    #json_data = get_field_labels()
     #permanent_filter_query, permanent_filter_names, permanent_filter_attributes = create_permanent_filter_query(json_data, permanent_filter_selection)
     #if permanent_filter_query:
     #    servers = servers.filter(permanent_filter_query)
 
-    excluded_names = set(ExcludedServer.objects.values_list('server_name', flat=True))
-    if excluded_names:
-        servers = servers.exclude(SERVER_ID__in=excluded_names)
+    servers = exclude_excluded(servers)
 
     return servers
 
@@ -3046,8 +3598,7 @@ def get_filtered_servers(requestfilters, permanent_filter_selection):
 def _get_filtered_servers_for_export(requestfilters):
     # Build a filtered ServerDiscrepancy queryset from URL params dict (inputname → value)
     json_data = get_field_labels()
-    all_servers = ServerDiscrepancy.objects.all()
-    combined_filter_query = Q()
+    field_terms = {}
 
     for field_key, field_info in json_data['fields'].items():
         if field_key in ('days_open', 'ANNOTATION'):
@@ -3058,14 +3609,11 @@ def _get_filtered_servers_for_export(requestfilters):
         raw = requestfilters.get(input_name, '')
         values = [v for v in (raw.split(',') if isinstance(raw, str) else raw) if v]
         if values:
-            combined_filter_query &= construct_query(field_key, values)
+            field_terms[field_key] = values
 
-    if combined_filter_query:
-        all_servers = all_servers.filter(combined_filter_query)
+    all_servers = apply_filter_plan(ServerDiscrepancy.objects.all(), compile_filter_plan(field_terms))
         
-    excluded_names = set(ExcludedServer.objects.values_list('server_name', flat=True))
-    if excluded_names:
-        all_servers = all_servers.exclude(SERVER_ID__in=excluded_names)
+    all_servers = exclude_excluded(all_servers)
 
     # any_inconsistency=KO -> OR between alive and dead inconsistency (virtual param)
     any_inc = requestfilters.get('any_inconsistency', '').strip().upper()
@@ -3076,23 +3624,19 @@ def _get_filtered_servers_for_export(requestfilters):
 
     # days_open filter: restrict to servers with issues open for at least N days
     days_open_raw = requestfilters.get('days_open', '').strip()
-    if days_open_raw.isdigit() and int(days_open_raw) > 0:
-        cutoff = timezone.now() - datetime.timedelta(days=int(days_open_raw))
-        matching_ids = DiscrepancyTracking.objects.filter(
-            oldest_first_seen__lte=cutoff
-        ).values_list('SERVER_ID', flat=True)
-        all_servers = all_servers.filter(SERVER_ID__in=matching_ids)
-
     # Apply sort order from URL params (same logic as server_view)
     sort_field = requestfilters.get('sort', 'SERVER_ID')
     sort_order = requestfilters.get('order', 'asc')
 
+    since_column = 'oldest_first_seen'
+    if sort_field == 'days_open' or (days_open_raw.isdigit() and int(days_open_raw) > 0):
+        all_servers, since_column = _days_open_since(all_servers)
+    if days_open_raw.isdigit() and int(days_open_raw) > 0:
+        cutoff = timezone.now() - datetime.timedelta(days=int(days_open_raw))
+        all_servers = all_servers.filter(**{f'{since_column}__lte': cutoff})
+
     if sort_field == 'days_open':
-        oldest = DiscrepancyTracking.objects.filter(
-            SERVER_ID=OuterRef('SERVER_ID')
-        ).values('oldest_first_seen')[:1]
-        all_servers = all_servers.annotate(oldest_issue=Subquery(oldest))
-        order_expr = F('oldest_issue').desc(nulls_last=True) if sort_order == 'asc' else F('oldest_issue').asc(nulls_last=True)
+        order_expr = F(since_column).desc(nulls_last=True) if sort_order == 'asc' else F(since_column).asc(nulls_last=True)
     elif sort_field == 'ANNOTATION':
         order_expr = F('SERVER_ID').asc(nulls_last=True)
     else:
@@ -3357,7 +3901,6 @@ def exclusion_list_api(request):
                 exclusion_date=exclusion_date,
                 created_by=created_by,
             )
-
         return JsonResponse({
             'success'          : len(to_create) > 0,
             'created'          : len(to_create),
@@ -3514,20 +4057,12 @@ def dashboard_export_excel(request):
     from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
     from openpyxl.utils import get_column_letter
 
-    config_path = os.path.join(os.path.dirname(__file__), 'discrepancies_dashboard.json')
-    with open(config_path, 'r') as f:
-        config = json.load(f)
-
-    from inventory.models import Server as InventoryServer
+    config = get_dashboard_config()
 
     pf_name = request.GET.get('pf', '').strip()
     json_data = get_field_labels()
     permanent_filters = json_data.get('permanentfilters', {})
-    fields_info = json_data.get('fields', {})
-    inputname_to_field = {finfo.get('inputname', fname.lower()): fname
-                          for fname, finfo in fields_info.items()}
-                          
-    excluded_names = set(ExcludedServer.objects.values_list('server_name', flat=True))
+    inputname_to_field = get_field_maps()['inputname_to_field']
 
     _DASHBOARD_METRIC_FIELDS = {'alive_status_inconsistent', 'dead_status_inconsistent', 'missing_fields'}
 
@@ -3559,63 +4094,22 @@ def dashboard_export_excel(request):
                 if values:
                     filter_def[field] = values
 
-    inv_field_names = {f.name for f in InventoryServer._meta.get_fields()}
-
-    # Permanent filter Q
-    inv_q = Q(INFRAVERSION__in=['IV1', 'IV2', 'IBM'])
-    disc_q = Q()
-    for field, values in filter_def.items():
-        disc_q &= construct_query(field, values)
-        if field in inv_field_names:
-            inv_q &= construct_query(field, values)
-
-    is_filtered = bool(filter_def)
-    disc_base = ServerDiscrepancy.objects.filter(disc_q) if is_filtered else ServerDiscrepancy.objects.all()
-    if excluded_names:
-        disc_base = disc_base.exclude(SERVER_ID__in=excluded_names)
-
     days_open_str = request.GET.get('days_open', '').strip()
-    if days_open_str.isdigit() and int(days_open_str) > 0:
-        cutoff = timezone.now() - datetime.timedelta(days=int(days_open_str))
-        active_ids = DiscrepancyTracking.objects.filter(
-            oldest_first_seen__lte=cutoff
-        ).values_list('SERVER_ID', flat=True)
-        disc_base = disc_base.filter(SERVER_ID__in=active_ids)
-
-    base_eligible_q = Q(LIVE_STATUS='ALIVE', SNOW_STATUS='OPERATIONAL', INFRAVERSION__in=['IV1', 'IV2', 'IBM'])
-    inv_eligible = InventoryServer.objects.filter(base_eligible_q & inv_q) if is_filtered else InventoryServer.objects.filter(base_eligible_q)
+    days_open_int = int(days_open_str) if days_open_str.isdigit() and int(days_open_str) > 0 else 0
 
-    if excluded_names:
-        inv_eligible = inv_eligible.exclude(SERVER_ID__in=excluded_names)
-    total_eligible = inv_eligible.values('SERVER_ID').distinct().count()
-    total_physical = inv_eligible.filter(MACHINE_TYPE='PHYSICAL').values('SERVER_ID').distinct().count()
+    # Same counts (and same caches) as the dashboard itself — see _dashboard_counts.
+    counts = _dashboard_counts(
+        pf_name, filter_def, permanent_filters, days_open_int,
+        _request_exclusion_version(request), lambda: _request_excluded_names(request),
+    )
+    total_eligible = counts['total_eligible']
+    total_physical = counts['total_physical']
 
     # Population is total_eligible (active servers) + the inconsistencies themselves, NOT the
     # raw fleet count — same convention as dashboard_filter_api / AnalysisSnapshot.total_relevant_servers.
-    inc_count = disc_base.filter(
-        Q(alive_status_inconsistent='KO') | Q(dead_status_inconsistent='KO')
-    ).count()
+    inc_count = counts['inconsistency_count']
     total_all = total_eligible + inc_count
 
-    METRIC_TO_FIELD = {
-        'missing_live_status_count':       'LIVE_STATUS',
-        'missing_osshortname_count':       'OSSHORTNAME',
-        'missing_osfamily_count':          'OSFAMILY',
-        'missing_snow_supportgroup_count': 'SNOW_SUPPORTGROUP',
-        'missing_machine_type_count':      'MACHINE_TYPE',
-        'missing_manufacturer_count':      'MANUFACTURER',
-        'missing_country_count':           'COUNTRY',
-        'missing_app_auid_value_count':    'APP_AUID_VALUE',
-        'missing_app_name_value_count':    'APP_NAME_VALUE',
-        'missing_region_count':            'REGION',
-        'missing_city_count':              'CITY',
-        'missing_infraversion_count':      'INFRAVERSION',
-        'missing_ipaddress_count':         'IPADDRESS',
-        'missing_snow_status_count':       'SNOW_STATUS',
-        'missing_idrac_name_count':        'IDRAC_NAME',
-        'missing_idrac_ip_count':          'IDRAC_IP',
-    }
-
     # Build rows
     rows = []
     for widget in config['dashboard']['widgets']:
@@ -3626,19 +4120,13 @@ def dashboard_export_excel(request):
 
         if widget['size'] == 'large':
             if wid == 'missing_data':
-                issues = disc_base.filter(missing_fields__gt='').count()
+                issues = counts['servers_with_missing']
                 total  = total_eligible
             else:  # operational_inconsistencies
                 issues = inc_count
                 total = total_all
         else:
-            if metric == 'alive_status_inconsistent_count':
-                issues = disc_base.filter(alive_status_inconsistent='KO').count()
-            elif metric == 'dead_status_inconsistent_count':
-                issues = disc_base.filter(dead_status_inconsistent='KO').count()
-            else:
-                field = METRIC_TO_FIELD.get(metric)
-                issues = disc_base.filter(missing_fields__icontains=field).count() if field else 0
+            issues = counts.get(metric, 0)
             total = total_physical if physical_only else total_eligible
 
         ok  = max(0, total - issues)
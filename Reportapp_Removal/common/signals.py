@@ -5,7 +5,8 @@ from django.dispatch import receiver
 from django.conf import settings
 from django.contrib.auth import logout
 from django.core.exceptions import PermissionDenied
-from django.core.cache import cache
+
+from .swr_cache import get_or_compute
 
 
 logger = logging.getLogger(__name__)
@@ -44,10 +45,7 @@ def check_user_group(sender, request, user, **kwargs):
         logger.debug("[LDAP] %s is a local user – skipping group check.", user.username)
         return
 
-    cache_key = f"ldap_groups_{user.username.lower()}"
-    groups = cache.get(cache_key)
-
-    if groups is None:
+    def lookup_groups():
         groups = []
 
         # First attempt: primary EURO DC
@@ -69,11 +67,15 @@ def check_user_group(sender, request, user, **kwargs):
 
         if not groups:
             logger.warning("[LDAP] User %s not found in EURO or GAIA.", user.username)
-
-        # Cache for 10 minutes
-        cache.set(cache_key, groups, timeout=600)
-    else:
-        logger.debug("[LDAP] Using cached groups for %s", user.username)
+        return groups
+
+    # Cached for 10 minutes; a burst of logins for the same user (several tabs, SSO retries)
+    # does one LDAP round-trip instead of one each. No stale serving here — a removed group
+    # membership must take effect at the next lookup, not one refresh later.
+    groups = get_or_compute(
+        'ldap_groups', user.username.lower(), lookup_groups,
+        timeout=600, stale_timeout=0, serve_previous_version=False,
+    )
 
     # Required group DNs (bytes, case-sensitive match)
     req1 = settings.LDAP_REQUIRED_GROUP.encode("utf-8")
@@ -0,0 +1,138 @@
+"""
+Stampede-safe wrapper around Django's cache for expensive, shared values (listbox contents,
+filter plans, COUNT(*)s, LDAP group lookups...).
+
+A plain cache.get / compute / cache.set has two failure modes under load: when a hot key
+expires, every request that sees the miss recomputes it at the same time, and a value that
+has just been recomputed is thrown away wholesale when the data it derives from changes.
+get_or_compute() handles both:
+
+- single-flight: only the request that wins a short cache.add() lock recomputes a missing
+  value; the others wait (briefly) for it instead of running the same query alongside it.
+- stale-while-revalidate: every entry is stored with a "fresh until" time and kept in the
+  cache for stale_timeout seconds past it. A stale entry is still served immediately; only
+  the lock winner refreshes it. The same goes for the previous version of a versioned key,
+  so the first requests after a new analysis run don't all pile onto the recomputation.
+- versioned keys: `version` (e.g. the latest snapshot ID) is part of the key, so a new
+  version is a fresh key — no TTL guessing about when the underlying data changed.
+- hit/miss counters per namespace, readable through cache_stats().
+
+Works on any cache backend supporting add(), the default locmem cache included (the lock is
+then per process, which still collapses a stampede to one computation per worker).
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 3600
+DEFAULT_STALE_TIMEOUT = 600
+LOCK_TIMEOUT = 60
+# How long a request that lost the lock waits for the winner before computing itself.
+LOCK_WAIT = 5.0
+LOCK_POLL_INTERVAL = 0.05
+
+STAT_KINDS = ('hit', 'stale', 'miss', 'wait')
+_namespaces = set()
+
+
+def _key(namespace, key, version):
+    return f"swr:{namespace}:{version}:{key}"
+
+
+def _last_key(namespace, key):
+    # Unversioned pointer to the most recent entry of `key`, whatever its version — what a
+    # request can serve while the new version's first value is being computed.
+    return f"swr:{namespace}:last:{key}"
+
+
+def _count(namespace, kind):
+    _namespaces.add(namespace)
+    stat_key = f"swr:stats:{namespace}:{kind}"
+    cache.add(stat_key, 0, timeout=None)
+    try:
+        cache.incr(stat_key)
+    except ValueError:
+        # Evicted between add() and incr() — losing one count is fine.
+        pass
+
+
+def _store(namespace, key, version, value, timeout, stale_timeout):
+    entry = (value, time.time() + timeout)
+    cache.set(_key(namespace, key, version), entry, timeout=timeout + stale_timeout)
+    cache.set(_last_key(namespace, key), (version, entry), timeout=timeout + stale_timeout)
+
+
+def _recompute(namespace, key, version, compute, timeout, stale_timeout):
+    value = compute()
+    _store(namespace, key, version, value, timeout, stale_timeout)
+    return value
+
+
+def get_or_compute(
+    namespace, key, compute, version=None, timeout=DEFAULT_TIMEOUT,
+    stale_timeout=DEFAULT_STALE_TIMEOUT, serve_previous_version=True,
+):
+    """
+    Cached value of `key` in `namespace` for `version`, computing it with compute() when
+    needed (see the module docstring). compute() must return a picklable value; None is a
+    valid value and is cached like any other. Pass serve_previous_version=False for values
+    that are wrong, not just slightly old, under another version (e.g. row pks).
+    """
+    full_key = _key(namespace, key, version)
+    lock_key = f"{full_key}:lock"
+
+    entry = cache.get(full_key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until:
+            _count(namespace, 'hit')
+            return value
+        # Stale: serve it, and refresh it only if nobody else already is.
+        _count(namespace, 'stale')
+        if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            try:
+                return _recompute(namespace, key, version, compute, timeout, stale_timeout)
+            finally:
+                cache.delete(lock_key)
+        return value
+
+    _count(namespace, 'miss')
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            return _recompute(namespace, key, version, compute, timeout, stale_timeout)
+        finally:
+            cache.delete(lock_key)
+
+    # Someone else is computing this version: serve the previous version if there is one,
+    # otherwise wait for theirs.
+    last = cache.get(_last_key(namespace, key)) if serve_previous_version else None
+    if last is not None:
+        return last[1][0]
+
+    _count(namespace, 'wait')
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(full_key)
+        if entry is not None:
+            return entry[0]
+        if cache.get(lock_key) is None:
+            break
+    logger.debug("[swr_cache] %s: lock holder too slow or gone, computing anyway", full_key)
+    return _recompute(namespace, key, version, compute, timeout, stale_timeout)
+
+
+def cache_stats(namespaces=None):
+    """{namespace: {'hit': n, 'stale': n, 'miss': n, 'wait': n}} for the given namespaces
+    (default: every namespace used by this process so far)."""
+    names = sorted(namespaces if namespaces is not None else _namespaces)
+    keys = [f"swr:stats:{name}:{kind}" for name in names for kind in STAT_KINDS]
+    values = cache.get_many(keys)
+    return {
+        name: {kind: values.get(f"swr:stats:{name}:{kind}", 0) for kind in STAT_KINDS}
+        for name in names
+    }
@@ -26,6 +26,7 @@ from django.utils import timezone
 from discrepancies.models import PamelaAnalysisSnapshot, PamelaImportStatus
 from discrepancies.pamela_db_utils import get_missing_servers
 from discrepancies.pamela_sync import PAMELA_TOOL_CHOICES, write_log, sync_serverdiscrepancypamela, update_pamela_tracker
+from discrepancies.trend_series import record_trend_points
 
 
 def fetch_current_missing(target_date):
@@ -84,11 +85,12 @@ def _backfill_snapshot(target_date, current):
     replaced_count = replaced.count()
     replaced.delete()
 
-    PamelaAnalysisSnapshot.objects.create(
+    snapshot = PamelaAnalysisSnapshot.objects.create(
         analysis_date=snapshot_dt,
         servers_with_any_missing=len(current),
         tool_counts=dict(tool_counts),
     )
+    record_trend_points('pamela', [snapshot])
     write_log(
         f"Snapshot backfilled for {snapshot_date}"
         + (f" (replaced {replaced_count} existing row)" if replaced_count else "")
@@ -110,11 +112,12 @@ def _full_sync(current, sync_now):
     for data in current.values():
         tool_counts.update(data['missing'])
     PamelaAnalysisSnapshot.objects.filter(analysis_date__date=sync_now.date()).delete()
-    PamelaAnalysisSnapshot.objects.create(
+    snapshot = PamelaAnalysisSnapshot.objects.create(
         analysis_date=sync_now,
         servers_with_any_missing=len(current),
         tool_counts=dict(tool_counts),
     )
+    record_trend_points('pamela', [snapshot])
     write_log(f"Snapshot saved: {len(current)} servers with issues, tool_counts={dict(tool_counts)}")
 
 
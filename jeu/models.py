@@ -476,3 +476,51 @@ class ServerDiscrepancyPamela(models.Model):
     @property
     def missing_fields_list(self):
         return [t for t in self.missing_fields.split(',') if t]
+
+
+class PamelaIssueRun(models.Model):
+    """
+    Run-length form of ServerDiscrepancyPamela's daily history: one row per uninterrupted
+    stretch of consecutive snapshot dates during which a server was missing a given tool
+    (SERVER_ID, tool, start_date, end_date, both ends inclusive). "Since when has this been
+    missing, as of day D" is then just the start_date of the run covering D — one indexed
+    lookup, instead of walking ServerDiscrepancyPamela backward day by day per server per tool.
+
+    Derived data only, never edited by hand: maintained incrementally by
+    pamela_history.record_pamela_issue_runs() after each snapshot date is written (or on the
+    first read of a date that wasn't, see ensure_pamela_issue_runs()), and fully rebuildable
+    from ServerDiscrepancyPamela at any time with rebuild_pamela_issue_runs().
+    """
+
+    SERVER_ID = models.CharField(max_length=200)
+    tool = models.CharField(max_length=20)
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    class Meta:
+        db_table = 'discrepancies_pamelaissuerun'
+        indexes = [
+            models.Index(fields=['SERVER_ID', 'end_date']),
+            models.Index(fields=['end_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.SERVER_ID} - {self.tool} - {self.start_date} -> {self.end_date}"
+
+
+class PamelaIssueRunDate(models.Model):
+    """
+    One row per ServerDiscrepancyPamela snapshot date folded into PamelaIssueRun, with the
+    fingerprint (row count, max pk, latest created_at) that date's rows had at the time. A
+    date with no row here, or whose rows no longer match its fingerprint (re-imported since),
+    is not reflected in PamelaIssueRun yet — see pamela_history.ensure_pamela_issue_runs().
+    """
+
+    snapshot_date = models.DateField(unique=True)
+    fingerprint = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'discrepancies_pamelaissuerundate'
+
+    def __str__(self):
+        return f"{self.snapshot_date} - {self.fingerprint}"
@@ -0,0 +1,149 @@
+# pamela_history.py
+#
+# Maintains PamelaIssueRun (run-length history of ServerDiscrepancyPamela, see that model's
+# docstring) — read by views._pamela_tracker_data() for days_open / first_seen.
+#
+# Whatever writes a ServerDiscrepancyPamela snapshot date (the daily import, or
+# seed_pamela_server_discrepancies in DEV) calls record_pamela_issue_runs(that_date) once the
+# date's rows are in. Each folded date is remembered in PamelaIssueRunDate together with a
+# fingerprint of its rows, and readers call ensure_pamela_issue_runs(date) first: a date that was
+# never folded in (an import path that doesn't record yet) or was re-imported since (rows
+# deleted and re-created, so the fingerprint moved) gets folded in then, once, instead of every
+# read falling back to the live walk-back. The normal case — a new date just after the latest one already recorded —
+# only touches the runs that were open the day before (extend or close them, open new ones),
+# so the cost is one day's rows regardless of how much history has accumulated. Anything else
+# (re-importing a date that's already recorded, backfilling a past date) can change runs on
+# both sides of that date, so it falls back to rebuild_pamela_issue_runs() rather than trying
+# to splice history in place.
+
+import datetime
+
+from django.core.cache import cache
+from django.db import models, transaction
+
+from discrepancies.models import ServerDiscrepancyPamela, PamelaIssueRun, PamelaIssueRunDate
+
+# Held (cache.add) while one process folds a date in — other readers meanwhile get False from
+# ensure_pamela_issue_runs() and derive their answer live rather than fold the same date twice.
+ISSUE_RUNS_LOCK_KEY = 'pamela_issue_runs_lock'
+ISSUE_RUNS_LOCK_TIMEOUT = 600
+
+
+def _tools(missing_fields):
+    return [t for t in missing_fields.split(',') if t]
+
+
+def _fingerprint(count, max_pk, latest_created):
+    return f"{count}.{max_pk or 0}.{latest_created.isoformat() if latest_created else ''}"
+
+
+def date_fingerprint(snapshot_date):
+    # Changes whenever snapshot_date's rows are replaced (new pks / created_at) or resized.
+    agg = ServerDiscrepancyPamela.objects.filter(snapshot_date=snapshot_date).aggregate(
+        count=models.Count('pk'), max_pk=models.Max('pk'), latest=models.Max('created_at'),
+    )
+    return _fingerprint(agg['count'], agg['max_pk'], agg['latest'])
+
+
+def ensure_pamela_issue_runs(snapshot_date):
+    """
+    Makes sure PamelaIssueRun reflects snapshot_date's current rows, folding the date in if it
+    isn't recorded or its fingerprint moved (see module header). Returns False when another
+    process is folding right now — the caller can't trust PamelaIssueRun for this date yet.
+    """
+    fingerprint = date_fingerprint(snapshot_date)
+    recorded = PamelaIssueRunDate.objects.filter(snapshot_date=snapshot_date).values_list('fingerprint', flat=True).first()
+    if recorded == fingerprint:
+        return True
+    if not cache.add(ISSUE_RUNS_LOCK_KEY, 1, ISSUE_RUNS_LOCK_TIMEOUT):
+        return False
+    try:
+        record_pamela_issue_runs(snapshot_date)
+    finally:
+        cache.delete(ISSUE_RUNS_LOCK_KEY)
+    return True
+
+
+def record_pamela_issue_runs(snapshot_date):
+    """
+    Folds ServerDiscrepancyPamela's rows for snapshot_date into PamelaIssueRun. Returns
+    (extended, created) run counts — or the rebuild's count of runs when it had to fall back
+    to a full rebuild (see module header).
+    """
+    latest = PamelaIssueRun.objects.aggregate(models.Max('end_date'))['end_date__max']
+    if latest is not None and snapshot_date <= latest:
+        rebuilt = rebuild_pamela_issue_runs()
+        # The rebuild only records dates that have rows — an emptied date must be marked too
+        PamelaIssueRunDate.objects.update_or_create(
+            snapshot_date=snapshot_date, defaults={'fingerprint': date_fingerprint(snapshot_date)},
+        )
+        return rebuilt
+
+    # A run continues only across consecutive calendar days, same as the old walk-back
+    # reconstruction: a date with no snapshot at all breaks every run.
+    previous_date = snapshot_date - datetime.timedelta(days=1)
+    open_runs = {
+        (run.SERVER_ID, run.tool): run
+        for run in PamelaIssueRun.objects.filter(end_date=previous_date)
+    }
+
+    to_extend, to_create = [], []
+    rows = ServerDiscrepancyPamela.objects.filter(
+        snapshot_date=snapshot_date
+    ).exclude(missing_fields='').values_list('SERVER_ID', 'missing_fields')
+    for sid, missing_fields in rows:
+        for tool in _tools(missing_fields):
+            run = open_runs.get((sid, tool))
+            if run is not None:
+                run.end_date = snapshot_date
+                to_extend.append(run)
+            else:
+                to_create.append(PamelaIssueRun(SERVER_ID=sid, tool=tool, start_date=snapshot_date, end_date=snapshot_date))
+
+    with transaction.atomic():
+        if to_extend:
+            PamelaIssueRun.objects.bulk_update(to_extend, ['end_date'], batch_size=1000)
+        if to_create:
+            PamelaIssueRun.objects.bulk_create(to_create, batch_size=1000)
+        PamelaIssueRunDate.objects.update_or_create(
+            snapshot_date=snapshot_date, defaults={'fingerprint': date_fingerprint(snapshot_date)},
+        )
+    return len(to_extend), len(to_create)
+
+
+def rebuild_pamela_issue_runs():
+    """
+    Recomputes PamelaIssueRun from scratch out of the whole ServerDiscrepancyPamela history
+    (one chronological pass). Returns the number of runs written.
+    """
+    rows = ServerDiscrepancyPamela.objects.exclude(missing_fields='').order_by(
+        'snapshot_date'
+    ).values_list('SERVER_ID', 'snapshot_date', 'missing_fields')
+
+    open_runs, closed = {}, []
+    for sid, snapshot_date, missing_fields in rows.iterator(chunk_size=2000):
+        for tool in _tools(missing_fields):
+            key = (sid, tool)
+            run = open_runs.get(key)
+            if run is not None and run.end_date == snapshot_date - datetime.timedelta(days=1):
+                run.end_date = snapshot_date
+            else:
+                if run is not None:
+                    closed.append(run)
+                open_runs[key] = PamelaIssueRun(SERVER_ID=sid, tool=tool, start_date=snapshot_date, end_date=snapshot_date)
+    closed.extend(open_runs.values())
+
+    dates = ServerDiscrepancyPamela.objects.values('snapshot_date').annotate(
+        count=models.Count('pk'), max_pk=models.Max('pk'), latest=models.Max('created_at'),
+    )
+    recorded = [
+        PamelaIssueRunDate(snapshot_date=row['snapshot_date'], fingerprint=_fingerprint(row['count'], row['max_pk'], row['latest']))
+        for row in dates
+    ]
+
+    with transaction.atomic():
+        PamelaIssueRun.objects.all().delete()
+        PamelaIssueRun.objects.bulk_create(closed, batch_size=1000)
+        PamelaIssueRunDate.objects.all().delete()
+        PamelaIssueRunDate.objects.bulk_create(recorded, batch_size=1000)
+    return len(closed)
@@ -1,9 +1,10 @@
 from datetime import date, timedelta
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import models, transaction
 
-from discrepancies.models import ServerDiscrepancyPamela
+from discrepancies.models import PamelaIssueRun, ServerDiscrepancyPamela
+from discrepancies.pamela_history import record_pamela_issue_runs, rebuild_pamela_issue_runs
 
 # Real PAMELA per-server export sample for report_type=missing_LA (date 2026-08-13),
 # transcribed as-is: (host, techfamily, area). We don't yet have real per-server exports for
@@ -210,6 +211,15 @@ class Command(BaseCommand):
         ramp_step = max(1, total_hosts // (2 * n_days)) if n_days > 1 else 0
 
         total_created = 0
+        # Seeding only dates after everything already folded into PamelaIssueRun is the daily
+        # import's case: record each date incrementally. Anything else (overwriting recorded
+        # dates, or history that was never folded in) rebuilds the runs once at the end.
+        first_date = end_date - timedelta(days=n_days - 1)
+        latest_recorded = PamelaIssueRun.objects.aggregate(models.Max('end_date'))['end_date__max']
+        incremental = (
+            first_date > latest_recorded if latest_recorded is not None
+            else not ServerDiscrepancyPamela.objects.filter(snapshot_date__lt=first_date).exists()
+        )
         with transaction.atomic():
             for offset in range(n_days):
                 days_before_end = n_days - 1 - offset
@@ -231,7 +241,13 @@ class Command(BaseCommand):
                 ServerDiscrepancyPamela.objects.bulk_create(rows)
                 total_created += len(rows)
 
+                if incremental:
+                    record_pamela_issue_runs(snapshot_date)
+
+            if not incremental:
+                rebuild_pamela_issue_runs()
+
         self.stdout.write(self.style.SUCCESS(
             f"ServerDiscrepancyPamela reseeded for {n_days} day(s) ending {end_date}: "
-            f"{total_created} rows created"
+            f"{total_created} rows created, {PamelaIssueRun.objects.count()} PamelaIssueRun row(s)"
         ))
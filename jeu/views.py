@@ -29,12 +29,13 @@ from django.views.decorators.csrf import csrf_exempt
 
 from collections import defaultdict, Counter
 from .exports import generate_csv, generate_excel, EXPORT_DIR
+from .pamela_history import ensure_pamela_issue_runs
 from urllib.parse import urlencode, parse_qs, unquote, quote_plus
 from functools import lru_cache
 from threading import Lock
 
 from common.views import generate_charts
-from .models import AnalysisSnapshot, AnalysisSnapshotBreakdown, ServerDiscrepancy, DiscrepancyTracking, DiscrepancyAnnotation, ImportStatus, ExcludedServer, DailyPamelaDBSummary, ServerDiscrepancyPamela, safe_percentage, safe_percentage_clean
+from .models import AnalysisSnapshot, AnalysisSnapshotBreakdown, ServerDiscrepancy, DiscrepancyTracking, DiscrepancyAnnotation, ImportStatus, ExcludedServer, DailyPamelaDBSummary, ServerDiscrepancyPamela, PamelaIssueRun, safe_percentage, safe_percentage_clean
 from .utils import get_trend_data, compute_days_open
 from userapp.models import UserProfile, SavedSearch, SavedOptions, UserPermissions
 from accessrights.helpers import has_perm
@@ -841,19 +842,48 @@ def _pamela_os_bucket_techfamily_terms_map(pamela_config):
 
 def _pamela_tracker_data(server_ids, upto_date):
     """
-    Per-server, per-tool "since when has this been missing" derived live from
-    ServerDiscrepancyPamela's own daily history — same idea as DiscrepancyTracking
+    Per-server, per-tool "since when has this been missing" — same idea as DiscrepancyTracking
     (SERVER_ID -> {field: {"first_seen": ...}}) and same days_open/oldest_first_seen
-    semantics, just computed on read instead of maintained on write. Possible here because
-    ServerDiscrepancyPamela keeps one row per (server, date) already, unlike ServerDiscrepancy
-    which is fully replaced on every analysis run and therefore NEEDS a separate tracker table
-    as its only memory of "since when".
+    semantics, read from PamelaIssueRun (ServerDiscrepancyPamela's daily history kept as
+    run-length intervals, see pamela_history.py): first_seen is the start_date of the run
+    covering upto_date. One indexed query per call (after ensure_pamela_issue_runs' fingerprint
+    check of upto_date), whatever the length of the history —
+    reconstructing it here by walking ServerDiscrepancyPamela backward day by day cost
+    O(servers x tools x days) on every page view.
 
     Returns {SERVER_ID: {'days_open': int, 'active_issues': {tool: {'first_seen': iso}}}} —
-    only for servers that currently (on upto_date) have at least one missing tool.
+    only for servers that (on upto_date) have at least one missing tool.
     """
     if not server_ids:
         return {}
+    # upto_date's own rows must be folded in, as they are now (never recorded, or re-imported
+    # since) — ensure_pamela_issue_runs does that once per change of the date; only while
+    # another process is folding it is the answer derived live.
+    if not ensure_pamela_issue_runs(upto_date):
+        return _pamela_tracker_data_live(server_ids, upto_date)
+    runs = PamelaIssueRun.objects.filter(
+        SERVER_ID__in=server_ids, start_date__lte=upto_date, end_date__gte=upto_date
+    ).values_list('SERVER_ID', 'tool', 'start_date')
+
+    start_by_server = defaultdict(dict)
+    for sid, tool, start_date in runs:
+        start_by_server[sid][tool] = start_date
+
+    result = {}
+    for sid, starts in start_by_server.items():
+        result[sid] = {
+            'days_open': (upto_date - min(starts.values())).days + 1,
+            'active_issues': {
+                tool: {'first_seen': datetime.datetime.combine(start_date, datetime.time.min).isoformat()}
+                for tool, start_date in starts.items()
+            },
+        }
+    return result
+
+
+def _pamela_tracker_data_live(server_ids, upto_date):
+    # _pamela_tracker_data's fallback: the same result derived live from ServerDiscrepancyPamela's
+    # own daily history, walking each missing tool back day by day while it stays missing.
     rows = ServerDiscrepancyPamela.objects.filter(
         SERVER_ID__in=server_ids, snapshot_date__lte=upto_date
     ).exclude(missing_fields='').values_list('SERVER_ID', 'snapshot_date', 'missing_fields')
@@ -868,26 +898,18 @@ def _pamela_tracker_data(server_ids, upto_date):
         today_tools = by_date.get(upto_date, set())
         if not today_tools:
             continue
-        active_issues = {}
+        starts = {}
         for tool in today_tools:
-            first_seen_date = upto_date
             day = upto_date
-            while True:
-                prev = day - one_day
-                if tool in by_date.get(prev, set()):
-                    first_seen_date = prev
-                    day = prev
-                else:
-                    break
-            active_issues[tool] = {
-                'first_seen': datetime.datetime.combine(first_seen_date, datetime.time.min).isoformat()
-            }
-        oldest_date = min(
-            datetime.date.fromisoformat(v['first_seen'][:10]) for v in active_issues.values()
-        )
+            while tool in by_date.get(day - one_day, set()):
+                day -= one_day
+            starts[tool] = day
         result[sid] = {
-            'days_open': (upto_date - oldest_date).days + 1,
-            'active_issues': active_issues,
+            'days_open': (upto_date - min(starts.values())).days + 1,
+            'active_issues': {
+                tool: {'first_seen': datetime.datetime.combine(start_date, datetime.time.min).isoformat()}
+                for tool, start_date in starts.items()
+            },
         }
     return result
 
@@ -1195,9 +1217,9 @@ def pamela_server_view(request):
       - missing_fields exposed as "missing_tools" — see _pamela_base_qs().
       - snapshot_date is filtered by exact match, not construct_query's icontains (which
         ServerDiscrepancy never exercises against a DateField).
-      - days_open/tracker tooltip data comes from _pamela_tracker_data (derived from
-        ServerDiscrepancyPamela's own daily history) instead of DiscrepancyTracking — see
-        that function's docstring for why no separate tracker table is needed here.
+      - days_open/tracker tooltip data comes from _pamela_tracker_data (PamelaIssueRun, the
+        run-length form of ServerDiscrepancyPamela's own daily history) instead of
+        DiscrepancyTracking — see that function's docstring.
       - saved searches use view='discrepancies_pamela' (not app_name) so they don't mix with
         the normal Discrepancies view's saved searches.
       - no ExcludedServer filtering, no alive/dead any_inconsistency handling — exclusions are
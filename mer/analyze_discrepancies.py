@@ -8,11 +8,15 @@ from collections import defaultdict
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models import Q, Count
 
 from inventory.models import Server
-from discrepancies.models import ServerDiscrepancy, AnalysisSnapshot, AnalysisSnapshotBreakdown, AnalysisSnapshotCrossBreakdown, DiscrepancyTracking, ImportStatus, ExcludedServer
+from discrepancies.models import ServerDiscrepancy, AnalysisSnapshot, AnalysisSnapshotBreakdown, AnalysisSnapshotCrossBreakdown, AnalysisSnapshotDiffEntry, DiscrepancyTracking, ImportStatus, ExcludedServer
+from discrepancies.dashboard_metrics import build_dashboard_payloads, build_population_summary
+from discrepancies.exclusions import exclude_excluded
+from discrepancies.listbox_index import build_listbox_index
+from discrepancies.trend_series import record_trend_points
 
 
 # ============================================================================
@@ -587,11 +591,16 @@ def create_analysis_snapshot(
         new_issues_count=len(diff.get('new', [])),
         resolved_issues_count=len(diff.get('resolved', [])),
         changed_issues_count=len(diff.get('changed', {})),
-        diff_summary=diff,
+        # Preview only — the full diff goes to AnalysisSnapshotDiffEntry (save_diff_entries);
+        # filled in by diff_preview once those rows exist.
+        diff_summary={},
         persistent_days_threshold=persistent_days_threshold,
         persistent_servers_with_issues=len(persistent_records or []),
         persistent_alive_inconsistent_count=persistent_alive_inconsistent_count,
         persistent_dead_inconsistent_count=persistent_dead_inconsistent_count,
+        # ServerDiscrepancy has just been rewritten — publish the Servers page's dropdown
+        # contents for this snapshot (see listbox_index.py).
+        listbox_values=build_listbox_index('disc'),
     )
     
     for field, count_attr in field_mapping.items():
@@ -603,11 +612,59 @@ def create_analysis_snapshot(
                           for check in ALL_CHECKS if 'inconsistent' in check.__name__]
     
     snapshot.save()
+    save_diff_entries(snapshot, diff)
+    snapshot.diff_summary = diff_preview(snapshot)
+    snapshot.save(update_fields=['diff_summary'])
     
     write_log(f"Created analysis snapshot: {snapshot.id}")
     return snapshot
 
 
+def diff_preview(snapshot):
+    # What AnalysisSnapshot.diff_summary keeps inline: the first PREVIEW_SIZE entries per kind,
+    # read back from the rows save_diff_entries just wrote with snapshot_diff_api's own
+    # order_by('SERVER_ID'). Sorting in Python instead would follow codepoint order, which
+    # differs from the database collation (case, '-' vs '_'), and the API's offset=PREVIEW_SIZE
+    # page would then skip or repeat entries.
+    size = AnalysisSnapshotDiffEntry.PREVIEW_SIZE
+    entries = AnalysisSnapshotDiffEntry.objects.filter(snapshot=snapshot).order_by('SERVER_ID')
+    return {
+        'new': list(
+            entries.filter(kind=AnalysisSnapshotDiffEntry.KIND_NEW).values_list('SERVER_ID', flat=True)[:size]
+        ),
+        'resolved': list(
+            entries.filter(kind=AnalysisSnapshotDiffEntry.KIND_RESOLVED).values_list('SERVER_ID', flat=True)[:size]
+        ),
+        # [SERVER_ID, {'added', 'removed'}] pairs rather than a dict: a jsonb object does not
+        # keep its key order.
+        'changed': [
+            [row['SERVER_ID'], {'added': row['added'], 'removed': row['removed']}]
+            for row in entries.filter(kind=AnalysisSnapshotDiffEntry.KIND_CHANGED)
+                              .values('SERVER_ID', 'added', 'removed')[:size]
+        ],
+        'paged': True,
+    }
+
+
+def save_diff_entries(snapshot, diff):
+    rows = [
+        AnalysisSnapshotDiffEntry(snapshot=snapshot, kind=AnalysisSnapshotDiffEntry.KIND_NEW, SERVER_ID=sid)
+        for sid in diff.get('new', [])
+    ] + [
+        AnalysisSnapshotDiffEntry(snapshot=snapshot, kind=AnalysisSnapshotDiffEntry.KIND_RESOLVED, SERVER_ID=sid)
+        for sid in diff.get('resolved', [])
+    ] + [
+        AnalysisSnapshotDiffEntry(
+            snapshot=snapshot, kind=AnalysisSnapshotDiffEntry.KIND_CHANGED, SERVER_ID=sid,
+            added=change['added'], removed=change['removed'],
+        )
+        for sid, change in diff.get('changed', {}).items()
+    ]
+    if rows:
+        AnalysisSnapshotDiffEntry.objects.bulk_create(rows, batch_size=1000)
+        write_log(f"Saved {len(rows)} diff entries")
+
+
 def compute_breakdowns(records, dimension_fields, population_filter, excluded_ids, track_field_counts=True):
     """
     Aggregate issue counts by dimension value (REGION, OSSHORTNAME, ...) for the current run,
@@ -993,6 +1050,22 @@ def update_tracker(records, analysis_date):
         DiscrepancyTracking.objects.filter(pk__in=to_delete_ids).delete()
         write_log(f"Tracker: deleted {len(to_delete_ids)} fully-resolved entries")
 
+    publish_tracking()
+
+
+def publish_tracking():
+    # Copies every tracker's active_issues/oldest_first_seen onto the matching (just inserted)
+    # ServerDiscrepancy row in one UPDATE ... FROM — see the comment on
+    # ServerDiscrepancy.oldest_first_seen. Rows without a tracker keep NULL.
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            UPDATE discrepancies_serverdiscrepancy AS sd
+            SET active_issues = t.active_issues, oldest_first_seen = t.oldest_first_seen
+            FROM discrepancies_discrepancytracking AS t
+            WHERE t."SERVER_ID" = sd."SERVER_ID"
+        """)
+        write_log(f"Tracker: published first_seen data onto {cursor.rowcount} discrepancy rows")
+
 
 # ============================================================================
 # MAIN COMMAND
@@ -1099,80 +1172,108 @@ class Command(BaseCommand):
             # Report
             print_report(stats)
 
-            duration = datetime.datetime.now() - start_time
-            snapshot = create_analysis_snapshot(
-                stats, analysis_date, duration.total_seconds(), diff,
-                persistent_records=missing_data_persistent, persistent_days_threshold=persistent_days,
-                persistent_alive_inconsistent_count=len(alive_inconsistent_persistent),
-                persistent_dead_inconsistent_count=len(dead_inconsistent_persistent),
-            )
-
-            dimension_fields = breakdown_dimension_fields(group_config)
-            groups = group_config.get('groups', {})
-
-            metric_records = {
-                AnalysisSnapshotBreakdown.METRIC_MISSING_DATA: missing_data_persistent,
-                AnalysisSnapshotBreakdown.METRIC_ALIVE_INCONSISTENT: alive_inconsistent_persistent,
-                AnalysisSnapshotBreakdown.METRIC_DEAD_INCONSISTENT: dead_inconsistent_persistent,
-            }
-
-            # Captured from the missing_data iteration below (dict order: missing_data runs
-            # first) and reused as alive/dead's population — see compute_cross_breakdown's
-            # base_population and AnalysisSnapshot.total_relevant_servers.
-            missing_data_pop_matrix = None
-
-            for metric, records in metric_records.items():
-                population_filter = POPULATION_FILTERS[metric]
-                mode = breakdown_mode_for_metric(group_config, metric)
-                issue_ids = {r['SERVER_ID'] for r in records}
+            # The snapshot is published in one transaction with everything read off it —
+            # breakdowns, dashboard payloads, population summary, trend points — so no request
+            # ever sees (and caches against its ID) a snapshot whose derived data isn't written yet.
+            with transaction.atomic():
+                duration = datetime.datetime.now() - start_time
+                snapshot = create_analysis_snapshot(
+                    stats, analysis_date, duration.total_seconds(), diff,
+                    persistent_records=missing_data_persistent, persistent_days_threshold=persistent_days,
+                    persistent_alive_inconsistent_count=len(alive_inconsistent_persistent),
+                    persistent_dead_inconsistent_count=len(dead_inconsistent_persistent),
+                )
 
-                if mode == 'dimensions':
-                    breakdowns = compute_breakdowns(
-                        records, dimension_fields, population_filter, excluded_ids,
-                        track_field_counts=(metric == AnalysisSnapshotBreakdown.METRIC_MISSING_DATA),
+                dimension_fields = breakdown_dimension_fields(group_config)
+                groups = group_config.get('groups', {})
+
+                metric_records = {
+                    AnalysisSnapshotBreakdown.METRIC_MISSING_DATA: missing_data_persistent,
+                    AnalysisSnapshotBreakdown.METRIC_ALIVE_INCONSISTENT: alive_inconsistent_persistent,
+                    AnalysisSnapshotBreakdown.METRIC_DEAD_INCONSISTENT: dead_inconsistent_persistent,
+                }
+
+                # Captured from the missing_data iteration below (dict order: missing_data runs
+                # first) and reused as alive/dead's population — see compute_cross_breakdown's
+                # base_population and AnalysisSnapshot.total_relevant_servers.
+                missing_data_pop_matrix = None
+
+                for metric, records in metric_records.items():
+                    population_filter = POPULATION_FILTERS[metric]
+                    mode = breakdown_mode_for_metric(group_config, metric)
+                    issue_ids = {r['SERVER_ID'] for r in records}
+
+                    if mode == 'dimensions':
+                        breakdowns = compute_breakdowns(
+                            records, dimension_fields, population_filter, excluded_ids,
+                            track_field_counts=(metric == AnalysisSnapshotBreakdown.METRIC_MISSING_DATA),
+                        )
+                        save_breakdowns(snapshot, metric, breakdowns)
+
+                    # missing_data's cross-tab population stays ALIVE+OPERATIONAL-scoped (matches
+                    # total_servers_analyzed). alive/dead reuse missing_data's own per-cell
+                    # population instead of querying the whole fleet — their "population" is
+                    # deliberately redefined as active + inconsistencies (matches
+                    # total_relevant_servers), not the raw fleet count (see compute_cross_breakdown).
+                    cross_population_filter = (
+                        population_filter if metric == AnalysisSnapshotBreakdown.METRIC_MISSING_DATA
+                        else FLEET_POPULATION_FILTER
                     )
-                    save_breakdowns(snapshot, metric, breakdowns)
-
-                # missing_data's cross-tab population stays ALIVE+OPERATIONAL-scoped (matches
-                # total_servers_analyzed). alive/dead reuse missing_data's own per-cell
-                # population instead of querying the whole fleet — their "population" is
-                # deliberately redefined as active + inconsistencies (matches
-                # total_relevant_servers), not the raw fleet count (see compute_cross_breakdown).
-                cross_population_filter = (
-                    population_filter if metric == AnalysisSnapshotBreakdown.METRIC_MISSING_DATA
-                    else FLEET_POPULATION_FILTER
-                )
-                base_population = (
-                    missing_data_pop_matrix if metric != AnalysisSnapshotBreakdown.METRIC_MISSING_DATA
-                    else None
-                )
-                for row_field, bucket_field in CROSS_BREAKDOWNS:
-                    group_def = groups.get(bucket_field)
-                    if not group_def:
-                        write_log(f"WARNING: no breakdown_groups.json entry for '{bucket_field}' — skipping {row_field}x{bucket_field} cross-breakdown ({metric})")
-                        continue
-                    matrix = compute_cross_breakdown(
-                        issue_ids, row_field, bucket_field, group_def, cross_population_filter,
-                        excluded_ids, base_population=base_population,
+                    base_population = (
+                        missing_data_pop_matrix if metric != AnalysisSnapshotBreakdown.METRIC_MISSING_DATA
+                        else None
                     )
-                    if metric == AnalysisSnapshotBreakdown.METRIC_MISSING_DATA:
-                        missing_data_pop_matrix = {key: data['total_servers'] for key, data in matrix.items()}
-                    save_cross_breakdown(snapshot, metric, row_field, matrix)
-
-            # Recap table — missing_data only, one row per configured field ("how many
-            # servers are missing this field"), split by OS-bucket column. Stored with the
-            # RECAP sentinel row_field so it doesn't collide with the region x OS cross-tabs.
-            recap_fields = recap_row_fields(group_config)
-            recap_bucket_field = group_config.get('recap', {}).get('bucket_field')
-            recap_group_def = groups.get(recap_bucket_field) if recap_bucket_field else None
-            if recap_fields and recap_group_def:
-                matrix = compute_recap_breakdown(
-                    missing_data_persistent, recap_fields, recap_bucket_field, recap_group_def,
-                    POPULATION_FILTERS['missing_data'], excluded_ids,
-                )
-                save_cross_breakdown(snapshot, AnalysisSnapshotBreakdown.METRIC_MISSING_DATA, 'RECAP', matrix)
-            elif recap_fields:
-                write_log(f"WARNING: breakdown_groups.json 'recap.bucket_field' ({recap_bucket_field!r}) has no matching 'groups' entry — skipping recap table")
+                    for row_field, bucket_field in CROSS_BREAKDOWNS:
+                        group_def = groups.get(bucket_field)
+                        if not group_def:
+                            write_log(f"WARNING: no breakdown_groups.json entry for '{bucket_field}' — skipping {row_field}x{bucket_field} cross-breakdown ({metric})")
+                            continue
+                        matrix = compute_cross_breakdown(
+                            issue_ids, row_field, bucket_field, group_def, cross_population_filter,
+                            excluded_ids, base_population=base_population,
+                        )
+                        if metric == AnalysisSnapshotBreakdown.METRIC_MISSING_DATA:
+                            missing_data_pop_matrix = {key: data['total_servers'] for key, data in matrix.items()}
+                        save_cross_breakdown(snapshot, metric, row_field, matrix)
+
+                # Recap table — missing_data only, one row per configured field ("how many
+                # servers are missing this field"), split by OS-bucket column. Stored with the
+                # RECAP sentinel row_field so it doesn't collide with the region x OS cross-tabs.
+                recap_fields = recap_row_fields(group_config)
+                recap_bucket_field = group_config.get('recap', {}).get('bucket_field')
+                recap_group_def = groups.get(recap_bucket_field) if recap_bucket_field else None
+                if recap_fields and recap_group_def:
+                    matrix = compute_recap_breakdown(
+                        missing_data_persistent, recap_fields, recap_bucket_field, recap_group_def,
+                        POPULATION_FILTERS['missing_data'], excluded_ids,
+                    )
+                    save_cross_breakdown(snapshot, AnalysisSnapshotBreakdown.METRIC_MISSING_DATA, 'RECAP', matrix)
+                elif recap_fields:
+                    write_log(f"WARNING: breakdown_groups.json 'recap.bucket_field' ({recap_bucket_field!r}) has no matching 'groups' entry — skipping recap table")
+
+                # Dashboard widget counts for "All Servers" and every system permanent filter,
+                # served by dashboard_filter_api straight from this snapshot (see
+                # dashboard_metrics.py). Computed against the exclusion list as it is now — the
+                # tracker is already published, so oldest_first_seen is current too.
+                current_excluded = set(ExcludedServer.objects.values_list('server_name', flat=True))
+                snapshot.dashboard_payloads = build_dashboard_payloads(current_excluded, exclude_excluded)
+                # Eligible population grouped by the permanent-filter fields, for the selections
+                # that aren't precomputed (saved searches, multi:) — see summary_population_counts.
+                snapshot.population_summary = build_population_summary(current_excluded, exclude_excluded)
+                snapshot.save(update_fields=['dashboard_payloads', 'population_summary'])
+                write_log(f"Stored dashboard payloads for {len(snapshot.dashboard_payloads)} filters")
+                if snapshot.population_summary['rows'] is None:
+                    write_log("Population summary: some servers span several groups — stored without rows (live counts)")
+                else:
+                    write_log(
+                        f"Stored population summary: {len(snapshot.population_summary['rows'])} groups over "
+                        + ', '.join(snapshot.population_summary['fields'])
+                    )
+
+                # Quality Trend points for this run (see trend_series.py)
+                backfilled = record_trend_points('disc', [snapshot])
+                if backfilled:
+                    write_log(f"Trend series: backfilled {backfilled} existing snapshots")
 
             write_log(f"Completed in {duration}")
             msg = (f"Analysis complete: {stats['total_entries']} analyzed, {stats['servers_with_discrepancies']} servers with discrepancies")